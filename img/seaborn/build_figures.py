@@ -0,0 +1,381 @@
+"""Single entry point for the paper figures: incremental, parallel, lazy.
+
+Every figure is keyed on a content hash of
+  * its input data (role-switch latencies, drive pyramid file),
+  * the source of its plotting function and the functions it calls, also
+    through imports of scripts/ modules (drive_pyramid, role_latency, ...),
+    and of the function that loads its input data,
+  * its module's top-level style setup and the plotting library versions.
+The key is computed from the module sources with `ast`, without importing
+matplotlib, seaborn or pandas, so `--list` and an up-to-date build return
+almost immediately. A figure whose key and output files are unchanged since
+the last build is skipped; the stale ones are rendered in parallel worker
+processes, each importing only the module its figure needs. Keys are kept
+in .figure_cache.json next to the outputs.
+
+Each module's rcParams are captured when it is first imported and re-applied
+before every render, so figures from different modules never leak style
+into each other inside a reused worker process.
+
+--profile DIR re-renders the selected figures with the figure_profile hooks
+on and writes DIR/<figure>.json (per-stage times, artist count, peak RSS),
+plus DIR/<figure>.prof cProfile dumps with --cprofile.
+
+Usage:
+    python3 build_figures.py --list
+    python3 build_figures.py                       # rebuild what changed
+    python3 build_figures.py switch_latency_violin --logs ../../sim/regr_runs
+    python3 build_figures.py contention_heatmap --pyramid scl.pyr
+    python3 build_figures.py --force architecture_diagram
+    python3 build_figures.py --bench               # startup benchmark
+    python3 build_figures.py --profile prof/ --cprofile switch_latency_violin
+"""
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+output_dir = os.path.dirname(os.path.abspath(__file__))
+scripts_dir = os.path.join(output_dir, '..', '..', 'scripts')
+CACHE_NAME = '.figure_cache.json'
+BENCH_NAME = '.startup_bench.jsonl'
+LIBRARIES = ['matplotlib', 'seaborn', 'pandas', 'numpy']
+
+# module name -> rcParams right after its import
+_MODULE_RC = {}
+
+# name -> (module, plotting function, output files, description)
+FIGURES = {
+    'safety_gap_gantt': ('generate_plots', 'plot_safety_gap', ['safety_gap_gantt.png'],
+                         "BOI-4 release-before-commit handover"),
+    'switch_latency_violin': ('generate_plots', 'plot_switch_latencies', ['switch_latency_violin.png'],
+                              "role-switch latency per direction (--logs)"),
+    'contention_heatmap': ('generate_plots', 'plot_contention_heatmap', ['contention_heatmap.png'],
+                           "BOI-2 SCL drive heatmap (--pyramid)"),
+    'architecture_diagram': ('generate_arch', 'generate_arch_diagram',
+                             ['architecture_diagram.png', 'architecture_diagram.pdf', 'architecture_diagram.svg'],
+                             "VIP architecture block diagram"),
+}
+
+
+# name -> build_figures function that loads the figure's input data
+INPUT_LOADERS = {'switch_latency_violin': 'latency_inputs'}
+
+_PARSED = {}
+
+
+def module_path(module_name):
+    """Source file of a figure module or of a scripts/ module it imports, or None."""
+    for d in (output_dir, scripts_dir):
+        path = os.path.join(d, module_name + '.py')
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _parse(module_name):
+    """(source lines, AST) of a figure or scripts/ module, parsed once."""
+    if module_name not in _PARSED:
+        with open(module_path(module_name)) as f:
+            text = f.read()
+        _PARSED[module_name] = (text.splitlines(True), ast.parse(text))
+    return _PARSED[module_name]
+
+
+def _segment(lines, node):
+    return ''.join(lines[node.lineno - 1:node.end_lineno])
+
+
+def _local_imports(nodes):
+    """({alias: module}, {alias: (module, name)}) for imports of figure/scripts modules in nodes."""
+    modules, names = {}, {}
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            for a in node.names:
+                if module_path(a.name):
+                    modules[a.asname or a.name] = a.name
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level and module_path(node.module):
+            for a in node.names:
+                names[a.asname or a.name] = (node.module, a.name)
+    return modules, names
+
+
+def source_closure(module_name, func_name):
+    """Source of a function plus every function it (transitively) references.
+
+    References are followed within the module and through imports of the
+    other figure modules and of scripts/ (drive_pyramid, role_latency, ...);
+    each imported module also contributes its top-level statements.
+    """
+    seen = set()
+    todo = [(module_name, func_name)]
+    while todo:
+        mod, name = todo.pop()
+        if (mod, name) in seen:
+            continue
+        lines, tree = _parse(mod)
+        func = next((n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == name), None)
+        if func is None:
+            continue
+        seen.add((mod, name))
+        modules, names = _local_imports(list(tree.body) + list(ast.walk(func)))
+        for n in ast.walk(func):
+            if isinstance(n, ast.Name):
+                todo.append(names.get(n.id, (mod, n.id)))
+            elif isinstance(n, ast.Attribute) and isinstance(n.value, ast.Name) and n.value.id in modules:
+                todo.append((modules[n.value.id], n.attr))
+    used = sorted(set(mod for mod, _ in seen) - {module_name})
+    return ''.join(['# {}\n'.format(mod) + _segment(_parse(mod)[0], f)
+                    for mod, name in sorted(seen)
+                    for f in _parse(mod)[1].body if isinstance(f, ast.FunctionDef) and f.name == name] +
+                   [style_source(mod) for mod in used])
+
+
+def style_source(module_name):
+    """The module's top-level statements (imports, rcParams/style setup, constants) minus __main__."""
+    lines, tree = _parse(module_name)
+    return ''.join(_segment(lines, n) for n in tree.body
+                     if not isinstance(n, (ast.FunctionDef, ast.If)))
+
+
+def library_versions():
+    from importlib import metadata
+    versions = []
+    for lib in LIBRARIES:
+        try:
+            versions.append('{}={}'.format(lib, metadata.version(lib)))
+        except metadata.PackageNotFoundError:
+            versions.append(lib + '=none')
+    return ' '.join(versions)
+
+
+def load_module(name):
+    """Imports a figure module, recording the rcParams its import sets up."""
+    import matplotlib
+    if name not in _MODULE_RC:
+        base = dict(matplotlib.rcParams)
+        importlib.import_module(name)
+        _MODULE_RC[name] = dict(matplotlib.rcParams)
+        matplotlib.rcParams.update(base)
+    return sys.modules[name]
+
+
+def file_digest(path, block=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def latency_inputs(roots, db_path=None):
+    """Role-switch latencies (extracting new logs first) and their digest; needs only NumPy."""
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    import role_latency
+    latencies = role_latency.cached_latencies(roots, db_path)
+    h = hashlib.blake2b(digest_size=16)
+    for d in sorted(latencies):
+        h.update(d.encode('ascii'))
+        h.update(latencies[d].tobytes())
+    return latencies, h.hexdigest()
+
+
+def figure_inputs(name, args):
+    """Returns (call args, data digest) for one figure."""
+    if name == 'switch_latency_violin':
+        latencies, digest = latency_inputs(args.logs, args.db)
+        return (latencies,), digest
+    if name == 'contention_heatmap':
+        pyramid = os.path.abspath(args.pyramid) if args.pyramid else None
+        return (pyramid,), file_digest(pyramid) if pyramid else ''
+    return (), ''
+
+
+def figure_key(name, data_digest, versions):
+    module_name, func_name, outputs, _ = FIGURES[name]
+    loader = source_closure('build_figures', INPUT_LOADERS[name]) if name in INPUT_LOADERS else ''
+    h = hashlib.blake2b(digest_size=16)
+    for part in (source_closure(module_name, func_name), style_source(module_name), loader, versions,
+                 data_digest, ' '.join(outputs)):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def render(job):
+    """Renders one figure (runs in a worker process); returns (name, seconds)."""
+    name, call_args, out_dir = job
+    module_name, func_name, _, _ = FIGURES[name]
+    start = time.time()
+    module = load_module(module_name)
+    import matplotlib
+    matplotlib.rcParams.update(_MODULE_RC[module_name])
+    module.output_dir = out_dir
+    getattr(module, func_name)(*call_args)
+    return name, time.time() - start
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def build(names, args):
+    """Renders the stale figures among `names`; returns {name: seconds or None if skipped}."""
+    cache_path = os.path.join(args.out_dir, CACHE_NAME)
+    cache = load_cache(cache_path)
+    versions = library_versions()
+    inputs = dict((n, figure_inputs(n, args)) for n in names)
+    keys = dict((n, figure_key(n, inputs[n][1], versions)) for n in names)
+
+    stale = []
+    for n in names:
+        outputs = [os.path.join(args.out_dir, o) for o in FIGURES[n][2]]
+        if args.force or cache.get(n) != keys[n] or not all(os.path.exists(o) for o in outputs):
+            stale.append(n)
+
+    result = dict((n, None) for n in names)
+    jobs = [(n, inputs[n][0], args.out_dir) for n in stale]
+    if len(jobs) > 1 and args.jobs != 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            done = list(pool.map(render, jobs))
+    else:
+        done = [render(j) for j in jobs]
+    for n, elapsed in done:
+        result[n] = elapsed
+        cache[n] = keys[n]
+
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    return result
+
+
+def _timed(cmd, repeat):
+    """Best of `repeat` runs: the float the command prints last, else its wall time."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             cwd=output_dir, universal_newlines=True).stdout.strip().splitlines()
+        elapsed = time.time() - start
+        try:
+            elapsed = float(out[-1])
+        except (IndexError, ValueError):
+            pass
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench(repeat=3, history=None):
+    """Times --list, each module import and the first figure in fresh interpreters."""
+    history = history or os.path.join(output_dir, BENCH_NAME)
+    me = os.path.abspath(__file__)
+    results = {'list': _timed([sys.executable, me, '--list'], repeat)}
+    for module_name in sorted(set(f[0] for f in FIGURES.values())):
+        results['import_' + module_name] = _timed([sys.executable, '-c',
+            'import time; t = time.time(); import {}; print(time.time() - t)'.format(module_name)], repeat)
+    tmp = tempfile.mkdtemp(prefix='figbench_')
+    results['first_figure'] = _timed([sys.executable, me, '--force', '-j', '1', '-o', tmp,
+                                      'safety_gap_gantt'], repeat)
+
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, cwd=output_dir,
+                             universal_newlines=True).stdout.strip()
+    except OSError:
+        rev = ''
+    previous = None
+    if os.path.exists(history):
+        with open(history) as f:
+            lines = [l for l in f if l.strip()]
+        previous = json.loads(lines[-1])['results'] if lines else None
+    with open(history, 'a') as f:
+        f.write(json.dumps({'time': time.time(), 'rev': rev, 'results': results}) + '\n')
+
+    print("{:<28} | {:>10} | {:>10}".format("Stage", "Now (s)", "Prev (s)"))
+    print("-" * 54)
+    for stage, value in results.items():
+        prev = previous.get(stage) if previous else None
+        print("{:<28} | {:>10.3f} | {:>10}".format(stage, value, "" if prev is None else "{:.3f}".format(prev)))
+    return results
+
+
+def print_profile(profile_dir, names):
+    """Prints the per-stage records figure_profile wrote for `names`."""
+    print("{:<24} | {:>8} | {:>8} | {:>9} | {}".format("Figure", "Total s", "Artists", "RSS (MB)", "Stages (s)"))
+    print("-" * 100)
+    for name in names:
+        try:
+            with open(os.path.join(profile_dir, name + '.json')) as f:
+                rec = json.load(f)
+        except (IOError, ValueError):
+            print("{:<24} | {:>8}".format(name, "n/a"))
+            continue
+        stages = ' '.join('{}={:.3f}'.format(k, v) for k, v in rec['stages'].items())
+        print("{:<24} | {:>8.3f} | {:>8} | {:>9.1f} | {}".format(
+            name, rec['total_s'], rec['artists'] if rec['artists'] is not None else '-', rec['peak_rss_mb'], stages))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build the paper figures (only those whose inputs changed)")
+    p.add_argument('figures', nargs='*', metavar='FIGURE', help="figure names (default: all; see --list)")
+    p.add_argument('--list', action='store_true', help="list figures and exit")
+    p.add_argument('--logs', action='append', default=[], help="run-log directory to scan for new role-switch seeds")
+    p.add_argument('--db', default=None, help="role-switch cache (default: sim/regr_index.db, if it exists)")
+    p.add_argument('--pyramid', default=None, help="SCL drive pyramid (scripts/drive_pyramid.py) for BOI-2")
+    p.add_argument('-j', '--jobs', type=int, default=None, help="render processes")
+    p.add_argument('-o', '--out-dir', default=output_dir)
+    p.add_argument('--force', action='store_true', help="render even if up to date")
+    p.add_argument('--bench', action='store_true', help="run the startup benchmark and append it to " + BENCH_NAME)
+    p.add_argument('--profile', default=None, metavar='DIR', help="re-render with per-stage profiling, JSON records in DIR")
+    p.add_argument('--cprofile', action='store_true', help="with --profile, also write cProfile dumps")
+    args = p.parse_args(argv)
+
+    if args.list:
+        for name in sorted(FIGURES):
+            _, _, outputs, description = FIGURES[name]
+            print("{:<24} {:<44} {}".format(name, description, ', '.join(outputs)))
+        return 0
+    if args.bench:
+        bench()
+        return 0
+    unknown = [n for n in args.figures if n not in FIGURES]
+    if unknown:
+        p.error("unknown figure(s): {} (see --list)".format(', '.join(unknown)))
+
+    if args.cprofile and not args.profile:
+        p.error("--cprofile needs --profile DIR")
+    if args.profile:
+        # Read by figure_profile when the workers import the figure modules
+        args.profile = os.path.abspath(args.profile)
+        if not os.path.isdir(args.profile):
+            os.makedirs(args.profile)
+        os.environ['FIGURE_PROFILE'] = args.profile
+        os.environ['FIGURE_CPROFILE'] = '1' if args.cprofile else '0'
+        args.force = True
+
+    start = time.time()
+    names = args.figures or sorted(FIGURES)
+    result = build(names, args)
+    for name in sorted(result):
+        elapsed = result[name]
+        print("{:<24} {}".format(name, "up to date" if elapsed is None else "rendered in {:.2f} s".format(elapsed)))
+    print("Done in {:.2f} s".format(time.time() - start))
+    if args.profile:
+        print_profile(args.profile, names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
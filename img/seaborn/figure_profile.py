@@ -0,0 +1,101 @@
+"""Opt-in per-stage profiling of the figure scripts.
+
+Off unless FIGURE_PROFILE names an output directory when the figure modules
+are imported (build_figures.py --profile DIR sets it). Disabled, `profiled`
+returns the plotting function unchanged and `stage` hands back one shared
+no-op context manager, so the hooks cost nothing measurable.
+
+Enabled, every profiled figure writes DIR/<figure>.json with its total and
+per-stage wall times (DataFrame construction, seaborn statistics,
+tight_layout, savefig, ...), the artist count of the saved figure and the
+process's peak RSS. With FIGURE_CPROFILE=1 a DIR/<figure>.prof cProfile dump
+is written as well (view it with `python3 -m pstats`). Peak RSS is the
+process high-water mark, so it includes earlier figures rendered in the
+same worker.
+"""
+import contextlib
+import functools
+import json
+import os
+import time
+
+PROFILE_DIR = os.environ.get('FIGURE_PROFILE') or None
+CPROFILE = PROFILE_DIR is not None and os.environ.get('FIGURE_CPROFILE') == '1'
+
+_NULL = contextlib.nullcontext()
+_current = None
+
+
+def peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+
+@contextlib.contextmanager
+def _timed_stage(name, fig):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(name, time.perf_counter() - start)
+        if fig is not None:
+            artists(fig)
+
+
+def stage(name, fig=None):
+    """Times a block as stage `name`; with `fig`, also records its artist count."""
+    if _current is None:
+        return _NULL
+    return _timed_stage(name, fig)
+
+
+def add_stage(name, seconds):
+    """Records an externally timed stage (accumulates repeated names)."""
+    if _current is not None:
+        stages = _current['stages']
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+def artists(fig):
+    """Records the number of artists in `fig`."""
+    if _current is not None:
+        _current['artists'] = len(fig.findobj())
+
+
+def profiled(name):
+    """Decorator: profile one figure function when FIGURE_PROFILE is set.
+
+    Nested profiled calls (an entry point wrapping the plotting function)
+    add their stages to the outer figure's record.
+    """
+    def wrap(func):
+        if PROFILE_DIR is None:
+            return func
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            global _current
+            if _current is not None:
+                return func(*args, **kwargs)
+            _current = {'figure': name, 'stages': {}, 'artists': None}
+            profiler = None
+            if CPROFILE:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current['total_s'] = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.disable()
+                    profiler.dump_stats(os.path.join(PROFILE_DIR, name + '.prof'))
+                _current['peak_rss_mb'] = peak_rss_mb()
+                if not os.path.isdir(PROFILE_DIR):
+                    os.makedirs(PROFILE_DIR)
+                with open(os.path.join(PROFILE_DIR, name + '.json'), 'w') as f:
+                    json.dump(_current, f, indent=1)
+                _current = None
+        return run
+    return wrap
@@ -2,7 +2,11 @@ import matplotlib
 matplotlib.use("Agg")  # headless backend (no Tk required)
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection, PatchCollection
 import os
+import time
+
+import figure_profile as prof
 
 # Ensure output directory exists
 output_dir = os.path.dirname(os.path.abspath(__file__))
@@ -49,28 +53,59 @@ def draw_arrow(ax, start, end, color='black', lw=1.0, style='->', linestyle='sol
                                     linestyle=linestyle, shrinkA=0, shrinkB=0)
     ax.add_patch(arrow)
 
-def draw_line(ax, points, color='black', lw=1.0, linestyle='solid', zorder=5):
+def new_batch():
+    """Collects ports, circles and lines so each same-styled group becomes one collection."""
+    return {'ports': {}, 'circles': {}, 'lines': {}}
+
+def flush_batch(ax, batch):
+    """Adds one collection artist per style group of a batch."""
+    for zorder, centers in batch['ports'].items():
+        rects = [patches.Rectangle((x - PORT_SIZE/2, y - PORT_SIZE/2), PORT_SIZE, PORT_SIZE)
+                 for x, y in centers]
+        ax.add_collection(PatchCollection(rects, facecolor='black', edgecolor='black', zorder=zorder))
+    for (lw, zorder), circles in batch['circles'].items():
+        ax.add_collection(PatchCollection([patches.Circle(xy, r) for xy, r in circles],
+                                          facecolor='white', edgecolor='black', linewidths=lw, zorder=zorder))
+    for (color, lw, linestyle, zorder), lines in batch['lines'].items():
+        ax.add_collection(LineCollection(lines, colors=color, linewidths=lw, linestyles=linestyle, zorder=zorder))
+
+def draw_line(ax, points, color='black', lw=1.0, linestyle='solid', zorder=5, batch=None):
     """Draws a polyline (behind boxes)."""
+    if batch is not None:
+        batch['lines'].setdefault((color, lw, linestyle, zorder), []).append(points)
+        return
     xs = [p[0] for p in points]
     ys = [p[1] for p in points]
     ax.plot(xs, ys, color=color, lw=lw, linestyle=linestyle, zorder=zorder)
 
-def add_port(ax, xy, zorder=45):
+def add_port(ax, xy, zorder=45, batch=None):
     """Adds a uniform port indicator."""
+    if batch is not None:
+        batch['ports'].setdefault(zorder, []).append(xy)
+        return
     rect = patches.Rectangle((xy[0] - PORT_SIZE/2, xy[1] - PORT_SIZE/2), 
                               PORT_SIZE, PORT_SIZE,
                               facecolor='black', edgecolor='black', zorder=zorder)
     ax.add_patch(rect)
 
-def add_num(ax, xy, num, zorder=50):
+def add_num(ax, xy, num, zorder=50, radius=0.16, lw=0.8, fontsize=8, batch=None):
     """Adds a circled number annotation."""
-    circle = plt.Circle(xy, 0.16, facecolor='white', edgecolor='black', lw=0.8, zorder=zorder)
-    ax.add_patch(circle)
-    ax.text(xy[0], xy[1], str(num), ha='center', va='center', fontsize=8, 
+    if batch is not None:
+        batch['circles'].setdefault((lw, zorder), []).append((xy, radius))
+    else:
+        circle = plt.Circle(xy, radius, facecolor='white', edgecolor='black', lw=lw, zorder=zorder)
+        ax.add_patch(circle)
+    ax.text(xy[0], xy[1], str(num), ha='center', va='center', fontsize=fontsize, 
             weight='bold', zorder=zorder+1)
 
+@prof.profiled('architecture_diagram')
 def generate_arch_diagram():
     print("Generating IEEE Access Architecture Diagram (Final)...")
+    timing = {}
+    start = time.time()
+
+    # Ports, circles and connection lines are batched into collections (flushed below)
+    batch = new_batch()
     
     # Double-column optimized size
     fig, ax = plt.subplots(figsize=(11, 9))
@@ -132,8 +167,8 @@ def generate_arch_diagram():
     # =========================================================================
     
     # Bus lines
-    ax.plot([1.0, 12.5], [1.6, 1.6], color=C_BUS, lw=2.5, zorder=0)  # SDA
-    ax.plot([1.0, 12.5], [1.0, 1.0], color=C_BUS, lw=2.5, zorder=0)  # SCL
+    draw_line(ax, [(1.0, 1.6), (12.5, 1.6)], color=C_BUS, lw=2.5, zorder=0, batch=batch)  # SDA
+    draw_line(ax, [(1.0, 1.0), (12.5, 1.0)], color=C_BUS, lw=2.5, zorder=0, batch=batch)  # SCL
     
     # Labels
     ax.text(0.5, 1.6, "SDA", weight='bold', va='center', fontsize=10, zorder=5,
@@ -146,12 +181,12 @@ def generate_arch_diagram():
     draw_box(ax, (11.0, 0.4), 1.6, 0.8, "RTL Slave", facecolor=C_MID, zorder=10)
 
     # Bus taps
-    ax.plot([3.5, 3.5], [3.0, 1.6], color='black', lw=0.8, zorder=5)
-    ax.plot([4.3, 4.3], [3.0, 1.0], color='black', lw=0.8, zorder=5)
+    draw_line(ax, [(3.5, 3.0), (3.5, 1.6)], lw=0.8, batch=batch)
+    draw_line(ax, [(4.3, 3.0), (4.3, 1.0)], lw=0.8, batch=batch)
     ax.scatter([3.5, 4.3], [1.6, 1.0], color='black', s=20, zorder=10)
     
-    ax.plot([9.8, 9.8], [1.6, 0.4], color='black', lw=0.8, zorder=5)
-    ax.plot([11.8, 11.8], [1.6, 0.4], color='black', lw=0.8, zorder=5)
+    draw_line(ax, [(9.8, 1.6), (9.8, 0.4)], lw=0.8, batch=batch)
+    draw_line(ax, [(11.8, 1.6), (11.8, 0.4)], lw=0.8, batch=batch)
     ax.scatter([9.8, 11.8], [1.6, 1.6], color='black', s=20, zorder=10)
 
     # =========================================================================
@@ -159,62 +194,62 @@ def generate_arch_diagram():
     # =========================================================================
 
     # 1: Sequencer -> Driver
-    add_port(ax, (1.95, 5.9))
-    add_port(ax, (1.95, 5.2))
+    add_port(ax, (1.95, 5.9), batch=batch)
+    add_port(ax, (1.95, 5.2), batch=batch)
     draw_arrow(ax, (1.95, 5.82), (1.95, 5.28), lw=1.0)
-    add_num(ax, (1.55, 5.55), 1)
+    add_num(ax, (1.55, 5.55), 1, batch=batch)
 
     # 2: Config -> Driver (route line ABOVE Sequencer box)
-    add_port(ax, (3.9, 7.3))
-    add_port(ax, (2.3, 5.2))
+    add_port(ax, (3.9, 7.3), batch=batch)
+    add_port(ax, (2.3, 5.2), batch=batch)
     # Horizontal line at y=7.05 to clear Sequencer (which ends at y=6.8)
-    draw_line(ax, [(3.9, 7.22), (3.9, 7.05), (2.3, 7.05), (2.3, 5.28)], linestyle='dashed', lw=0.8)
-    add_num(ax, (3.1, 7.05), 2)  # On the horizontal line, above Sequencer
+    draw_line(ax, [(3.9, 7.22), (3.9, 7.05), (2.3, 7.05), (2.3, 5.28)], linestyle='dashed', lw=0.8, batch=batch)
+    add_num(ax, (3.1, 7.05), 2, batch=batch)  # On the horizontal line, above Sequencer
 
     # Config -> Monitor
-    add_port(ax, (4.9, 7.3))
-    add_port(ax, (7.1, 5.2))
-    draw_line(ax, [(4.9, 7.22), (4.9, 7.05), (7.1, 7.05), (7.1, 5.28)], linestyle='dashed', lw=0.8)
+    add_port(ax, (4.9, 7.3), batch=batch)
+    add_port(ax, (7.1, 5.2), batch=batch)
+    draw_line(ax, [(4.9, 7.22), (4.9, 7.05), (7.1, 7.05), (7.1, 5.28)], linestyle='dashed', lw=0.8, batch=batch)
 
     # 3: Driver -> Interface
-    add_port(ax, (2.3, 4.3))
-    add_port(ax, (2.3, 3.75))
+    add_port(ax, (2.3, 4.3), batch=batch)
+    add_port(ax, (2.3, 3.75), batch=batch)
     draw_arrow(ax, (2.3, 4.22), (2.3, 3.83), lw=1.0)
-    add_num(ax, (1.9, 4.0), 3)
+    add_num(ax, (1.9, 4.0), 3, batch=batch)
 
     # 4: Interface -> Monitor
-    add_port(ax, (6.5, 3.75))
-    add_port(ax, (7.1, 4.3))
-    draw_line(ax, [(6.5, 3.83), (6.5, 4.05), (7.1, 4.05), (7.1, 4.22)], lw=1.0)
-    add_num(ax, (6.8, 3.9), 4)
+    add_port(ax, (6.5, 3.75), batch=batch)
+    add_port(ax, (7.1, 4.3), batch=batch)
+    draw_line(ax, [(6.5, 3.83), (6.5, 4.05), (7.1, 4.05), (7.1, 4.22)], lw=1.0, batch=batch)
+    add_num(ax, (6.8, 3.9), 4, batch=batch)
 
     # 5: Driver <-> Event Pool
-    add_port(ax, (2.9, 4.75))
-    add_port(ax, (3.8, 4.75))
+    add_port(ax, (2.9, 4.75), batch=batch)
+    add_port(ax, (3.8, 4.75), batch=batch)
     draw_arrow(ax, (2.98, 4.75), (3.72, 4.75), linestyle='dotted', lw=1.0, style='<->')
-    add_num(ax, (3.35, 5.0), 5)
+    add_num(ax, (3.35, 5.0), 5, batch=batch)
 
     # 6: Event Pool <-> Monitor
-    add_port(ax, (5.4, 4.75))
-    add_port(ax, (6.2, 4.75))
+    add_port(ax, (5.4, 4.75), batch=batch)
+    add_port(ax, (6.2, 4.75), batch=batch)
     draw_arrow(ax, (5.48, 4.75), (6.12, 4.75), linestyle='dotted', lw=1.0, style='<->')
-    add_num(ax, (5.8, 5.0), 6)
+    add_num(ax, (5.8, 5.0), 6, batch=batch)
 
     # 7: Monitor -> Scoreboard/Coverage
-    add_port(ax, (8.1, 4.75))
-    draw_line(ax, [(8.18, 4.75), (8.9, 4.75)], lw=1.0)
+    add_port(ax, (8.1, 4.75), batch=batch)
+    draw_line(ax, [(8.18, 4.75), (8.9, 4.75)], lw=1.0, batch=batch)
     
-    add_port(ax, (col_x, 7.75))
-    draw_line(ax, [(8.9, 4.75), (8.9, 7.75), (col_x - 0.08, 7.75)], lw=1.0)
+    add_port(ax, (col_x, 7.75), batch=batch)
+    draw_line(ax, [(8.9, 4.75), (8.9, 7.75), (col_x - 0.08, 7.75)], lw=1.0, batch=batch)
     
-    add_port(ax, (col_x, 6.05))
-    draw_line(ax, [(8.9, 4.75), (8.9, 6.05), (col_x - 0.08, 6.05)], lw=1.0)
-    add_num(ax, (8.9, 6.9), 7)
+    add_port(ax, (col_x, 6.05), batch=batch)
+    draw_line(ax, [(8.9, 4.75), (8.9, 6.05), (col_x - 0.08, 6.05)], lw=1.0, batch=batch)
+    add_num(ax, (8.9, 6.9), 7, batch=batch)
 
     # 8: Monitor -> BOI Checker
-    add_port(ax, (col_x, 4.35))
-    draw_line(ax, [(8.9, 4.75), (8.9, 4.35), (col_x - 0.08, 4.35)], lw=1.0)
-    add_num(ax, (8.9, 4.55), 8)
+    add_port(ax, (col_x, 4.35), batch=batch)
+    draw_line(ax, [(8.9, 4.75), (8.9, 4.35), (col_x - 0.08, 4.35)], lw=1.0, batch=batch)
+    add_num(ax, (8.9, 4.55), 8, batch=batch)
 
     # =========================================================================
     # LAYER 5: LINE TYPE LEGEND (Bottom Left - 2x2 arrangement, bigger text)
@@ -236,7 +271,7 @@ def generate_arch_diagram():
     ax.plot([leg_x, leg_x + 0.7], [leg_y_bot, leg_y_bot], color='black', lw=1.2, linestyle='dotted')
     ax.text(leg_x + 0.85, leg_y_bot, "Event sync", fontsize=leg_font, va='center')
     
-    add_port(ax, (leg_x + 2.95, leg_y_bot))
+    add_port(ax, (leg_x + 2.95, leg_y_bot), batch=batch)
     ax.text(leg_x + 3.15, leg_y_bot, "Port", fontsize=leg_font, va='center')
 
     # =========================================================================
@@ -279,22 +314,37 @@ def generate_arch_diagram():
             y = start_y - ((i - 4) * row_spacing)
         
         # Circled number
-        circle = plt.Circle((x, y), 0.11, facecolor='white', edgecolor='black', lw=0.6, zorder=45)
-        ax.add_patch(circle)
-        ax.text(x, y, str(num), ha='center', va='center', fontsize=7, weight='bold', zorder=46)
+        add_num(ax, (x, y), num, zorder=45, radius=0.11, lw=0.6, fontsize=7, batch=batch)
         # Label text
         ax.text(x + 0.2, y, txt, fontsize=FONT_LEGEND, ha='left', va='center', zorder=45)
 
+    flush_batch(ax, batch)
+    timing['build'] = time.time() - start
+
+    # Single layout pass: the tight bounding box is computed once and reused by every format
+    start = time.time()
     plt.tight_layout()
-    
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(plt.rcParams['savefig.pad_inches'])
+    timing['layout'] = time.time() - start
+
     # Save as PNG
-    plt.savefig(os.path.join(output_dir, 'architecture_diagram.png'), bbox_inches='tight')
-    
-    # Save as PDF
-    plt.savefig(os.path.join(output_dir, 'architecture_diagram.pdf'), bbox_inches='tight', format='pdf')
+    start = time.time()
+    plt.savefig(os.path.join(output_dir, 'architecture_diagram.png'), bbox_inches=bbox)
+    timing['rasterize'] = time.time() - start
+
+    # Save as PDF and SVG
+    start = time.time()
+    plt.savefig(os.path.join(output_dir, 'architecture_diagram.pdf'), bbox_inches=bbox, format='pdf')
+    plt.savefig(os.path.join(output_dir, 'architecture_diagram.svg'), bbox_inches=bbox, format='svg')
+    timing['write'] = time.time() - start
+    for stage in timing:
+        prof.add_stage(stage, timing[stage])
+    prof.artists(fig)
     
     plt.close()
-    print("IEEE Access architecture diagram generated (PNG + PDF).")
+    print("IEEE Access architecture diagram generated (PNG + PDF + SVG).")
+    print("  Stage timing: " + " | ".join("{} {:.3f} s".format(k, v) for k, v in timing.items()))
+    return timing
 
 if __name__ == "__main__":
     try:
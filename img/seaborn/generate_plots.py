@@ -7,27 +7,43 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 import os
+import sys
+
+import figure_profile as prof
 
 # Ensure output directory exists
 output_dir = os.path.dirname(os.path.abspath(__file__))
 
+# Regression tooling (role_latency.py) lives in <repo>/scripts
+scripts_dir = os.path.join(output_dir, '..', '..', 'scripts')
+
+# Above this many samples the latency plot switches to aggregated rendering:
+# precomputed KDE/quantiles and one rasterized density strip per direction
+# instead of one violin KDE pass and one marker artist per sample.
+AGGREGATE_THRESHOLD = 5000
+KDE_GRIDSIZE = 512
+
+DIRECTION_LABELS = {'MASTER_TO_SLAVE': 'Master $\\to$ Slave', 'SLAVE_TO_MASTER': 'Slave $\\to$ Master'}
+
 # Set global style for professional publication quality (seaborn 0.9 compatible)
 sns.set_style("white")
 sns.set_context("paper", font_scale=1.4)
 plt.rcParams['font.family'] = 'sans-serif'
 plt.rcParams['figure.dpi'] = 300
 
+@prof.profiled('safety_gap_gantt')
 def plot_safety_gap():
     print("Generating Professional Safety Gap Gantt Chart...")
     
     # Data: Define the timeline segments
     # We want to show: Master Drive -> [Safety Gap] -> Slave Active
     # Added "State" column to differentiate phases more clearly
-    df = pd.DataFrame([
-        {'Task': 'Bus Authority', 'Start': 0, 'Duration': 100, 'Role': 'Master (VIP)', 'Color': '#4C72B0', 'State': 'Active Drive'},
-        # Gap is implicit, but we will highlight it
-        {'Task': 'Bus Authority', 'Start': 108, 'Duration': 92, 'Role': 'Slave (VIP)', 'Color': '#55A868', 'State': 'Passive Listen'}
-    ])
+    with prof.stage('dataframe'):
+        df = pd.DataFrame([
+            {'Task': 'Bus Authority', 'Start': 0, 'Duration': 100, 'Role': 'Master (VIP)', 'Color': '#4C72B0', 'State': 'Active Drive'},
+            # Gap is implicit, but we will highlight it
+            {'Task': 'Bus Authority', 'Start': 108, 'Duration': 92, 'Role': 'Slave (VIP)', 'Color': '#55A868', 'State': 'Passive Listen'}
+        ])
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -95,14 +111,36 @@ def plot_safety_gap():
     ax.legend(ordered_handles, ordered_labels, loc='upper center', bbox_to_anchor=(0.5, -0.25), ncol=3, frameon=False, fontsize=12)
 
     sns.despine(left=True)
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'safety_gap_gantt.png'), bbox_inches='tight')
+    with prof.stage('tight_layout'):
+        plt.tight_layout()
+    with prof.stage('savefig', fig):
+        plt.savefig(os.path.join(output_dir, 'safety_gap_gantt.png'), bbox_inches='tight')
     plt.close()
 
-def plot_latency_violin():
-    print("Generating Professional Switch Latency Violin Plot...")
-    
-    # Data Generation
+def load_switch_latencies(roots=None, db_path=None):
+    """Real role-switch latencies as a Direction/Latency DataFrame, or None if there are none.
+
+    Logs under `roots` are (re)scanned first; unchanged logs are served from the cache.
+    Without roots or db_path, sim/regr_index.db is only read if it already exists.
+    """
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    import role_latency
+
+    return latency_frame(role_latency.cached_latencies(roots, db_path))
+
+def latency_frame(latencies):
+    """{direction: latencies_us} from role_latency.load() as a DataFrame, or None if empty."""
+    frames = [pd.DataFrame({'Direction': DIRECTION_LABELS[d], 'Latency': v})
+              for d, v in latencies.items() if len(v)]
+    if not frames:
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    df['Direction'] = df['Direction'].astype('category')
+    return df
+
+def synthetic_switch_latencies():
+    # Illustrative data, used when no regression logs have been extracted yet
     np.random.seed(42)
     n = 200
     data = {
@@ -112,56 +150,209 @@ def plot_latency_violin():
             np.random.normal(5.0, 0.4, n//2)   # Slow (t_buf)
         ])
     }
-    df = pd.DataFrame(data)
+    return pd.DataFrame(data)
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+def latency_stats(values, gridsize=KDE_GRIDSIZE, cut=2):
+    """Violin statistics computed once in O(n): (grid, density, counts, box).
+
+    The Gaussian KDE (Scott bandwidth, like seaborn) is evaluated by binning
+    the samples on the grid and convolving the counts with the kernel, so the
+    cost no longer grows with samples x grid points. `box` holds the lower
+    whisker, quartiles and upper whisker (1.5 IQR rule).
+    """
+    v = np.asarray(values, dtype=np.float64)
+    bw = max(v.std() * len(v) ** (-1 / 5.), 1e-3)
+    counts, edges = np.histogram(v, bins=gridsize, range=(v.min() - cut * bw, v.max() + cut * bw))
+    grid = (edges[:-1] + edges[1:]) / 2
+    step = grid[1] - grid[0]
+    half = int(np.ceil(4 * bw / step))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * step / bw) ** 2)
+    kernel /= kernel.sum() * step * len(v)
+    density = np.convolve(counts, kernel, mode='full')[half:half + gridsize]
+
+    q1, q2, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    lo = v[v >= q1 - 1.5 * iqr].min()
+    hi = v[v <= q3 + 1.5 * iqr].max()
+    return grid, density, counts, (lo, q1, q2, q3, hi)
+
+def draw_aggregated_violins(ax, samples, order, width=0.8, jitter=0.2, linewidth=1.5, saturation=0.8):
+    """Violin + box + rasterized sample-density strip, a fixed number of artists per direction."""
+    from matplotlib.colors import LinearSegmentedColormap, PowerNorm
+    palette = sns.color_palette("muted", len(order))
+    # Same ".2" grey as the strip plot markers, more opaque where samples pile up
+    strip_cmap = LinearSegmentedColormap.from_list('strip', [(.2, .2, .2, .15), (.2, .2, .2, .9)])
+    for x, label in enumerate(order):
+        grid, density, counts, (lo, q1, q2, q3, hi) = latency_stats(samples[label])
+        half_width = density / density.max() * width / 2
+        ax.fill_betweenx(grid, x - half_width, x + half_width, facecolor=sns.desaturate(palette[x], saturation),
+                         edgecolor='.3', linewidth=linewidth, zorder=1)
+        ax.vlines(x, lo, hi, color='.3', linewidth=linewidth, zorder=3)
+        ax.vlines(x, q1, q3, color='.3', linewidth=linewidth * 3, zorder=3)
+        ax.scatter([x], [q2], color='white', s=linewidth * 10, zorder=4)
 
-    # Violin Plot with split=False (since we have 1 hue per x)
-    # Using 'inner' box to show quartiles clearly
-    sns.violinplot(data=df, x='Direction', y='Latency', palette="muted", 
-                   inner="box", linewidth=1.5, ax=ax, saturation=0.8)
+        # Where the strip plot would put its markers: counts per latency bin,
+        # spread uniformly over the jitter width, drawn as one raster image
+        strip = np.ma.masked_equal(counts.reshape(-1, 1), 0)
+        step = grid[1] - grid[0]
+        ax.imshow(strip, cmap=strip_cmap, norm=PowerNorm(0.5, vmin=0, vmax=counts.max()), aspect='auto',
+                  interpolation='nearest', origin='lower', rasterized=True, zorder=2,
+                  extent=(x - jitter, x + jitter, grid[0] - step / 2, grid[-1] + step / 2))
+    ax.set_xticks(range(len(order)))
+    ax.set_xticklabels(order)
+
+@prof.profiled('switch_latency_violin')
+def plot_latency_violin(df=None, aggregate=None):
+    print("Generating Professional Switch Latency Violin Plot...")
     
-    # Add swarmplot on top to show actual data distribution (determinism evidence)
-    # Using darker color and small size to not overlap too much
-    sns.stripplot(data=df, x='Direction', y='Latency', color=".2", alpha=0.4, size=3, ax=ax)
+    # Data: real seeds from the regression logs, synthetic only as a fallback
+    with prof.stage('dataframe'):
+        if df is None:
+            print("  No ROLE_ACTIVE records found; using synthetic latencies")
+            df = synthetic_switch_latencies()
+        # One pass over the Direction column; all later statistics reuse these arrays
+        samples = dict((label, group.values) for label, group in
+                       df.groupby('Direction', sort=False, observed=True)['Latency'])
+    order = [l for l in DIRECTION_LABELS.values() if l in samples]
+    if aggregate is None:
+        aggregate = len(df) > AGGREGATE_THRESHOLD
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    with prof.stage('seaborn_stats'):
+        if aggregate:
+            # Large sample counts: render time and file size independent of N
+            draw_aggregated_violins(ax, samples, order)
+        else:
+            # Violin Plot with split=False (since we have 1 hue per x)
+            # Using 'inner' box to show quartiles clearly
+            sns.violinplot(data=df, x='Direction', y='Latency', order=order, palette="muted", 
+                           inner="box", linewidth=1.5, ax=ax, saturation=0.8)
+            
+            # Add swarmplot on top to show actual data distribution (determinism evidence)
+            # Using darker color and small size to not overlap too much
+            sns.stripplot(data=df, x='Direction', y='Latency', order=order, color=".2", alpha=0.4, size=3, ax=ax)
 
     # Formatting
-    ax.set_title("Role Switch Latency Distribution (N=200 Seeds)", fontsize=14, weight='bold', pad=15)
+    ax.set_title("Role Switch Latency Distribution (N={} Samples)".format(len(df)), fontsize=14, weight='bold', pad=15)
     ax.set_ylabel("Latency ($\mu$s)", fontsize=12)
     ax.set_xlabel("", fontsize=12) # Directions are self-explanatory
     
     # Smart Annotations (Non-overlapping)
     # We place text relative to the data clusters
     
-    # Annotation for M->S (x=0) - Move to left
-    ax.annotate('Immediate Update\n(Variable Flip Only)', 
-                xy=(0, 2.0), xytext=(-0.45, 3.5),
-                arrowprops=dict(arrowstyle='->', connectionstyle="arc3,rad=.2", color='#333333'),
-                fontsize=11, color='#333333', ha='center')
+    # Annotation for M->S - Move to left
+    ms = DIRECTION_LABELS['MASTER_TO_SLAVE']
+    if ms in order:
+        x = order.index(ms)
+        top = np.percentile(samples[ms], 90)
+        ax.annotate('Immediate Update\n(Variable Flip Only)', 
+                    xy=(x, top + 0.5), xytext=(x - 0.45, top + 2.0),
+                    arrowprops=dict(arrowstyle='->', connectionstyle="arc3,rad=.2", color='#333333'),
+                    fontsize=11, color='#333333', ha='center')
 
-    # Annotation for S->M (x=1) - Move to right
-    ax.annotate('Protocol Bound\n(Waits for $t_{buf}$)', 
-                xy=(1, 5.5), xytext=(1.45, 6.5),
-                arrowprops=dict(arrowstyle='->', connectionstyle="arc3,rad=-.2", color='#333333'),
-                fontsize=11, color='#333333', ha='center')
+    # Annotation for S->M - Move to right
+    sm = DIRECTION_LABELS['SLAVE_TO_MASTER']
+    if sm in order:
+        x = order.index(sm)
+        top = np.percentile(samples[sm], 90)
+        ax.annotate('Protocol Bound\n(Waits for $t_{buf}$)', 
+                    xy=(x, top), xytext=(x + 0.45, top + 1.0),
+                    arrowprops=dict(arrowstyle='->', connectionstyle="arc3,rad=-.2", color='#333333'),
+                    fontsize=11, color='#333333', ha='center')
 
     # Add a horizontal line for t_buf requirement (e.g., 4.7us)
     ax.axhline(y=4.7, color='red', linestyle='--', alpha=0.5)
     # Text aligned to the right edge
-    ax.text(1.8, 4.8, 'Min $t_{buf}$ (4.7$\mu$s)', color='red', fontsize=10, va='bottom', ha='right')
+    ax.text(len(order) - 0.2, 4.8, 'Min $t_{buf}$ (4.7$\mu$s)', color='red', fontsize=10, va='bottom', ha='right')
 
     # Adjust limits to breathe
-    ax.set_ylim(0, 9)
-    ax.set_xlim(-0.8, 1.8)
+    ax.set_ylim(0, max(9, max(v.max() for v in samples.values()) * 1.15))
+    ax.set_xlim(-0.8, len(order) - 0.2)
     
     # Remove trim=True to keep the X-axis line visible across the full width
     sns.despine(trim=False)
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'switch_latency_violin.png'), bbox_inches='tight')
+    with prof.stage('tight_layout'):
+        plt.tight_layout()
+    with prof.stage('savefig', fig):
+        plt.savefig(os.path.join(output_dir, 'switch_latency_violin.png'), bbox_inches='tight')
+    plt.close()
+
+@prof.profiled('switch_latency_violin')
+def plot_switch_latencies(latencies):
+    # Entry point for build_figures.py, which loads the arrays without pandas
+    with prof.stage('dataframe'):
+        df = latency_frame(latencies)
+    plot_latency_violin(df)
+
+def plot_contention_pyramid(pyramid_path, window=None, width=1200):
+    """BOI-2 figure of a real run from a drive_pyramid.py file.
+
+    Renders `window` (t0, t1) in ticks, by default the first window that
+    drive_pyramid.pick_windows finds around a contention or clock-stretch
+    event, or the full run when there are none.
+    """
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    import drive_pyramid as dp
+    from matplotlib.colors import ListedColormap
+
+    pyr = dp.open_pyramid(pyramid_path)
+    us_per_tick = pyr.header['timescale_s'] * 1e6
+    event = None
+    if window is None:
+        windows = dp.pick_windows(pyr, count=1)
+        window = windows[0][:2] if windows else (None, None)
+        event = windows[0][2] if windows else None
+    with prof.stage('pyramid_render'):
+        edges, codes = dp.render(pyr, window[0], window[1], width)
+    rows = np.vstack([codes[name] for name in dp.SIGNALS])
+
+    fig, ax = plt.subplots(figsize=(14, 5))
+
+    # LOW -> Red, HIGH -> Light Grey, toggling within a pixel -> in between
+    cmap = ListedColormap(['#D65F5F', '#F0F0F5', '#E3A9A9'])
+    ax.imshow(rows, cmap=cmap, vmin=0, vmax=2, aspect='auto', interpolation='nearest',
+              extent=(edges[0] * us_per_tick, edges[-1] * us_per_tick, 3, 0))
+    for y in (1, 2):
+        ax.axhline(y, color='white', linewidth=1)
+    ax.set_yticks([0.5, 1.5, 2.5])
+    ax.set_yticklabels(['VIP SCL (Slave)\n[Invariant: Always High-Z]', 'RTL SCL (Master)\n[Driving Clock]',
+                        'Resolved Bus (SCL)\n[Wired-AND]'], fontsize=11)
+
+    legend_elements = [
+        mpatches.Patch(facecolor='#F0F0F5', edgecolor='gray', label='Release / High (1)'),
+        mpatches.Patch(facecolor='#D65F5F', edgecolor='gray', label='Drive Low / Low (0)'),
+        mpatches.Patch(facecolor='#E3A9A9', edgecolor='gray', label='Toggling (within pixel)')
+    ]
+    ax.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=3, frameon=False, fontsize=12)
+
+    ax.set_title("Electrical Safety Verification: Slave Mode SCL Compliance (BOI-2)", fontsize=16, weight='bold', loc='left', pad=60)
+    ax.set_xlabel("Simulation Time ($\mu$s)", fontsize=12)
+    ax.ticklabel_format(axis='x', useOffset=False, style='plain')
+
+    if event is not None:
+        mid = (event.start + event.end) / 2.0 * us_per_tick
+        label = "Master Holds Clock Low (Stress Test)" if event.kind == 'stretch' else "VIP / RTL Contention"
+        ax.text(mid, -0.2, label, ha='center', fontsize=11, color='black')
+    if not (codes['vip'] != dp.HIGH).any():
+        ax.text((edges[0] + edges[-1]) / 2.0 * us_per_tick, 0.5, "VIP Remains High-Z (Safe)",
+                ha='center', va='center', fontsize=11, color='#333333', weight='bold')
+
+    sns.despine(left=True, bottom=True)
+    with prof.stage('tight_layout'):
+        plt.tight_layout()
+    with prof.stage('savefig', fig):
+        plt.savefig(os.path.join(output_dir, 'contention_heatmap.png'), bbox_inches='tight')
     plt.close()
 
-def plot_contention_heatmap():
+@prof.profiled('contention_heatmap')
+def plot_contention_heatmap(pyramid_path=None):
     print("Generating Professional Contention Heatmap...")
+    if pyramid_path:
+        # Real run: constant-time render from the precomputed drive pyramid
+        plot_contention_pyramid(pyramid_path)
+        return
     
     # Expanded Data: 30 cycles to show context (Toggling -> Stretch -> Toggling)
     cycles = 30
@@ -189,11 +380,12 @@ def plot_contention_heatmap():
     bus_state = np.minimum(vip_drive, rtl_drive)
     
     # Create DataFrame for Heatmap
-    data = pd.DataFrame({
-        'VIP SCL (Slave)\n[Invariant: Always High-Z]': vip_drive,
-        'RTL SCL (Master)\n[Driving Clock]': rtl_drive,
-        'Resolved Bus (SCL)\n[Wired-AND]': bus_state
-    }).transpose()
+    with prof.stage('dataframe'):
+        data = pd.DataFrame({
+            'VIP SCL (Slave)\n[Invariant: Always High-Z]': vip_drive,
+            'RTL SCL (Master)\n[Driving Clock]': rtl_drive,
+            'Resolved Bus (SCL)\n[Wired-AND]': bus_state
+        }).transpose()
 
     fig, ax = plt.subplots(figsize=(14, 5))
 
@@ -204,7 +396,8 @@ def plot_contention_heatmap():
     cmap = ListedColormap(['#D65F5F', '#F0F0F5']) 
     
     # Plot Heatmap with grid lines for "Logic Analyzer" look
-    sns.heatmap(data, cmap=cmap, cbar=False, linewidths=1, linecolor='white', square=False, ax=ax, annot=False)
+    with prof.stage('seaborn_stats'):
+        sns.heatmap(data, cmap=cmap, cbar=False, linewidths=1, linecolor='white', square=False, ax=ax, annot=False)
 
     # Custom Legend - Bottom
     legend_elements = [
@@ -241,15 +434,23 @@ def plot_contention_heatmap():
         color = 'white' if val_bus == 0 else 'black'
         ax.text(x + 0.5, 2.5, str(val_bus), ha='center', va='center', color=color, fontsize=9)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'contention_heatmap.png'), bbox_inches='tight')
+    with prof.stage('tight_layout'):
+        plt.tight_layout()
+    with prof.stage('savefig', fig):
+        plt.savefig(os.path.join(output_dir, 'contention_heatmap.png'), bbox_inches='tight')
     plt.close()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the paper figures")
+    parser.add_argument('roots', nargs='*', help="run-log directories to scan for new role-switch seeds")
+    parser.add_argument('--pyramid', default=None, help="SCL drive pyramid (scripts/drive_pyramid.py) for BOI-2")
+    parser.add_argument('--db', default=None, help="role-switch cache (default: sim/regr_index.db, if it exists)")
+    args = parser.parse_args()
     try:
         plot_safety_gap()
-        plot_latency_violin()
-        plot_contention_heatmap()
+        plot_latency_violin(load_switch_latencies(args.roots, args.db))
+        plot_contention_heatmap(args.pyramid)
         print("All plots generated successfully in " + output_dir)
     except Exception as e:
         print("Error generating plots: {}".format(e))
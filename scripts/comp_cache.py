@@ -0,0 +1,345 @@
+"""Compile-result cache for `make comp`.
+
+Every run_* / regr* target depends on `comp`, which re-elaborates the whole
+testbench even when only +UVM_TESTNAME or the seed changed. This wrapper
+hashes what the compile depends on:
+
+* the RTL, PKG, INTF and TOP files named in sim/Makefile
+* every file under src/ (the +incdir include tree)
+* the expanded compile command, i.e. the VCS flags including COV_OPTS,
+  and $VCS_HOME
+
+and keeps simv, simv.daidir, comp.log and the compile-time coverage
+database (the -cm_dir of the compile, coverage.vdb) per hash in a local
+cache directory. On a hit they are copied back into sim/ instead of
+compiling; on a miss the compile runs and its result is stored. Entries are
+evicted least-recently-used first once the cache exceeds --max-size.
+sim/.comp_key records the hash and the mtime/size of the simv in place, so
+an up-to-date build is a no-op and a simv rebuilt by `make comp` is not
+mistaken for a cached one.
+
+Usage (from sim/; `make comp_cached` does the same):
+    python3 ../scripts/comp_cache.py
+    python3 ../scripts/comp_cache.py --cache-dir /local/comp_cache --max-size 50G
+    python3 ../scripts/comp_cache.py --compile-cmd "./fake_vcs.sh" --list
+"""
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import regr_common as rc
+
+DEFAULT_CACHE_DIR = os.environ.get('COMP_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'i2c_uvm', 'comp')
+DEFAULT_MAX_SIZE = '20G'
+SOURCE_VARS = ['PKG', 'INTF', 'RTL', 'TOP']
+INCLUDE_DIR = os.path.join(rc.PROJ_ROOT, 'src')
+# Compile outputs kept per entry (comp.log is optional), plus the coverage database
+OUTPUTS = ['simv', 'simv.daidir', 'comp.log']
+OPTIONAL_OUTPUTS = ['comp.log']
+KEY_FILE = '.comp_key'
+META_FILE = 'meta.json'
+
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(text):
+    """'20G' / '500M' / '1048576' -> bytes."""
+    text = text.strip().upper().rstrip('B')
+    unit = text[-1:] if text[-1:] in _UNITS else ''
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+
+
+def source_files(makefile=rc.MAKEFILE):
+    """RTL/PKG/INTF/TOP files (relative to the Makefile's directory, as make sees them)."""
+    sim_dir = os.path.dirname(os.path.abspath(makefile))
+    files = []
+    for var in SOURCE_VARS:
+        files += [os.path.normpath(os.path.join(sim_dir, f)) for f in rc.expand_make_var(var, makefile).split()]
+    return files
+
+
+def command_files(command, sim_dir):
+    """Source files named on the compile command line (e.g. RTL=... overrides given to make)."""
+    files = []
+    for token in shlex.split(command):
+        path = os.path.normpath(os.path.join(sim_dir, token))
+        if token.endswith(('.sv', '.v', '.svh', '.vh')) and os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def include_files(root=INCLUDE_DIR):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != '__pycache__')
+        files += [os.path.join(dirpath, f) for f in sorted(filenames) if not f.startswith('.')]
+    return files
+
+
+def compile_command(makefile=rc.MAKEFILE):
+    """The `comp` target's command line: $(VCS) $(PKG) $(INTF) $(RTL) $(TOP)."""
+    return ' '.join(rc.expand_make_var(v, makefile) for v in ['VCS'] + SOURCE_VARS)
+
+
+def coverage_dir(command):
+    """The coverage database a compile with `command` writes (-cm_dir, VCS default simv.vdb), or None."""
+    tokens = shlex.split(command)
+    if '-cm_dir' in tokens[:-1]:
+        return tokens[tokens.index('-cm_dir') + 1]
+    return 'simv.vdb' if '-cm' in tokens else None
+
+
+def outputs(command):
+    """Files and directories a compile with `command` leaves in the build directory."""
+    vdb = coverage_dir(command)
+    return OUTPUTS + ([vdb] if vdb else [])
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(command, files):
+    """sha256 over the compile command, $VCS_HOME and every input file's path and content."""
+    h = hashlib.sha256()
+    h.update(('cmd ' + command + '\n').encode('utf-8'))
+    h.update(('vcs_home ' + os.environ.get('VCS_HOME', '') + '\n').encode('utf-8'))
+    for path in sorted(set(files)):
+        rel = os.path.relpath(path, rc.PROJ_ROOT)
+        digest = _file_digest(path) if os.path.isfile(path) else 'missing'
+        h.update('file {} {}\n'.format(rel, digest).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _tree_size(path):
+    if os.path.isfile(path) or os.path.islink(path):
+        return os.lstat(path).st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.lstat(os.path.join(dirpath, f)).st_size for f in filenames)
+    return total
+
+
+def _copy(src, dst):
+    if os.path.isdir(src) and not os.path.islink(src):
+        shutil.copytree(src, dst, symlinks=True)
+    else:
+        shutil.copy2(src, dst, follow_symlinks=False)
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def entries(cache_dir):
+    """[(key, meta)] of every complete cache entry, least recently used first."""
+    found = []
+    if not os.path.isdir(cache_dir):
+        return found
+    for key in os.listdir(cache_dir):
+        meta = _read_meta(os.path.join(cache_dir, key))
+        if meta is not None:
+            found.append((key, meta))
+    found.sort(key=lambda e: e[1].get('last_used', 0))
+    return found
+
+
+def _write_meta(entry_dir, meta):
+    tmp = os.path.join(entry_dir, META_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(entry_dir, META_FILE))
+
+
+def _read_meta(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, META_FILE)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def touch(cache_dir, key, hit=False):
+    """Marks an entry as used now (for LRU eviction); returns False if it is not cached."""
+    entry_dir = os.path.join(cache_dir, key)
+    meta = _read_meta(entry_dir)
+    if meta is None:
+        return False
+    meta['last_used'] = time.time()
+    meta['hits'] = meta.get('hits', 0) + (1 if hit else 0)
+    _write_meta(entry_dir, meta)
+    return True
+
+
+def restore(cache_dir, key, sim_dir, names=OUTPUTS):
+    """Copies a cached build into sim_dir; returns False if the key is not (completely) cached."""
+    entry_dir = os.path.join(cache_dir, key)
+    if _read_meta(entry_dir) is None or not all(
+            os.path.lexists(os.path.join(entry_dir, n)) for n in names if n not in OPTIONAL_OUTPUTS):
+        return False
+    for name in names:
+        _remove(os.path.join(sim_dir, name))
+        if os.path.lexists(os.path.join(entry_dir, name)):
+            _copy(os.path.join(entry_dir, name), os.path.join(sim_dir, name))
+    return touch(cache_dir, key, hit=True)
+
+
+def store(cache_dir, key, sim_dir, command, compile_s):
+    """Adds sim_dir's build outputs as the entry for key (atomically, by rename)."""
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    tmp = tempfile.mkdtemp(prefix='.tmp_' + key[:12] + '_', dir=cache_dir)
+    try:
+        for name in outputs(command):
+            if os.path.lexists(os.path.join(sim_dir, name)):
+                _copy(os.path.join(sim_dir, name), os.path.join(tmp, name))
+        now = time.time()
+        _write_meta(tmp, {'key': key, 'command': command, 'compile_s': compile_s, 'size': _tree_size(tmp),
+                          'created': now, 'last_used': now, 'hits': 0})
+        try:
+            os.rename(tmp, os.path.join(cache_dir, key))
+        except OSError:
+            pass  # another build stored the same key first
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+
+
+def evict(cache_dir, max_bytes, keep=None):
+    """Removes least recently used entries until the cache fits in max_bytes; returns [evicted keys]."""
+    found = entries(cache_dir)
+    total = sum(meta.get('size', 0) for _, meta in found)
+    evicted = []
+    for key, meta in found:
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+        total -= meta.get('size', 0)
+        evicted.append(key)
+    return evicted
+
+
+def _simv_stamp(sim_dir):
+    """'<mtime_ns> <size>' of sim_dir/simv, or '' if there is none."""
+    try:
+        st = os.stat(os.path.join(sim_dir, 'simv'))
+    except OSError:
+        return ''
+    return '{} {}'.format(st.st_mtime_ns, st.st_size)
+
+
+def read_key(sim_dir):
+    """Key of the build in sim_dir, or '' if simv was not built (or restored) by this cache."""
+    try:
+        with open(os.path.join(sim_dir, KEY_FILE)) as f:
+            lines = f.read().split('\n')
+    except (IOError, OSError):
+        return ''
+    stamp = _simv_stamp(sim_dir)
+    return lines[0].strip() if len(lines) > 1 and stamp and lines[1].strip() == stamp else ''
+
+
+def write_key(sim_dir, key):
+    with open(os.path.join(sim_dir, KEY_FILE), 'w') as f:
+        f.write('{}\n{}\n'.format(key, _simv_stamp(sim_dir)))
+
+
+def build(args):
+    """Restores or compiles simv for the current sources; returns the compiler's exit status."""
+    command = args.compile_cmd or compile_command(args.makefile)
+    files = source_files(args.makefile) + command_files(command, args.sim_dir) + include_files(args.include_dir)
+    key = cache_key(command, files)
+    key_path = os.path.join(args.sim_dir, KEY_FILE)
+
+    if read_key(args.sim_dir) == key:
+        touch(args.cache_dir, key)
+        print("comp_cache: simv up to date ({})".format(key[:12]))
+        return 0
+
+    start = time.time()
+    if restore(args.cache_dir, key, args.sim_dir, outputs(command)):
+        print("comp_cache: hit {}, restored simv in {:.2f} s".format(key[:12], time.time() - start))
+    else:
+        print("comp_cache: miss {}, compiling".format(key[:12]))
+        sys.stdout.flush()
+        _remove(key_path)
+        status = subprocess.call(shlex.split(command), cwd=args.sim_dir)
+        compile_s = time.time() - start
+        if status != 0 or not os.path.exists(os.path.join(args.sim_dir, 'simv')):
+            print("comp_cache: compile failed (exit {}), nothing cached".format(status))
+            return status or 1
+        store(args.cache_dir, key, args.sim_dir, command, compile_s)
+        print("comp_cache: compiled in {:.2f} s, stored {}".format(compile_s, key[:12]))
+    write_key(args.sim_dir, key)
+    for old in evict(args.cache_dir, args.max_size, keep=key):
+        print("comp_cache: evicted {}".format(old[:12]))
+    return 0
+
+
+def print_entries(cache_dir):
+    row_fmt = "{:<14} | {:>10} | {:>11} | {:>5} | {:<19}"
+    print(row_fmt.format("Key", "Size (MB)", "Compile (s)", "Hits", "Last used"))
+    print(rc.SUB_RULE[:72])
+    total = 0
+    for key, meta in reversed(entries(cache_dir)):
+        total += meta.get('size', 0)
+        print(row_fmt.format(key[:12], "{:.1f}".format(meta.get('size', 0) / 1e6),
+                             "{:.2f}".format(meta.get('compile_s', 0)), meta.get('hits', 0),
+                             time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(meta.get('last_used', 0)))))
+    print("{} entr(ies), {:.1f} MB in {}".format(len(entries(cache_dir)), total / 1e6, cache_dir))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Reuse a cached simv when the compile inputs are unchanged")
+    p.add_argument('--sim-dir', default=rc.SIM_DIR, help="where simv is built (default: sim/)")
+    p.add_argument('--makefile', default=None, help="Makefile naming the sources (default: <sim-dir>/Makefile)")
+    p.add_argument('--include-dir', default=INCLUDE_DIR, help="include tree hashed as a whole (default: src/)")
+    p.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                   help="cache location (default: $COMP_CACHE_DIR or ~/.cache/i2c_uvm/comp)")
+    p.add_argument('--max-size', type=parse_size, default=parse_size(DEFAULT_MAX_SIZE),
+                   help="evict LRU entries above this size (default: {})".format(DEFAULT_MAX_SIZE))
+    p.add_argument('--compile-cmd', default=None,
+                   help="compile command run in <sim-dir> (default: the Makefile's comp recipe; "
+                        "`make comp_cached` passes it expanded, with command-line overrides)")
+    p.add_argument('--print-key', action='store_true', help="print the cache key and exit")
+    p.add_argument('--list', action='store_true', help="list cache entries and exit")
+    p.add_argument('--clear', action='store_true', help="remove every cache entry and exit")
+    args = p.parse_args(argv)
+    args.sim_dir = os.path.abspath(args.sim_dir)
+    args.makefile = os.path.abspath(args.makefile or os.path.join(args.sim_dir, 'Makefile'))
+    args.cache_dir = os.path.abspath(args.cache_dir)
+
+    if args.print_key:
+        command = args.compile_cmd or compile_command(args.makefile)
+        print(cache_key(command, source_files(args.makefile) + command_files(command, args.sim_dir) +
+                        include_files(args.include_dir)))
+        return 0
+    if args.list:
+        print_entries(args.cache_dir)
+        return 0
+    if args.clear:
+        n = len(evict(args.cache_dir, -1))
+        print("comp_cache: removed {} entr(ies)".format(n))
+        return 0
+    return build(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
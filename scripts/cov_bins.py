@@ -0,0 +1,153 @@
+"""Functional-coverage bin hits of single runs, read from URG text reports.
+
+Parses the covergroup section (grpinfo.txt) of `urg -format text` reports
+generated for one run each (one -cm_name test of coverage.vdb), and turns
+the bins of i2c_coverage's covergroups into bitsets so runs can be merged
+and compared with plain integer OR / AND:
+
+* i2c_protocol_cg: cp_addr_mode, cp_addr_7bit, cp_direction, cp_status,
+  cp_data_size, cp_repeated_start and the cross_dir_* / cross_rep_start crosses
+* i2c_config_cg: cp_speed
+
+A bin is named `<covergroup>/<coverpoint or cross>/<bin>`; cross bins join
+the coverpoint bins with '.', e.g. `i2c_protocol_cg/cross_dir_size/read.large_burst`.
+Bins listed in a report with a zero count, and the cross bins of its
+"Element holes" rows (e.g. `[write , read] [large_burst] -- --` stands for
+read.large_burst and write.large_burst), still belong to the bin space, so
+the merged percentage is relative to every bin the reports name.
+
+A report belongs to the run whose `<test>_<i>` directory (the -cm_name used
+by regr_paper / regr_parallel) is its nearest ancestor, e.g.
+sim/regr_runs/i2c_burst_test_3/urg/grpinfo.txt.
+"""
+import itertools
+import os
+import re
+
+import regr_common as rc
+
+DEFAULT_GROUPS = ['i2c_protocol_cg', 'i2c_config_cg']
+REPORT_FILE = 'grpinfo.txt'
+
+GROUP_RE = re.compile(r'^Group(?: Instance)?\s*:\s*(\S+)')
+VARIABLE_RE = re.compile(r'^(?:Summary for (?:Variable|Cross)|'
+                         r'(?:User Defined |Auto |Automatically Generated )?(?:Cross )?Bins for)\s+(\S+)')
+RUN_DIR_RE = re.compile(r'^(?P<test>.+)_(?P<iteration>\d+)$')
+# One coverpoint element of a hole row: "[a , b]" or a single bin name
+HOLE_ELEMENT_RE = re.compile(r'\[([^\]]*)\]|(\S+)')
+
+
+def _hole_bins(row, n_elements, coverpoint_bins):
+    """Cross bin names ('a.b') of an element-hole row, or [] if it is not one.
+
+    `coverpoint_bins` lists the bins of each crossed coverpoint, for '*' elements.
+    """
+    names = row.split(' --', 1)[0]
+    elements = []
+    for listed, single in HOLE_ELEMENT_RE.findall(names):
+        bins = [b.strip() for b in listed.split(',')] if listed else [single]
+        if bins == ['*'] and len(elements) < len(coverpoint_bins):
+            bins = coverpoint_bins[len(elements)]
+        elements.append([b for b in bins if b])
+    if len(elements) != n_elements or not all(elements):
+        return []
+    return ['.'.join(combo) for combo in itertools.product(*elements)]
+
+
+def parse_report(text, groups=DEFAULT_GROUPS):
+    """Returns {bin name: hit count} for the bins of `groups` in one grpinfo.txt."""
+    hits = {}
+    group = variable = None
+    name_cols = None
+    header = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        m = GROUP_RE.match(stripped)
+        if m:
+            # i2c_pkg::i2c_coverage::i2c_protocol_cg or uvm_test_top.env.cov.i2c_protocol_cg
+            group = re.split(r'::|\.', m.group(1))[-1]
+            variable = name_cols = None
+            continue
+        m = VARIABLE_RE.match(stripped)
+        if m:
+            variable = m.group(1)
+            name_cols = None
+            continue
+        if group not in groups or variable is None:
+            continue
+        tokens = stripped.split()
+        if 'COUNT' in tokens and 'AT LEAST' in stripped:
+            name_cols = tokens.index('COUNT')
+            header = tokens[:name_cols]
+            continue
+        if not tokens or stripped.startswith(('-', '=')):
+            name_cols = None
+            continue
+        if name_cols is None:
+            continue
+        if ' --' in stripped and name_cols > 1:
+            # Element hole: "read [addr_nack , data_nack] -- --" (uncovered cross bins)
+            coverpoint_bins = [sorted(set(k.rsplit('/', 1)[1] for k in hits
+                                          if k.startswith('{}/{}/'.format(group, cp))))
+                               for cp in header]
+            for name in _hole_bins(stripped, name_cols, coverpoint_bins):
+                key = '{}/{}/{}'.format(group, variable, name)
+                hits[key] = max(hits.get(key, 0), 0)
+            continue
+        if len(tokens) <= name_cols or not tokens[name_cols].isdigit():
+            continue
+        key = '{}/{}/{}'.format(group, variable, '.'.join(tokens[:name_cols]))
+        hits[key] = max(hits.get(key, 0), int(tokens[name_cols]))
+    return hits
+
+
+def run_of(path):
+    """(test, iteration) of the nearest `<test>_<i>` ancestor directory of a report, or None."""
+    d = os.path.dirname(os.path.abspath(path))
+    while True:
+        m = RUN_DIR_RE.match(os.path.basename(d))
+        if m:
+            return m.group('test'), int(m.group('iteration'))
+        parent = os.path.dirname(d)
+        if parent == d:
+            return None
+        d = parent
+
+
+def find_reports(roots):
+    """Yields grpinfo.txt paths under the given directories (or the files themselves)."""
+    for root in roots:
+        if os.path.isfile(root):
+            yield os.path.abspath(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            if REPORT_FILE in filenames:
+                yield os.path.abspath(os.path.join(dirpath, REPORT_FILE))
+
+
+def read_report(path, groups=DEFAULT_GROUPS):
+    return parse_report(rc.read_log(path), groups)
+
+
+def bin_index(bin_names):
+    """Stable {bin name: bit position} over a set of bin names."""
+    return dict((name, i) for i, name in enumerate(sorted(bin_names)))
+
+
+def to_bits(hits, index):
+    """Bitset (int) of the bins with a non-zero count."""
+    bits = 0
+    for name, count in hits.items():
+        if count > 0:
+            bits |= 1 << index[name]
+    return bits
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+def bin_names(bits, index):
+    """Names of the bins set in `bits`, in index order."""
+    return [name for name, i in sorted(index.items(), key=lambda kv: kv[1]) if bits >> i & 1]
@@ -0,0 +1,158 @@
+"""Incremental functional-coverage merge, one run at a time.
+
+`make cov_rpt` only knows the closure status after urg has re-read every
+run accumulated in coverage.vdb. Here each finished run's bin hits (its
+per-run URG text report, see cov_bins) are ingested once into the
+regr_index database as a bit array keyed by (test, seed), and the merged
+bit array is updated in the same transaction, so "are we at 100% yet?" is
+one row read right after every run.
+
+Bit positions are assigned append-only as bins first appear, so stored
+arrays stay valid when a later report names more bins (e.g. after a
+covergroup gains a coverpoint). A (test, seed) already ingested is skipped.
+
+regr_parallel.py --stop-at-closure calls ingest() after each run and stops
+launching new runs once the merged view reaches the target.
+
+Usage:
+    python3 cov_merge.py ingest sim/regr_runs --csv sim/regression_raw.csv
+    python3 cov_merge.py status
+    python3 cov_merge.py reset
+"""
+import argparse
+import sys
+import time
+
+import cov_bins
+import regr_common as rc
+import regr_index
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cov_bins (
+    bit  INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS cov_runs (
+    test        TEXT NOT NULL,
+    seed        TEXT NOT NULL,
+    iteration   INTEGER,
+    hit_bits    BLOB NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (test, seed)
+);
+CREATE TABLE IF NOT EXISTS cov_merged (
+    id       INTEGER PRIMARY KEY CHECK (id = 0),
+    hit_bits BLOB NOT NULL,
+    runs     INTEGER NOT NULL
+);
+"""
+
+
+def connect(db_path=regr_index.DEFAULT_DB):
+    """Opens the regr_index database with the coverage tables added."""
+    conn = regr_index.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _to_blob(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def _from_blob(blob):
+    return int.from_bytes(blob, 'little')
+
+
+def bin_index(conn):
+    """{bin name: bit position} of every bin seen so far."""
+    return dict((name, bit) for bit, name in conn.execute('SELECT bit, name FROM cov_bins'))
+
+
+def merged(conn):
+    """Returns (merged bits, runs ingested)."""
+    row = conn.execute('SELECT hit_bits, runs FROM cov_merged WHERE id = 0').fetchone()
+    return (_from_blob(row[0]), row[1]) if row else (0, 0)
+
+
+def status(conn):
+    """Returns (covered bins, known bins, runs ingested)."""
+    bits, runs = merged(conn)
+    total = conn.execute('SELECT COUNT(*) FROM cov_bins').fetchone()[0]
+    return cov_bins.popcount(bits), total, runs
+
+
+def ingest(conn, test, seed, hits, iteration=None):
+    """Adds one run's {bin: count}; returns (new bins, covered, total), or None if already ingested."""
+    if conn.execute('SELECT 1 FROM cov_runs WHERE test = ? AND seed = ?', (test, seed)).fetchone():
+        return None
+    with conn:
+        index = bin_index(conn)
+        for name in sorted(set(hits) - set(index)):
+            index[name] = len(index)
+            conn.execute('INSERT INTO cov_bins VALUES (?, ?)', (index[name], name))
+        bits = cov_bins.to_bits(hits, index)
+        old, runs = merged(conn)
+        conn.execute('INSERT INTO cov_runs VALUES (?, ?, ?, ?, ?)',
+                     (test, seed, iteration, _to_blob(bits), time.time()))
+        conn.execute('INSERT OR REPLACE INTO cov_merged VALUES (0, ?, ?)', (_to_blob(old | bits), runs + 1))
+    return cov_bins.popcount(bits & ~old), cov_bins.popcount(old | bits), len(index)
+
+
+def ingest_report(conn, path, test, seed, iteration=None, groups=cov_bins.DEFAULT_GROUPS):
+    return ingest(conn, test, seed, cov_bins.read_report(path, groups), iteration)
+
+
+def closed(conn, target_pct=100.0):
+    """True once the merged coverage reaches target_pct of the known bins."""
+    covered, total, _ = status(conn)
+    return total > 0 and 100.0 * covered >= target_pct * total
+
+
+def missing(conn):
+    bits, _ = merged(conn)
+    return sorted(name for name, bit in bin_index(conn).items() if not bits >> bit & 1)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Incremental functional-coverage merge")
+    p.add_argument('--db', default=regr_index.DEFAULT_DB, help="database file (default: sim/regr_index.db)")
+    sub = p.add_subparsers(dest='cmd')
+    p_ing = sub.add_parser('ingest', help="ingest per-run URG text reports not seen before")
+    p_ing.add_argument('roots', nargs='+', help="directories holding <test>_<i>/.../grpinfo.txt")
+    p_ing.add_argument('--csv', required=True, help="regression_raw.csv giving each run's seed")
+    p_ing.add_argument('-g', '--groups', nargs='+', default=cov_bins.DEFAULT_GROUPS)
+    sub.add_parser('status', help="print merged coverage and the bins still missing")
+    sub.add_parser('reset', help="forget every ingested run")
+    args = p.parse_args(argv)
+    if not args.cmd:
+        p.error("a command is required")
+
+    conn = connect(args.db)
+    if args.cmd == 'ingest':
+        seeds = dict(((r['Test_Name'], int(r['Iteration'])), r['Seed']) for r in rc.read_csv(args.csv))
+        start = time.time()
+        added = skipped = 0
+        for path in cov_bins.find_reports(args.roots):
+            run = cov_bins.run_of(path)
+            if run not in seeds:
+                continue
+            if ingest_report(conn, path, run[0], seeds[run], run[1], args.groups) is None:
+                skipped += 1
+            else:
+                added += 1
+        print("Ingested {} run(s), skipped {} known in {:.2f} s".format(added, skipped, time.time() - start))
+    elif args.cmd == 'reset':
+        with conn:
+            conn.executescript('DELETE FROM cov_runs; DELETE FROM cov_merged; DELETE FROM cov_bins;')
+    covered, total, runs = status(conn)
+    print("Merged coverage: {}/{} bins ({:.2f}%) from {} run(s)".format(
+        covered, total, 100.0 * covered / total if total else 0.0, runs))
+    if args.cmd == 'status':
+        for name in missing(conn):
+            print("  missing: " + name)
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
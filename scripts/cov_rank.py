@@ -0,0 +1,184 @@
+"""Coverage-driven seed ranking: the fewest runs that reach the merged coverage.
+
+Reads one URG text report per run (see cov_bins; regr_parallel.py
+--cov-per-run writes them), joins them with the
+seeds and CPU times of regression_raw.csv, and runs a greedy set cover over
+the bin bitsets: at every step the run adding the most still-uncovered bins
+is picked (ties go to the cheaper run; with --per-cpu-second the ratio of
+new bins to CPU time is maximized instead). The result is the (test, seed)
+list that reaches the same merged functional coverage as the full
+regression, and the coverage-per-CPU-second curve of that list next to the
+curve of the regression in its original order.
+
+The list is written as a CSV with regression_raw.csv's Test_Name and Seed
+columns, so it can be replayed with fixed seeds as the nightly regression:
+
+    python3 regr_parallel.py --seeds nightly_seeds.csv     (make regr_nightly)
+
+Only passing runs are ranked unless --include-failing is given: a seed
+whose run failed is a bug reproducer, not a coverage contributor.
+
+Usage:
+    python3 cov_rank.py sim/regr_runs --csv sim/regression_raw.csv -o sim/nightly_seeds.csv
+    python3 cov_rank.py sim/regr_runs --curve coverage_curve.csv --per-cpu-second
+"""
+import argparse
+import collections
+import os
+import sys
+
+import cov_bins
+import regr_common as rc
+
+Run = collections.namedtuple('Run', ['test', 'iteration', 'seed', 'status', 'cpu_s', 'bits'])
+
+SEEDS_HEADER = ['Test_Name', 'Seed', 'Iteration', 'CPU_Time_s', 'New_Bins', 'Covered_Bins']
+
+
+def load_runs(roots, csv_path, groups=cov_bins.DEFAULT_GROUPS, include_failing=False):
+    """Returns ([Run], bin index) for every report that matches a regression_raw.csv row."""
+    meta = dict(((r['Test_Name'], int(r['Iteration'])), r) for r in rc.read_csv(csv_path))
+    reports = []
+    for path in cov_bins.find_reports(roots):
+        run = cov_bins.run_of(path)
+        if run in meta:
+            reports.append((run, cov_bins.read_report(path, groups)))
+    index = cov_bins.bin_index(set(name for _, hits in reports for name in hits))
+    runs = []
+    for (test, i), hits in reports:
+        r = meta[(test, i)]
+        if r['Status'] != 'PASS' and not include_failing:
+            continue
+        runs.append(Run(test, i, r['Seed'], r['Status'], float(r['CPU_Time_s'] or 0),
+                        cov_bins.to_bits(hits, index)))
+    return runs, index
+
+
+def greedy_cover(runs, per_cpu_second=False):
+    """Greedy set cover; returns [(Run, new_bins)] until no run adds a bin."""
+    remaining = list(runs)
+    covered = 0
+    picked = []
+    while remaining:
+        best = best_key = None
+        for n, run in enumerate(remaining):
+            new = cov_bins.popcount(run.bits & ~covered)
+            if not new:
+                continue
+            key = (new / max(run.cpu_s, 1e-3), new) if per_cpu_second else (new, -run.cpu_s)
+            if best_key is None or key > best_key:
+                best, best_key = n, key
+        if best is None:
+            break
+        run = remaining.pop(best)
+        new = cov_bins.popcount(run.bits & ~covered)
+        covered |= run.bits
+        picked.append((run, new))
+    return picked
+
+
+def curve(runs):
+    """[(cumulative CPU s, covered bins)] after each run in the given order."""
+    points = []
+    covered = 0
+    cpu = 0.0
+    for run in runs:
+        covered |= run.bits
+        cpu += run.cpu_s
+        points.append((cpu, cov_bins.popcount(covered)))
+    return points
+
+
+def write_seeds(path, picked):
+    covered = 0
+    with open(path, 'w') as f:
+        f.write(','.join(SEEDS_HEADER) + '\n')
+        for run, new in picked:
+            covered += new
+            f.write('{},{},{},{:.2f},{},{}\n'.format(run.test, run.seed, run.iteration, run.cpu_s, new, covered))
+
+
+def write_curve(path, ranked, original, total):
+    with open(path, 'w') as f:
+        f.write('Order,Runs,Cum_CPU_s,Covered_Bins,Coverage_Pct\n')
+        for name, points in (('ranked', ranked), ('original', original)):
+            for n, (cpu, bins) in enumerate(points, 1):
+                f.write('{},{},{:.2f},{},{:.2f}\n'.format(name, n, cpu, bins, 100.0 * bins / total))
+
+
+def merged_bits(runs):
+    bits = 0
+    for run in runs:
+        bits |= run.bits
+    return bits
+
+
+def print_report(picked, runs, index, original):
+    """Prints the ranked list and how it compares with the full regression."""
+    total = len(index)
+    merged = merged_bits(runs)
+    merged_count = cov_bins.popcount(merged)
+    row_fmt = "{:>4} | {:<25} | {:>12} | {:>9} | {:>5} | {:>9} | {:>7}"
+    print(rc.RULE)
+    print("                              COVERAGE-RANKED SEED LIST")
+    print(rc.RULE)
+    print(row_fmt.format("#", "Test Scenario", "Seed", "CPU (s)", "New", "Cum CPU", "Cov %"))
+    print(rc.SUB_RULE)
+    cum_cpu = 0.0
+    covered = 0
+    for n, (run, new) in enumerate(picked, 1):
+        cum_cpu += run.cpu_s
+        covered += new
+        print(row_fmt.format(n, run.test, run.seed, "{:.2f}".format(run.cpu_s), new,
+                             "{:.2f}".format(cum_cpu), "{:.2f}".format(100.0 * covered / total)))
+    print(rc.SUB_RULE)
+    full_cpu = original[-1][0] if original else 0.0
+    # First run of the original order at which the merged coverage is reached
+    closure = next((n for n, (_, bins) in enumerate(original, 1) if bins == merged_count), 0)
+    print(" Merged coverage: {}/{} bins ({:.2f}%) over {} run(s)".format(
+        merged_count, total, 100.0 * merged_count / total if total else 0.0, len(runs)))
+    print(" Ranked list:     {} run(s), {:.2f} CPU s ({:.1f}% of {:.2f})".format(
+        len(picked), cum_cpu, 100.0 * cum_cpu / full_cpu if full_cpu else 0.0, full_cpu))
+    if closure:
+        print(" Original order:  same coverage after {} run(s), {:.2f} CPU s".format(
+            closure, original[closure - 1][0]))
+    missing = [name for name in sorted(index) if not merged >> index[name] & 1]
+    if missing:
+        print(" Never hit:       " + ', '.join(missing))
+    print(rc.RULE)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Rank (test, seed) runs by functional coverage contribution")
+    p.add_argument('roots', nargs='+', help="directories holding per-run URG text reports (grpinfo.txt)")
+    p.add_argument('--csv', default=os.path.join(rc.SIM_DIR, 'regression_raw.csv'),
+                   help="regression_raw.csv with the runs' seeds and CPU times (default: sim/)")
+    p.add_argument('-g', '--groups', nargs='+', default=cov_bins.DEFAULT_GROUPS, help="covergroups to rank on")
+    p.add_argument('--per-cpu-second', action='store_true', help="pick by new bins per CPU second")
+    p.add_argument('--include-failing', action='store_true', help="also rank runs that did not pass")
+    p.add_argument('-o', '--out', default=None, help="write the ranked (test, seed) list to this CSV")
+    p.add_argument('--curve', default=None, help="write coverage vs. cumulative CPU time to this CSV")
+    args = p.parse_args(argv)
+
+    runs, index = load_runs(args.roots, args.csv, args.groups, args.include_failing)
+    if not runs:
+        print("No per-run reports matching {} found under {}".format(args.csv, ', '.join(args.roots)))
+        print("Write them with: python3 regr_parallel.py --cov-per-run   (make regr_paper_par REGR_OPTS=--cov-per-run)")
+        return 1
+    # Original curve in regr_paper order: iteration-major, TEST_LIST order within an iteration
+    tests = rc.test_list()
+    runs.sort(key=lambda r: (r.iteration, tests.index(r.test) if r.test in tests else len(tests), r.test))
+    picked = greedy_cover(runs, args.per_cpu_second)
+    original = curve(runs)
+    print_report(picked, runs, index, original)
+    if args.out:
+        write_seeds(args.out, picked)
+        print("Ranked seed list written to: {}".format(args.out))
+    if args.curve:
+        write_curve(args.curve, curve([run for run, _ in picked]), original, len(index))
+        print("Coverage curve written to: {}".format(args.curve))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
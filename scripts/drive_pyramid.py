@@ -0,0 +1,272 @@
+"""Multi-resolution min/max pyramid over the open-drain drive arrays.
+
+For one bus line (SCL or SDA) three drive arrays are built from a VCD dump:
+
+* vip: the VIP driver's intf.<line>_drive  (0 = drive low, 1 = release)
+* rtl: wired-AND of the RTL master and slave drivers (<mst|slv>_<line>_oe/_o)
+* bus: the resolved line intf.<line>
+
+Level 0 covers the run in bins of `base_ticks`; every level above halves the
+resolution. Each bin keeps two bits: "was ever released" (max) and "was
+ever driven low" (min), so a pixel shows low, high or toggling without
+ever losing a glitch. Levels are stored bit-packed in one file next to a
+JSON header and read through np.memmap, so rendering the full run or any
+zoom window touches only about `width` bins of a single level.
+
+Clock-stretch events (line held low much longer than its usual low phase)
+and contention events (VIP and RTL pulling the line low at the same time)
+are found exactly from the transitions and stored in the header, so the
+BOI-2 figure can zoom straight to them.
+
+Usage:
+    python3 drive_pyramid.py build sim/regr_runs/i2c_slave_test_1/waves.vcd -o scl.pyr
+    python3 drive_pyramid.py info scl.pyr
+"""
+import argparse
+import collections
+import json
+import math
+import struct
+import sys
+import time
+
+import numpy as np
+
+import vcd_reader
+
+MAGIC = b'I2CPYR1\n'
+SIGNALS = ['vip', 'rtl', 'bus']
+DEFAULT_BASE_NS = 100
+# Rendered pixel codes
+LOW, HIGH, MIXED = 0, 1, 2
+# A low phase this many times the median low phase is a clock stretch
+STRETCH_FACTOR = 3.0
+
+Pyramid = collections.namedtuple('Pyramid', ['header', 'mm'])
+Event = collections.namedtuple('Event', ['kind', 'start', 'end'])
+
+
+def drive_names(line):
+    """VCD names of (vip, master oe, master o, slave oe, slave o, bus) for a line."""
+    return ['tb_top.intf.{}_drive'.format(line),
+            'tb_top.mst_{}_oe'.format(line), 'tb_top.mst_{}_o'.format(line),
+            'tb_top.slv_{}_oe'.format(line), 'tb_top.slv_{}_o'.format(line),
+            'tb_top.intf.{}'.format(line)]
+
+
+def _released(values):
+    """1 where the value is a released/high level (1 or z); x counts as driven."""
+    v = np.asarray(values)
+    return ((v == 1) | (v == vcd_reader.VAL_Z)).astype(np.uint8)
+
+
+def _combine(traces, fn):
+    """Samples traces on their merged timeline and returns Trace(times, fn(*values))."""
+    times = np.sort(np.concatenate([t.times for t in traces]), kind='stable')
+    times = times[np.r_[True, times[1:] != times[:-1]]] if len(times) else times
+    sampled = []
+    for t in traces:
+        idx = np.searchsorted(t.times, times, side='right') - 1
+        sampled.append(np.where(idx >= 0, t.values[np.maximum(idx, 0)], vcd_reader.VAL_Z)
+                       if len(t.times) else np.full(len(times), vcd_reader.VAL_Z, dtype=np.uint8))
+    values = fn(*sampled).astype(np.uint8)
+    keep = np.r_[True, values[1:] != values[:-1]] if len(values) else np.zeros(0, dtype=bool)
+    return vcd_reader.Trace(times[keep], values[keep])
+
+
+def drive_traces(traces, line):
+    """Returns {'vip', 'rtl', 'bus': Trace of 0/1 levels} from raw VCD traces."""
+    vip, m_oe, m_o, s_oe, s_o, bus = [traces[n] for n in drive_names(line)]
+
+    def rtl(m_oe, m_o, s_oe, s_o):
+        mst = ~((m_oe == 1) & (m_o == 0))
+        slv = ~((s_oe == 1) & (s_o == 0))
+        return mst & slv
+
+    return {
+        'vip': _combine([vip], _released),
+        'rtl': _combine([m_oe, m_o, s_oe, s_o], rtl),
+        'bus': _combine([bus], _released),
+    }
+
+
+def _segments(trace, level, end):
+    """(start, stop) tick ranges where the 0/1 trace equals `level` (before t=0 counts as released)."""
+    times, values = trace.times, trace.values
+    if not len(times) or times[0] > 0:
+        times, values = np.r_[0, times], np.r_[1, values].astype(np.uint8)
+    stops = np.r_[times[1:], end]
+    sel = values == level
+    return times[sel], stops[sel]
+
+
+def _touched(trace, level, end, base, n_bins):
+    """Bool per level-0 bin: the trace was at `level` somewhere inside the bin."""
+    starts, stops = _segments(trace, level, end)
+    ok = stops > starts
+    first = starts[ok] // base
+    last = (stops[ok] - 1) // base
+    diff = np.zeros(n_bins + 1, dtype=np.int32)
+    np.add.at(diff, first, 1)
+    np.add.at(diff, last + 1, -1)
+    return np.cumsum(diff[:-1], dtype=np.int32) > 0
+
+
+def _halve(bits, op):
+    if len(bits) % 2:
+        bits = np.r_[bits, bits[-1:]]
+    return op(bits[0::2], bits[1::2])
+
+
+def find_events(drives, line, end, stretch_factor=STRETCH_FACTOR):
+    """Exact clock-stretch and contention intervals; returns a list of Events."""
+    events = []
+    if line == 'scl':
+        starts, stops = _segments(drives['bus'], 0, end)
+        if len(starts):
+            dur = stops - starts
+            limit = stretch_factor * np.median(dur)
+            for s, e in zip(starts[dur > limit], stops[dur > limit]):
+                events.append(Event('stretch', int(s), int(e)))
+    both = _combine([drives['vip'], drives['rtl']], lambda v, r: ~((v == 0) & (r == 0)) & 1)
+    for s, e in zip(*_segments(both, 0, end)):
+        events.append(Event('contention', int(s), int(e)))
+    events.sort(key=lambda ev: ev.start)
+    return events
+
+
+def build(vcd_path, out_path, line='scl', base_ns=DEFAULT_BASE_NS):
+    """Builds the pyramid file for one line of a VCD; returns its header."""
+    timescale_s, traces = vcd_reader.read_signals(vcd_path, drive_names(line))
+    drives = drive_traces(traces, line)
+    end = max([int(t.times[-1]) for t in drives.values() if len(t.times)] or [0]) + 1
+    base = max(1, int(round(base_ns * 1e-9 / timescale_s)))
+    n_bins = -(-end // base)
+
+    header = {'version': 1, 'line': line, 'timescale_s': timescale_s, 'base_ticks': base,
+              'end_ticks': end, 'levels': [], 'arrays': {}, 'events': []}
+    blobs = []
+    offset = 0
+    for name in SIGNALS:
+        low = _touched(drives[name], 0, end, base, n_bins)
+        high = _touched(drives[name], 1, end, base, n_bins)
+        level = 0
+        while True:
+            if name == SIGNALS[0]:
+                header['levels'].append(len(low))
+            for kind, bits in (('low', low), ('high', high)):
+                packed = np.packbits(bits)
+                header['arrays']['{}/{}/{}'.format(name, level, kind)] = [offset, len(bits)]
+                blobs.append(packed)
+                offset += len(packed)
+            if len(low) == 1:
+                break
+            low, high = _halve(low, np.logical_or), _halve(high, np.logical_or)
+            level += 1
+    header['events'] = [list(ev) for ev in find_events(drives, line, end)]
+
+    raw = json.dumps(header).encode('ascii')
+    with open(out_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(raw)))
+        f.write(raw)
+        for packed in blobs:
+            f.write(packed.tobytes())
+    return header
+
+
+def open_pyramid(path):
+    """Maps a pyramid file; returns Pyramid(header, memmap of the bit data)."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a drive pyramid".format(path))
+        size = struct.unpack('<I', f.read(4))[0]
+        header = json.loads(f.read(size).decode('ascii'))
+    data_offset = len(MAGIC) + 4 + size
+    mm = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset)
+    return Pyramid(header, mm)
+
+
+def events(pyr):
+    """Stored clock-stretch / contention Events."""
+    return [Event(*ev) for ev in pyr.header['events']]
+
+
+def _bits(pyr, key, i0, i1):
+    """Bits [i0, i1) of one stored array, unpacking only the bytes they span."""
+    offset, _ = pyr.header['arrays'][key]
+    chunk = np.asarray(pyr.mm[offset + i0 // 8:offset + (i1 + 7) // 8])
+    return np.unpackbits(chunk)[i0 % 8:i0 % 8 + (i1 - i0)].astype(bool)
+
+
+def render(pyr, t0=None, t1=None, width=1000):
+    """Pixel codes for [t0, t1) ticks at about `width` columns.
+
+    Returns (edges in ticks, {signal: uint8 codes LOW/HIGH/MIXED}). Picks the
+    coarsest level with at least one bin per column, so the cost depends on
+    `width`, not on the run length or the window.
+    """
+    h = pyr.header
+    t0 = 0 if t0 is None else max(0, int(t0))
+    t1 = h['end_ticks'] if t1 is None else min(h['end_ticks'], int(t1))
+    span_bins = max(1.0, (t1 - t0) / float(h['base_ticks']))
+    level = int(min(len(h['levels']) - 1, max(0, math.floor(math.log(max(span_bins / width, 1), 2)))))
+    size = h['base_ticks'] << level
+    i0 = t0 // size
+    i1 = min(h['levels'][level], max(i0 + 1, -(-t1 // size)))
+    edges = np.arange(i0, i1 + 1, dtype=np.int64) * size
+    codes = {}
+    for name in SIGNALS:
+        low = _bits(pyr, '{}/{}/low'.format(name, level), i0, i1)
+        high = _bits(pyr, '{}/{}/high'.format(name, level), i0, i1)
+        codes[name] = np.where(low & high, MIXED, np.where(low, LOW, HIGH)).astype(np.uint8)
+    return edges, codes
+
+
+def pick_windows(pyr, count=3, margin=1.0):
+    """Zoom windows (t0, t1, Event) around the most relevant events.
+
+    Contention first, then the longest clock stretches; each window pads the
+    event by `margin` times its duration on both sides.
+    """
+    evs = sorted(events(pyr), key=lambda ev: (ev.kind != 'contention', -(ev.end - ev.start)))
+    windows = []
+    for ev in evs[:count]:
+        pad = max(int((ev.end - ev.start) * margin), pyr.header['base_ticks'])
+        windows.append((max(0, ev.start - pad), ev.end + pad, ev))
+    return windows
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Min/max pyramid over VIP/RTL/bus drive arrays")
+    sub = p.add_subparsers(dest='cmd')
+    p_b = sub.add_parser('build', help="build a pyramid file from a VCD")
+    p_b.add_argument('vcd')
+    p_b.add_argument('-o', '--out', required=True)
+    p_b.add_argument('--line', choices=['scl', 'sda'], default='scl')
+    p_b.add_argument('--base-ns', type=float, default=DEFAULT_BASE_NS, help="level-0 bin width")
+    p_i = sub.add_parser('info', help="print levels and events of a pyramid file")
+    p_i.add_argument('pyramid')
+    args = p.parse_args(argv)
+    if not args.cmd:
+        p.error("a command is required")
+
+    if args.cmd == 'build':
+        start = time.time()
+        h = build(args.vcd, args.out, args.line, args.base_ns)
+        print("Built {} levels ({} level-0 bins), {} event(s) in {:.2f} s".format(
+            len(h['levels']), h['levels'][0], len(h['events']), time.time() - start))
+        return 0
+
+    pyr = open_pyramid(args.pyramid)
+    h = pyr.header
+    ns = h['timescale_s'] * 1e9
+    print("Line {}: {:.3f} us, level-0 bin {:g} ns, {} levels".format(
+        h['line'], h['end_ticks'] * ns / 1e3, h['base_ticks'] * ns, len(h['levels'])))
+    for ev in events(pyr):
+        print("  {:<10} {:>14.3f} us  {:>10.3f} us".format(ev.kind, ev.start * ns / 1e3, (ev.end - ev.start) * ns / 1e3))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
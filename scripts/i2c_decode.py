@@ -0,0 +1,232 @@
+"""Vectorized offline I2C protocol decoder mirroring i2c_monitor.
+
+Takes SCL/SDA transition arrays (e.g. from vcd_reader) and decodes the bus
+the way i2c_monitor::run_phase does, but with NumPy array masks instead of
+bit-by-bit waits:
+
+* START / repeated START: SDA falls while SCL stays high
+* STOP:                   SDA rises while SCL stays high
+* bits:                   SDA sampled on every SCL rising edge (sample_bit)
+
+Bits between a START and the next START/STOP are grouped into 9-bit frames
+(8 data bits + ACK). The first frame is the address byte; data bytes are
+only kept when the address was ACKed, and in the write direction sampling
+stops after the first NACKed byte, as in the monitor. A trailing partial
+byte is dropped (the monitor's fork is disabled mid-byte). Unlike the
+monitor, a transaction ended by a repeated START gets repeated_start = 1
+and the transfer after the Sr is decoded too.
+
+Usage:
+    python3 i2c_decode.py sim/regr_runs/*/waves.vcd -j 16
+    python3 i2c_decode.py waves.vcd --print 5
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import i2c_types as it
+import vcd_reader
+
+DEFAULT_SCL = 'tb_top.intf.scl'
+DEFAULT_SDA = 'tb_top.intf.sda'
+
+# Per-transaction arrays; payload bytes live in one flat `data` array
+Decoded = collections.namedtuple('Decoded', [
+    'start_time', 'end_time', 'addr', 'direction', 'addr_mode', 'status',
+    'nack_received', 'repeated_start', 'data_offset', 'data_len', 'data'])
+
+BusEvents = collections.namedtuple('BusEvents', ['times', 'scl', 'sda', 'scl_prev', 'sda_prev'])
+
+_BIT_WEIGHTS = np.array([128, 64, 32, 16, 8, 4, 2, 1], dtype=np.int64)
+
+
+def _level(values):
+    """Open-drain bus level: z (released, pulled up) reads as 1, x stays 2."""
+    v = np.asarray(values, dtype=np.uint8).copy()
+    v[v == vcd_reader.VAL_Z] = 1
+    return v
+
+
+def sample_at(trace_times, trace_values, times, initial=1):
+    """Value of a transition trace at each of `times` (last change at or before)."""
+    idx = np.searchsorted(trace_times, times, side='right') - 1
+    out = np.asarray(trace_values)[np.maximum(idx, 0)]
+    return np.where(idx >= 0, out, initial).astype(np.uint8)
+
+
+def bus_events(scl, sda):
+    """Merges SCL/SDA traces into one timeline of (time, levels, previous levels)."""
+    # Both traces are already sorted: a stable (merge) sort plus dedupe beats np.unique
+    times = np.sort(np.concatenate([scl.times, sda.times]), kind='stable')
+    times = times[np.r_[True, times[1:] != times[:-1]]]
+    scl_v = _level(sample_at(scl.times, scl.values, times))
+    sda_v = _level(sample_at(sda.times, sda.values, times))
+    scl_prev = np.empty_like(scl_v)
+    sda_prev = np.empty_like(sda_v)
+    scl_prev[0] = sda_prev[0] = 1  # idle bus before the first change
+    scl_prev[1:] = scl_v[:-1]
+    sda_prev[1:] = sda_v[:-1]
+    return BusEvents(times, scl_v, sda_v, scl_prev, sda_prev)
+
+
+def conditions(ev):
+    """Returns (start_mask, stop_mask, rise_mask) over a BusEvents timeline."""
+    scl_high = (ev.scl_prev == 1) & (ev.scl == 1)
+    start = scl_high & (ev.sda_prev == 1) & (ev.sda == 0)
+    stop = scl_high & (ev.sda_prev == 0) & (ev.sda == 1)
+    rise = (ev.scl_prev == 0) & (ev.scl == 1)
+    return start, stop, rise
+
+
+def _empty():
+    z = np.zeros(0, dtype=np.int64)
+    return Decoded(z, z, z, z, z, z, z, z, z, z, np.zeros(0, dtype=np.uint8))
+
+
+def decode(scl, sda):
+    """Decodes SCL/SDA Traces into a Decoded set of transactions."""
+    if not len(scl.times) or not len(sda.times):
+        return _empty()
+    ev = bus_events(scl, sda)
+    start, stop, rise = conditions(ev)
+
+    cond_idx = np.flatnonzero(start | stop)
+    cond_t = ev.times[cond_idx]
+    cond_is_start = start[cond_idx]
+    bit_t = ev.times[rise]
+    bit_v = (ev.sda[rise] != 0).astype(np.int64)  # x samples as 1
+
+    # Segment = bits after a START, up to the next START/STOP
+    seg = np.searchsorted(cond_t, bit_t, side='right') - 1
+    keep = seg >= 0
+    keep[keep] = cond_is_start[seg[keep]]
+    seg, bit_v = seg[keep], bit_v[keep]
+    if not len(seg):
+        return _empty()
+
+    # Position of each bit within its segment, grouped into 9-bit frames
+    first = np.flatnonzero(np.r_[True, seg[1:] != seg[:-1]])
+    counts = np.diff(np.r_[first, len(seg)])
+    pos = np.arange(len(seg)) - np.repeat(first, counts)
+    complete = pos < np.repeat(counts // 9 * 9, counts)
+    seg, bit_v, pos = seg[complete], bit_v[complete], pos[complete]
+    if not len(seg):
+        return _empty()
+
+    frames = bit_v.reshape(-1, 9)
+    frame_seg = seg[::9]
+    frame_no = pos[::9] // 9
+    frame_byte = frames[:, :8] @ _BIT_WEIGHTS
+    frame_ack = frames[:, 8]
+
+    # Address frames -> one transaction each
+    is_addr = frame_no == 0
+    tr_seg = frame_seg[is_addr]
+    addr_byte = frame_byte[is_addr]
+    addr_nack = frame_ack[is_addr]
+    direction = addr_byte & 1
+    status = np.where(addr_nack == 0, it.I2C_STATUS_OK, it.I2C_STATUS_ADDR_NACK)
+
+    # Data frames: kept if the address was ACKed; writes stop after the first NACK
+    tr_of_frame = np.searchsorted(tr_seg, frame_seg)
+    data_sel = ~is_addr
+    d_tr = tr_of_frame[data_sel]
+    d_ack = frame_ack[data_sel]
+    nacks = np.cumsum(d_ack)
+    d_first = np.flatnonzero(np.r_[True, d_tr[1:] != d_tr[:-1]]) if len(d_tr) else np.zeros(0, np.int64)
+    base = np.repeat(nacks[d_first] - d_ack[d_first], np.diff(np.r_[d_first, len(d_tr)]))
+    prior_nacks = nacks - d_ack - base
+    keep_d = (status[d_tr] == it.I2C_STATUS_OK) & ((direction[d_tr] == it.I2C_READ) | (prior_nacks == 0))
+    d_tr, d_ack = d_tr[keep_d], d_ack[keep_d]
+    data = frame_byte[data_sel][keep_d].astype(np.uint8)
+
+    n = len(tr_seg)
+    data_len = np.bincount(d_tr, minlength=n)
+    data_offset = np.r_[0, np.cumsum(data_len)[:-1]]
+    nack_received = np.zeros(n, dtype=np.int64)
+    has_data = data_len > 0
+    nack_received[has_data] = d_ack[data_offset[has_data] + data_len[has_data] - 1]
+
+    # Terminating condition of each segment
+    nxt = tr_seg + 1
+    ended = nxt < len(cond_t)
+    end_time = np.where(ended, cond_t[np.minimum(nxt, len(cond_t) - 1)], ev.times[-1])
+    repeated = ended & cond_is_start[np.minimum(nxt, len(cond_t) - 1)]
+
+    return Decoded(
+        start_time=cond_t[tr_seg], end_time=end_time, addr=addr_byte >> 1, direction=direction,
+        addr_mode=np.full(n, it.I2C_ADDR_7BIT, dtype=np.int64), status=status,
+        nack_received=nack_received, repeated_start=repeated.astype(np.int64),
+        data_offset=data_offset, data_len=data_len, data=data)
+
+
+def transactions(dec):
+    """Yields dicts with the i2c_transaction fields for each decoded transaction."""
+    for i in range(len(dec.addr)):
+        off, n = int(dec.data_offset[i]), int(dec.data_len[i])
+        yield {
+            'start_time': int(dec.start_time[i]),
+            'end_time': int(dec.end_time[i]),
+            'addr': int(dec.addr[i]),
+            'direction': int(dec.direction[i]),
+            'addr_mode': int(dec.addr_mode[i]),
+            'data': dec.data[off:off + n].tolist(),
+            'repeated_start': int(dec.repeated_start[i]),
+            'status': int(dec.status[i]),
+            'nack_received': int(dec.nack_received[i]),
+        }
+
+
+def decode_vcd(path, scl=DEFAULT_SCL, sda=DEFAULT_SDA):
+    """Reads SCL/SDA from a VCD and decodes them; returns (timescale_s, Decoded)."""
+    timescale_s, traces = vcd_reader.read_signals(path, [scl, sda])
+    return timescale_s, decode(traces[scl], traces[sda])
+
+
+def _decode_file(job):
+    path, scl, sda, out_dir = job
+    start = time.time()
+    timescale_s, dec = decode_vcd(path, scl, sda)
+    if out_dir:
+        name = os.path.basename(os.path.dirname(os.path.abspath(path))) or 'waves'
+        np.savez(os.path.join(out_dir, name + '_i2c.npz'), timescale_s=timescale_s, **dec._asdict())
+    return path, len(dec.addr), int(dec.data_len.sum()), time.time() - start
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Decode I2C transactions from VCD dumps")
+    p.add_argument('vcds', nargs='+')
+    p.add_argument('--scl', default=DEFAULT_SCL)
+    p.add_argument('--sda', default=DEFAULT_SDA)
+    p.add_argument('-j', '--jobs', type=int, default=None, help="decoder processes for many files")
+    p.add_argument('-o', '--out-dir', default=None, help="save <run>_i2c.npz per file")
+    p.add_argument('--print', dest='show', type=int, default=0, metavar='N',
+                   help="print the first N transactions (convert2string format)")
+    args = p.parse_args(argv)
+
+    if args.show:
+        _, dec = decode_vcd(args.vcds[0], args.scl, args.sda)
+        for i, tr in enumerate(transactions(dec)):
+            if i >= args.show:
+                break
+            print("@ {}: {}".format(tr['start_time'], it.convert2string(tr)))
+        return 0
+
+    jobs = [(v, args.scl, args.sda, args.out_dir) for v in args.vcds]
+    if len(jobs) > 1 and args.jobs != 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_decode_file, jobs))
+    else:
+        results = [_decode_file(j) for j in jobs]
+    for path, n_tr, n_bytes, elapsed in results:
+        print("{:<60} {:>9} transactions {:>10} bytes  {:.2f} s".format(path, n_tr, n_bytes, elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Bulk I2C timing-compliance checker over waveform edges.
+
+Computes tHD;STA, tSU;STA (repeated STARTs only; a START after a STOP is
+covered by tBUF), tSU;STO, tBUF, tLOW, tHIGH, tSU;DAT and tHD;DAT for every
+occurrence in a run with vectorized edge-difference arithmetic over the
+SCL/SDA transition arrays (the same bus timeline as i2c_decode), and checks
+them against the UM10204 limits of each i2c_speed_e mode. A digital
+waveform has zero transition time, so data-valid coincides with the SDA edge
+tHD;DAT measures: the tVD;DAT maximum is checked as tHD;DAT's upper limit.
+With --speed auto each transaction is classified by its own SCL period,
+so runs that switch speed (i2c_speed_test) are checked correctly; clock
+phases that span a START or STOP (SCL high across the idle bus) are left
+out of the period.
+
+Usage:
+    python3 i2c_timing.py sim/regr_runs/*/waves.vcd -j 16 --csv violations.csv
+    python3 i2c_timing.py waves.vcd --speed fast
+"""
+import argparse
+import collections
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import i2c_decode
+import i2c_types as it
+import vcd_reader
+
+# UM10204 Table 10 limits in ns: (min, max); None = no limit.
+# t_low/t_high/t_buf match i2c_config::set_default_timings(); the t_hd_dat
+# maximum is tVD;DAT (Table 10 note 3).
+TIMING_SPEC = {
+    it.I2C_STANDARD_MODE: {
+        't_hd_sta': (4000, None), 't_su_sta': (4700, None), 't_su_sto': (4000, None),
+        't_buf': (4700, None), 't_low': (4700, None), 't_high': (4000, None),
+        't_su_dat': (250, None), 't_hd_dat': (0, 3450),
+    },
+    it.I2C_FAST_MODE: {
+        't_hd_sta': (600, None), 't_su_sta': (600, None), 't_su_sto': (600, None),
+        't_buf': (1300, None), 't_low': (1300, None), 't_high': (600, None),
+        't_su_dat': (100, None), 't_hd_dat': (0, 900),
+    },
+    it.I2C_FAST_MODE_PLUS: {
+        't_hd_sta': (260, None), 't_su_sta': (260, None), 't_su_sto': (260, None),
+        't_buf': (500, None), 't_low': (500, None), 't_high': (260, None),
+        't_su_dat': (50, None), 't_hd_dat': (0, 450),
+    },
+}
+CHECKS = ['t_hd_sta', 't_su_sta', 't_su_sto', 't_buf', 't_low', 't_high',
+          't_su_dat', 't_hd_dat']
+
+SPEEDS = {'standard': it.I2C_STANDARD_MODE, 'fast': it.I2C_FAST_MODE,
+          'fast_plus': it.I2C_FAST_MODE_PLUS}
+
+# SCL period (tLOW + tHIGH) boundaries used by --speed auto, in ns
+AUTO_PERIOD_NS = [(4000, it.I2C_STANDARD_MODE), (1200, it.I2C_FAST_MODE), (0, it.I2C_FAST_MODE_PLUS)]
+
+PERCENTILES = [1, 5, 50]
+
+Violation = collections.namedtuple('Violation', ['check', 'time_ns', 'measured_ns', 'limit_ns', 'speed'])
+
+
+def _next(after, t, strict):
+    """Index into sorted `after` of the first event at/after (or strictly after) each t."""
+    return np.searchsorted(after, t, side='right' if strict else 'left')
+
+
+def measure(ev, ns_per_tick):
+    """Returns ({check: (times_ns, values_ns)} for every interval occurrence, START times, STOP times)."""
+    start, stop, rise = i2c_decode.conditions(ev)
+    fall = (ev.scl_prev == 1) & (ev.scl == 0)
+    data = (ev.sda != ev.sda_prev) & ~start & ~stop
+
+    t = ev.times.astype(np.float64) * ns_per_tick
+    t_start, t_stop, t_rise, t_fall, t_data = t[start], t[stop], t[rise], t[fall], t[data]
+    # Repeated START: the previous bus condition was a START, not a STOP
+    cond = np.flatnonzero(start | stop)
+    prev_is_start = np.r_[False, start[cond][:-1]]
+    t_restart = t[cond[start[cond] & prev_is_start]]
+    out = {}
+
+    def pair(name, src, dst, forward=True, strict=True):
+        # forward: src -> first dst after it; otherwise last dst before src -> src
+        if forward:
+            i = _next(dst, src, strict)
+            ok = i < len(dst)
+            out[name] = (src[ok], dst[i[ok]] - src[ok])
+        else:
+            i = _next(dst, src, not strict) - 1
+            ok = i >= 0
+            out[name] = (src[ok], src[ok] - dst[i[ok]])
+
+    pair('t_hd_sta', t_start, t_fall)
+    pair('t_su_sta', t_restart, t_rise, forward=False)
+    pair('t_su_sto', t_stop, t_rise, forward=False)
+    pair('t_buf', t_stop, t_start)
+    pair('t_low', t_fall, t_rise)
+    pair('t_high', t_rise, t_fall)
+    pair('t_su_dat', t_data, t_rise, strict=False)
+    pair('t_hd_dat', t_data, t_fall, forward=False, strict=False)
+    return out, t_start, t_stop
+
+
+def classify(intervals, t_start, t_stop, speed):
+    """Returns (segment_speed array, segment start times) for the measured run."""
+    if speed != 'auto':
+        return np.array([SPEEDS[speed]]), np.array([-np.inf])
+    seg_t = np.r_[-np.inf, t_start]
+    t_cond = np.sort(np.r_[t_start, t_stop])
+    period = np.zeros(len(seg_t))
+    for name in ('t_low', 't_high'):
+        times, vals = intervals[name]
+        # A phase with a START/STOP inside it includes bus idle time, not just the clock
+        spans = np.searchsorted(t_cond, times, side='right') != np.searchsorted(t_cond, times + vals, side='left')
+        times, vals = times[~spans], vals[~spans]
+        seg = np.searchsorted(seg_t, times, side='right') - 1
+        n = np.bincount(seg, minlength=len(seg_t))
+        period += np.bincount(seg, weights=vals, minlength=len(seg_t)) / np.maximum(n, 1)
+    modes = np.full(len(seg_t), it.I2C_FAST_MODE_PLUS)
+    for bound, mode in reversed(AUTO_PERIOD_NS):
+        modes[period >= bound] = mode
+    # Segments without clocking (idle) inherit the following transaction's mode
+    idle = period == 0
+    if idle.any() and not idle.all():
+        idx = np.where(~idle, np.arange(len(seg_t)), len(seg_t))
+        idx = np.minimum.accumulate(idx[::-1])[::-1]
+        idx[idx == len(seg_t)] = np.flatnonzero(~idle)[-1]
+        modes = modes[idx]
+    return modes, seg_t
+
+
+def check_run(ev, ns_per_tick, speed='auto'):
+    """Returns (violations, {check: stats dict}) for one bus timeline."""
+    intervals, t_start, t_stop = measure(ev, ns_per_tick)
+    modes, seg_t = classify(intervals, t_start, t_stop, speed)
+    violations = []
+    stats = {}
+    for name in CHECKS:
+        times, vals = intervals[name]
+        mode = modes[np.searchsorted(seg_t, times, side='right') - 1]
+        for m in np.unique(mode):
+            lo, hi = TIMING_SPEC[m][name]
+            sel = mode == m
+            bad = np.zeros(len(vals), dtype=bool)
+            if lo is not None:
+                bad |= sel & (vals < lo)
+            if hi is not None:
+                bad |= sel & (vals > hi)
+            for i in np.flatnonzero(bad):
+                limit = lo if lo is not None and vals[i] < lo else hi
+                violations.append(Violation(name, float(times[i]), float(vals[i]), limit, it.SPEED_NAMES[m]))
+        if len(vals):
+            pct = np.percentile(vals, PERCENTILES)
+            stats[name] = dict(n=len(vals), min=float(vals.min()), max=float(vals.max()),
+                               **dict(('p{}'.format(p), float(v)) for p, v in zip(PERCENTILES, pct)))
+        else:
+            stats[name] = dict(n=0)
+    violations.sort(key=lambda v: v.time_ns)
+    return violations, stats
+
+
+def check_vcd(path, speed='auto', scl=i2c_decode.DEFAULT_SCL, sda=i2c_decode.DEFAULT_SDA):
+    """Reads one VCD and checks it; returns (path, violations, stats)."""
+    timescale_s, traces = vcd_reader.read_signals(path, [scl, sda])
+    if not len(traces[scl].times) or not len(traces[sda].times):
+        return path, [], dict((c, dict(n=0)) for c in CHECKS)
+    ev = i2c_decode.bus_events(traces[scl], traces[sda])
+    violations, stats = check_run(ev, timescale_s * 1e9, speed)
+    return path, violations, stats
+
+
+def _check_job(job):
+    return check_vcd(*job)
+
+
+def print_report(path, violations, stats, max_listed=20):
+    """Prints the per-run statistics table and the first violations."""
+    print("=" * 99)
+    print(" {}  ({} violation(s))".format(path, len(violations)))
+    print("-" * 99)
+    print("{:<10} | {:>9} | {:>12} | {:>12} | {:>12} | {:>12} | {:>12}".format(
+        "Check", "Count", "Min (ns)", "P1 (ns)", "P5 (ns)", "P50 (ns)", "Max (ns)"))
+    print("-" * 99)
+    for name in CHECKS:
+        s = stats[name]
+        if not s['n']:
+            print("{:<10} | {:>9} |".format(name, 0))
+            continue
+        print("{:<10} | {:>9} | {:>12.1f} | {:>12.1f} | {:>12.1f} | {:>12.1f} | {:>12.1f}".format(
+            name, s['n'], s['min'], s['p1'], s['p5'], s['p50'], s['max']))
+    for v in violations[:max_listed]:
+        print("  VIOLATION {:<9} @ {:>14.1f} ns: {:>10.1f} ns (limit {} ns, {})".format(
+            v.check, v.time_ns, v.measured_ns, v.limit_ns, v.speed))
+    if len(violations) > max_listed:
+        print("  ... {} more".format(len(violations) - max_listed))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Check I2C bus timing in VCD dumps against UM10204")
+    p.add_argument('vcds', nargs='+')
+    p.add_argument('--speed', choices=['auto'] + sorted(SPEEDS), default='auto')
+    p.add_argument('--scl', default=i2c_decode.DEFAULT_SCL)
+    p.add_argument('--sda', default=i2c_decode.DEFAULT_SDA)
+    p.add_argument('-j', '--jobs', type=int, default=None, help="checker processes for many files")
+    p.add_argument('--csv', default=None, help="write every violation to this CSV")
+    args = p.parse_args(argv)
+
+    jobs = [(v, args.speed, args.scl, args.sda) for v in args.vcds]
+    if len(jobs) > 1 and args.jobs != 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_check_job, jobs))
+    else:
+        results = [_check_job(j) for j in jobs]
+
+    total = 0
+    for path, violations, stats in results:
+        print_report(path, violations, stats)
+        total += len(violations)
+    if args.csv:
+        with open(args.csv, 'w') as f:
+            f.write("File,Check,Time_ns,Measured_ns,Limit_ns,Speed\n")
+            for path, violations, _ in results:
+                for v in violations:
+                    f.write("{},{},{:.3f},{:.3f},{},{}\n".format(path, *v))
+    print("=" * 99)
+    print("{} file(s), {} violation(s)".format(len(results), total))
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
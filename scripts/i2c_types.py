@@ -0,0 +1,53 @@
+"""Python mirror of src/common/i2c_types.sv (enum values must stay in sync)."""
+
+# i2c_direction_e
+I2C_WRITE = 0
+I2C_READ = 1
+
+# i2c_speed_e
+I2C_STANDARD_MODE = 0   # 100 kbit/s
+I2C_FAST_MODE = 1       # 400 kbit/s
+I2C_FAST_MODE_PLUS = 2  # 1 Mbit/s
+
+# i2c_addr_mode_e
+I2C_ADDR_7BIT = 0
+I2C_ADDR_10BIT = 1
+
+# i2c_status_e
+I2C_STATUS_OK = 0
+I2C_STATUS_ADDR_NACK = 1
+I2C_STATUS_DATA_NACK = 2
+I2C_STATUS_TIMEOUT = 3
+I2C_STATUS_ARB_LOST = 4
+I2C_STATUS_ERROR = 5
+
+DIRECTION_NAMES = {I2C_WRITE: 'I2C_WRITE', I2C_READ: 'I2C_READ'}
+SPEED_NAMES = {I2C_STANDARD_MODE: 'I2C_STANDARD_MODE', I2C_FAST_MODE: 'I2C_FAST_MODE',
+               I2C_FAST_MODE_PLUS: 'I2C_FAST_MODE_PLUS'}
+STATUS_NAMES = {I2C_STATUS_OK: 'I2C_STATUS_OK', I2C_STATUS_ADDR_NACK: 'I2C_STATUS_ADDR_NACK',
+                I2C_STATUS_DATA_NACK: 'I2C_STATUS_DATA_NACK', I2C_STATUS_TIMEOUT: 'I2C_STATUS_TIMEOUT',
+                I2C_STATUS_ARB_LOST: 'I2C_STATUS_ARB_LOST', I2C_STATUS_ERROR: 'I2C_STATUS_ERROR'}
+
+
+def convert2string(tr):
+    """Same layout as i2c_transaction::convert2string() for a transaction dict."""
+    data = tr['data']
+    s = "\n--------------------------------------------------\n"
+    s += " I2C TRANSACTION\n"
+    s += " Address      : 0x{:x} ({})\n".format(
+        tr['addr'], '7-bit' if tr.get('addr_mode', I2C_ADDR_7BIT) == I2C_ADDR_7BIT else '10-bit')
+    s += " Direction    : {}\n".format(DIRECTION_NAMES[tr['direction']])
+    s += " Payload Size : {} bytes\n".format(len(data))
+    if len(data):
+        s += " Data Content :\n"
+        for i, b in enumerate(data):
+            if i % 16 == 0:
+                s += "    [{:04x}] ".format(i)
+            s += "{:02x} ".format(b)
+            if (i + 1) % 16 == 0:
+                s += "\n"
+        if len(data) % 16 != 0:
+            s += "\n"
+    s += " Status       : {}\n".format(STATUS_NAMES[tr['status']])
+    s += "--------------------------------------------------"
+    return s
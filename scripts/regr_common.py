@@ -0,0 +1,226 @@
+"""Shared helpers for the Python regression tooling.
+
+Mirrors the conventions of the `regr_paper` target in sim/Makefile: the
+TEST_LIST / COV_OPTS variables, the `run_<test>_<i>.log` naming, the
+regression_raw.csv schema and the awk summary table.
+"""
+import csv
+import os
+import re
+
+# Repository layout (scripts/ sits next to sim/, src/, rtl/, img/)
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIM_DIR = os.path.join(PROJ_ROOT, 'sim')
+MAKEFILE = os.path.join(SIM_DIR, 'Makefile')
+
+# regression_raw.csv schema (must stay identical to regr_paper)
+CSV_HEADER = ['Test_Name', 'Iteration', 'Seed', 'Status', 'CPU_Time_s']
+
+LOG_NAME_RE = re.compile(r'^run_(?P<test>.+)_(?P<iteration>\d+)\.log$')
+# "NOTE: automatic random seed used: 12345" (VCS); the seed is the trailing integer
+SEED_RE = re.compile(r'random seed\b.*?(\d+)\s*$', re.M)
+
+RULE = '=' * 99
+SUB_RULE = '-' * 99
+
+
+def read_make_var(name, makefile=MAKEFILE):
+    """Returns the value of a simple `NAME = value` Makefile variable."""
+    with open(makefile) as f:
+        lines = f.read().split('\n')
+    value = None
+    i = 0
+    while i < len(lines):
+        m = re.match(r'^{}\s*[:?]?=\s*(.*)$'.format(re.escape(name)), lines[i])
+        if m:
+            parts = [m.group(1)]
+            # Follow backslash continuations
+            while parts[-1].rstrip().endswith('\\') and i + 1 < len(lines):
+                parts[-1] = parts[-1].rstrip()[:-1]
+                i += 1
+                parts.append(lines[i])
+            value = ' '.join(p.strip() for p in parts).strip()
+        i += 1
+    if value is None:
+        raise KeyError("Variable {} not found in {}".format(name, makefile))
+    return value
+
+
+def expand_make_var(name, makefile=MAKEFILE, env=None):
+    """read_make_var with $(NAME) references expanded (Makefile first, then the environment)."""
+    env = os.environ if env is None else env
+
+    def ref(m):
+        try:
+            return expand_make_var(m.group(1), makefile, env)
+        except KeyError:
+            return env.get(m.group(1), '')
+    return re.sub(r'\$\((\w+)\)', ref, read_make_var(name, makefile))
+
+
+def test_list(makefile=MAKEFILE):
+    """Returns TEST_LIST from the Makefile (single source of truth)."""
+    return read_make_var('TEST_LIST', makefile).split()
+
+
+def cov_opts(cm_dir, makefile=MAKEFILE):
+    """Returns COV_OPTS as an argv list with -cm_dir pointed at `cm_dir`."""
+    opts = read_make_var('COV_OPTS', makefile).split()
+    if '-cm_dir' in opts:
+        opts[opts.index('-cm_dir') + 1] = cm_dir
+    return opts
+
+
+def log_name(test, iteration):
+    """Log file name used by regr_paper for one run."""
+    return 'run_{}_{}.log'.format(test, iteration)
+
+
+def cm_name(test, iteration):
+    """Coverage test name used by regr_paper for one run."""
+    return '{}_{}'.format(test, iteration)
+
+
+def parse_log_name(path):
+    """Returns (test, iteration) from a `run_<test>_<i>.log` path, or None."""
+    m = LOG_NAME_RE.match(os.path.basename(path))
+    if not m:
+        return None
+    return m.group('test'), int(m.group('iteration'))
+
+
+def parse_seed(text):
+    """Seed of the first `random seed` line, or '' (runs with +ntb_random_seed=N print none)."""
+    m = SEED_RE.search(text)
+    return m.group(1) if m else ''
+
+
+def is_seed(text):
+    """True for a value +ntb_random_seed accepts (a non-negative integer)."""
+    return str(text).strip().isdigit()
+
+
+def parse_cpu_time(text):
+    """Equivalent of `grep "CPU Time" | tail -1 | awk '{print $3}'`."""
+    cpu = ''
+    for line in text.splitlines():
+        if 'CPU Time' in line:
+            fields = line.split()
+            cpu = fields[2] if len(fields) > 2 else ''
+    return cpu if cpu else '0.00'
+
+
+# Report-phase tables printed by i2c_scoreboard / i2c_env, and test status
+# printed by i2c_test_base
+STAT_RES = [
+    ('received', re.compile(r'Received:\s+(\d+)'), int),
+    ('compared', re.compile(r'Compared:\s+(\d+)'), int),
+    ('matched', re.compile(r'Matched:\s+(\d+)'), int),
+    ('mismatched', re.compile(r'Mismatched:\s+(\d+)'), int),
+    ('duration_ms', re.compile(r'Duration:\s+([-\d.]+)\s*ms'), float),
+    ('transactions', re.compile(r'Transactions:\s+(\d+)'), int),
+]
+SEVERITY_COUNT_RE = re.compile(r'^(UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)', re.M)
+ABORT_MARKER = 'REGR_MONITOR: EARLY_ABORT'
+
+
+def run_status(returncode, text):
+    """regr_paper's pass/fail rule: the simv exit status, EARLY_ABORT if regr_monitor stopped the run."""
+    if ABORT_MARKER in text:
+        return 'EARLY_ABORT'
+    return 'PASS' if returncode == 0 else 'FAIL'
+
+
+def parse_run_log(text, returncode=None):
+    """Extracts seed, status, CPU time and the scoreboard/env summary numbers from a run log.
+
+    Status follows run_status when the simv exit status is known; for a bare
+    log it falls back to the test's "TEST STATUS: PASSED" line.
+    """
+    stats = {
+        'seed': parse_seed(text),
+        'cpu_s': float(parse_cpu_time(text)),
+        'uvm_errors': 0,
+        'uvm_fatals': 0,
+    }
+    for key, regex, conv in STAT_RES:
+        found = regex.findall(text)
+        stats[key] = conv(found[-1]) if found else None
+    for sev, n in SEVERITY_COUNT_RE.findall(text):
+        stats['uvm_errors' if sev == 'UVM_ERROR' else 'uvm_fatals'] = int(n)
+
+    if returncode is not None:
+        stats['status'] = run_status(returncode, text)
+    elif ABORT_MARKER in text:
+        stats['status'] = 'EARLY_ABORT'
+    elif 'TEST STATUS: PASSED' in text:
+        stats['status'] = 'PASS'
+    else:
+        stats['status'] = 'FAIL'
+    return stats
+
+
+def read_log(path):
+    """Reads a simulator log, tolerating missing files and bad bytes."""
+    try:
+        with open(path, errors='replace') as f:
+            return f.read()
+    except (IOError, OSError):
+        return ''
+
+
+def write_csv(path, rows):
+    """Writes rows (dicts keyed by CSV_HEADER) as regression_raw.csv."""
+    with open(path, 'w') as f:
+        f.write(','.join(CSV_HEADER) + '\n')
+        for r in rows:
+            f.write(','.join(str(r[k]) for k in CSV_HEADER) + '\n')
+
+
+def read_csv(path):
+    """Reads a regression_raw.csv into a list of dicts."""
+    with open(path) as f:
+        return list(csv.DictReader(f))
+
+
+def print_summary(rows, iterations=None, status='COMPLETE',
+                  randomization='Automatic Seeds (+ntb_random_seed_automatic)'):
+    """Prints the regr_paper summary table for regression_raw.csv rows."""
+    tests = []
+    count, passed, failed, cpu = {}, {}, {}, {}
+    for r in rows:
+        t = r['Test_Name']
+        if t not in count:
+            tests.append(t)
+            count[t] = passed[t] = failed[t] = 0
+            cpu[t] = 0.0
+        count[t] += 1
+        if r['Status'] == 'PASS':
+            passed[t] += 1
+        else:
+            failed[t] += 1
+        cpu[t] += float(r['CPU_Time_s'] or 0)
+
+    if iterations is None:
+        iterations = max(count.values()) if count else 0
+    total_runs = sum(count.values())
+    row_fmt = "{:<25} | {:<10} | {:<10} | {:<10} | {:<15} | {:<15}"
+
+    print("")
+    print(RULE)
+    print("                                  VERIFICATION REGRESSION SUMMARY                                  ")
+    print(RULE)
+    print(" Simulator:     VCS (Synopsys)")
+    print(" Target:        {} Scenarios x {} Iterations = {} Runs".format(len(tests), iterations, total_runs))
+    print(" Randomization: {}".format(randomization))
+    print(" Status:        {}".format(status))
+    print(SUB_RULE)
+    print(row_fmt.format("Test Scenario", "Runs", "Pass", "Fail", "Avg CPU (s)", "Cum CPU (s)"))
+    print(SUB_RULE)
+    for t in tests:
+        print(row_fmt.format(t, count[t], passed[t], failed[t],
+                             "{:.2f}".format(cpu[t] / count[t]), "{:.2f}".format(cpu[t])))
+    print(SUB_RULE)
+    print(row_fmt.format("TOTALS", total_runs, sum(passed.values()), sum(failed.values()),
+                         "-", "{:.2f}".format(sum(cpu.values()))))
+    print(RULE)
@@ -0,0 +1,218 @@
+"""Incremental SQLite index of regression run logs.
+
+Each `run_<test>_<i>.log` is parsed once (seed, status, CPU time and the
+SCOREBOARD STATISTICS / ENVIRONMENT SUMMARY numbers) and stored in an
+indexed SQLite database. Status is the one regression_raw.csv recorded from
+the simv exit status (the CSV next to the log, or in sim/ for
+sim/regr_runs/<test>_<i>/ logs); logs without a CSV row fall back to their
+"TEST STATUS" line. Logs whose mtime and size are unchanged since the
+last ingest are skipped, so nightly ingests only touch new runs and the
+summary / trend / flaky-seed queries never re-read a log.
+
+Usage:
+    python3 regr_index.py ingest sim/ /nfs/nightly/2026-*/
+    python3 regr_index.py summary
+    python3 regr_index.py trend i2c_random_test
+    python3 regr_index.py flaky
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import regr_common as rc
+
+DEFAULT_DB = os.path.join(rc.SIM_DIR, 'regr_index.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    path         TEXT PRIMARY KEY,
+    mtime_ns     INTEGER NOT NULL,
+    size         INTEGER NOT NULL,
+    test         TEXT NOT NULL,
+    iteration    INTEGER,
+    seed         TEXT,
+    status       TEXT NOT NULL,
+    cpu_s        REAL,
+    received     INTEGER,
+    compared     INTEGER,
+    matched      INTEGER,
+    mismatched   INTEGER,
+    duration_ms  REAL,
+    transactions INTEGER,
+    uvm_errors   INTEGER,
+    uvm_fatals   INTEGER,
+    ingested_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_test ON runs(test, mtime_ns);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs(test, seed, status);
+CREATE INDEX IF NOT EXISTS runs_status ON runs(status);
+"""
+
+COLUMNS = ['path', 'mtime_ns', 'size', 'test', 'iteration', 'seed', 'status', 'cpu_s',
+           'received', 'compared', 'matched', 'mismatched', 'duration_ms', 'transactions',
+           'uvm_errors', 'uvm_fatals', 'ingested_at']
+
+
+def connect(db_path):
+    """Opens (and creates if needed) the index database."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def find_logs(roots):
+    """Yields (path, mtime_ns, size) for every run_<test>_<i>.log under roots."""
+    for root in roots:
+        if os.path.isfile(root):
+            candidates = [root]
+        else:
+            candidates = (os.path.join(d, f) for d, _, files in os.walk(root) for f in files)
+        for path in candidates:
+            if rc.parse_log_name(path):
+                st = os.stat(path)
+                yield os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def recorded_status(path, cache):
+    """Status regression_raw.csv recorded for a log's run, or None.
+
+    Looks next to the log (regr_paper) and two levels up (regr_parallel's
+    sim/regr_runs/<test>_<i>/); cache maps CSV paths to their rows.
+    """
+    log_dir = os.path.dirname(path)
+    key = rc.parse_log_name(path)
+    for csv_dir in (log_dir, os.path.dirname(os.path.dirname(log_dir))):
+        csv_path = os.path.join(csv_dir, 'regression_raw.csv')
+        if csv_path not in cache:
+            try:
+                cache[csv_path] = dict(((r['Test_Name'], int(r['Iteration'])), r['Status'])
+                                       for r in rc.read_csv(csv_path))
+            except (IOError, OSError, KeyError, ValueError):
+                cache[csv_path] = {}
+        if key in cache[csv_path]:
+            return cache[csv_path][key]
+    return None
+
+
+def parse_one(entry):
+    """Parses one log into a runs-table row (runs in a worker process)."""
+    path, mtime_ns, size, status = entry
+    test, iteration = rc.parse_log_name(path)
+    row = rc.parse_run_log(rc.read_log(path))
+    if status:
+        row['status'] = status
+    row.update(path=path, mtime_ns=mtime_ns, size=size, test=test, iteration=iteration,
+               ingested_at=time.time())
+    return tuple(row[c] for c in COLUMNS)
+
+
+def ingest(conn, roots, jobs=None):
+    """Parses new/changed logs under roots; returns (ingested, skipped)."""
+    known = dict(((p, (m, s, st)) for p, m, s, st in conn.execute('SELECT path, mtime_ns, size, status FROM runs')))
+    todo = []
+    skipped = 0
+    csv_cache = {}
+    for path, mtime_ns, size in find_logs(roots):
+        status = recorded_status(path, csv_cache)
+        old = known.get(path)
+        # A CSV written after the last ingest still updates the status
+        if old and old[:2] == (mtime_ns, size) and status in (None, old[2]):
+            skipped += 1
+        else:
+            todo.append((path, mtime_ns, size, status))
+
+    if len(todo) > 1 and (jobs or 0) != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(parse_one, todo, chunksize=64))
+    else:
+        rows = [parse_one(e) for e in todo]
+
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO runs ({}) VALUES ({})'.format(
+            ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))), rows)
+    return len(rows), skipped
+
+
+def summary(conn, test=None):
+    """Prints the regr_paper summary table from the index."""
+    query = 'SELECT test, status, cpu_s FROM runs'
+    params = ()
+    if test:
+        query += ' WHERE test = ?'
+        params = (test,)
+    rows = [{'Test_Name': t, 'Status': s, 'CPU_Time_s': c or 0}
+            for t, s, c in conn.execute(query + ' ORDER BY test', params)]
+    rc.print_summary(rows, status='INDEXED ({} runs)'.format(len(rows)))
+
+
+def trend(conn, test):
+    """Prints per-day pass rate, CPU time and throughput for one test."""
+    print("{:<12} | {:>6} | {:>6} | {:>11} | {:>13} | {:>12}".format(
+        "Date", "Runs", "Pass", "Avg CPU (s)", "Avg Dur (ms)", "Avg Trans"))
+    print(rc.SUB_RULE[:78])
+    for row in conn.execute(
+            "SELECT date(mtime_ns / 1e9, 'unixepoch') AS day, COUNT(*),"
+            " SUM(status = 'PASS'), AVG(cpu_s), AVG(duration_ms), AVG(transactions)"
+            " FROM runs WHERE test = ? GROUP BY day ORDER BY day", (test,)):
+        print("{:<12} | {:>6} | {:>6} | {:>11.2f} | {:>13.3f} | {:>12.1f}".format(
+            *[v if v is not None else 0 for v in row]))
+
+
+def flaky(conn):
+    """Prints (test, seed) pairs whose reruns disagree, and tests with mixed outcomes."""
+    print("Seeds with mixed outcomes:")
+    print("{:<25} | {:<20} | {:>6} | {:>6}".format("Test Scenario", "Seed", "Pass", "Fail"))
+    print(rc.SUB_RULE[:66])
+    for row in conn.execute(
+            "SELECT test, seed, SUM(status = 'PASS') AS p, SUM(status != 'PASS') AS f"
+            " FROM runs WHERE seed != '' GROUP BY test, seed HAVING p > 0 AND f > 0"
+            " ORDER BY f DESC, test"):
+        print("{:<25} | {:<20} | {:>6} | {:>6}".format(*row))
+    print("")
+    print("Tests with mixed outcomes:")
+    print("{:<25} | {:>6} | {:>6} | {:<20}".format("Test Scenario", "Runs", "Fail", "Smallest failing seed"))
+    print(rc.SUB_RULE[:66])
+    for row in conn.execute(
+            "SELECT test, COUNT(*) AS n, SUM(status != 'PASS') AS f,"
+            " (SELECT seed FROM runs r2 WHERE r2.test = runs.test AND r2.status != 'PASS'"
+            "  ORDER BY CAST(seed AS INTEGER) LIMIT 1)"
+            " FROM runs GROUP BY test HAVING f > 0 AND f < n ORDER BY f DESC"):
+        print("{:<25} | {:>6} | {:>6} | {:<20}".format(*row))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="SQLite index of regression run logs")
+    p.add_argument('--db', default=DEFAULT_DB, help="database file (default: sim/regr_index.db)")
+    sub = p.add_subparsers(dest='cmd')
+    p_ing = sub.add_parser('ingest', help="parse new/changed run_<test>_<i>.log files")
+    p_ing.add_argument('roots', nargs='+', help="directories or log files")
+    p_ing.add_argument('-j', '--jobs', type=int, default=None, help="parser processes")
+    p_sum = sub.add_parser('summary', help="regr_paper summary table")
+    p_sum.add_argument('test', nargs='?', default=None)
+    p_tr = sub.add_parser('trend', help="per-day trend for one test")
+    p_tr.add_argument('test')
+    sub.add_parser('flaky', help="seeds and tests with mixed outcomes")
+    args = p.parse_args(argv)
+    if not args.cmd:
+        p.error("a command is required")
+
+    conn = connect(args.db)
+    if args.cmd == 'ingest':
+        start = time.time()
+        n, skipped = ingest(conn, args.roots, args.jobs)
+        print("Ingested {} log(s), skipped {} unchanged in {:.2f} s".format(n, skipped, time.time() - start))
+    elif args.cmd == 'summary':
+        summary(conn, args.test)
+    elif args.cmd == 'trend':
+        trend(conn, args.test)
+    elif args.cmd == 'flaky':
+        flaky(conn)
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
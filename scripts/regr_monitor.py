@@ -0,0 +1,184 @@
+"""Streaming fail-fast monitor for simv runs.
+
+Tails a run's `-l` log while simv is still writing it and stops the process
+as soon as it is doomed: once a configurable number of UVM_ERROR/UVM_FATAL
+reports has been seen (e.g. the scoreboard's "Data[...] mismatch" errors)
+or once a wall-clock budget is exceeded. Such runs get the EARLY_ABORT
+status and a marker line is appended to their log.
+
+A caller that may have to give up on a run (regr_queue, when another worker
+has requeued the job) passes a threading.Event as `stop`: simv then runs in
+its own process group, which is killed as soon as the event is set.
+
+Usage (standalone, wraps one simv command):
+    python3 regr_monitor.py --max-errors 1 --budget 3600 -l run.log -- \\
+        ./simv +UVM_TESTNAME=i2c_random_test -l run.log
+"""
+import argparse
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import sys
+
+import regr_common as rc
+
+# Matches reports, not the report-server summary ("UVM_ERROR :    3")
+ERROR_RE = re.compile(r'^(UVM_ERROR|UVM_FATAL)(?!\s*:)')
+
+POLL_S = 0.2
+KILL_GRACE_S = 5.0
+
+
+async def _tail_errors(log_path, proc, max_errors, poll_s):
+    """Follows log_path until the process exits; returns a reason once max_errors is reached.
+
+    A log that is truncated or replaced while being followed is read again
+    from the start, and the errors counted so far are forgotten.
+    """
+    count = 0
+    f = None
+    partial = b''
+    try:
+        while True:
+            if f is None:
+                if os.path.exists(log_path):
+                    f = open(log_path, 'rb')
+                elif proc.returncode is not None:
+                    return None
+            chunk = f.read() if f is not None else b''
+            if chunk:
+                lines = (partial + chunk).split(b'\n')
+                partial = lines.pop()
+                for line in lines:
+                    line = line.decode(errors='replace')
+                    if ERROR_RE.match(line):
+                        count += 1
+                        if max_errors is not None and count >= max_errors:
+                            return "{} UVM_ERROR/UVM_FATAL reports (limit {}): {}".format(
+                                count, max_errors, line.strip())
+            elif proc.returncode is not None:
+                return None
+            else:
+                if f is not None and _rewritten(f, log_path):
+                    f.close()
+                    f = None
+                    partial = b''
+                    count = 0
+                    continue
+                await asyncio.sleep(poll_s)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _rewritten(f, log_path):
+    """True if log_path was truncated below f's offset or replaced by another file."""
+    try:
+        st = os.stat(log_path)
+    except OSError:
+        return False
+    return st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell()
+
+
+async def _wait_event(event, poll_s):
+    """Returns a reason once the threading.Event is set by another thread."""
+    while not event.is_set():
+        await asyncio.sleep(poll_s)
+    return "stopped by the caller"
+
+
+def _signal(proc, sig, group):
+    try:
+        if group:
+            os.killpg(proc.pid, sig)
+        else:
+            proc.send_signal(sig)
+    except ProcessLookupError:
+        pass  # already gone
+
+
+async def _stop(proc, group=False):
+    """Terminates the process (or its whole process group), escalating to SIGKILL after a grace period."""
+    if proc.returncode is not None:
+        return
+    _signal(proc, signal.SIGTERM, group)
+    try:
+        await asyncio.wait_for(proc.wait(), KILL_GRACE_S)
+    except asyncio.TimeoutError:
+        _signal(proc, signal.SIGKILL, group)
+        await proc.wait()
+
+
+async def monitor_run(cmd, log_path, cwd=None, stdout=None, max_errors=None, budget_s=None,
+                      poll_s=POLL_S, stop=None):
+    """Runs cmd while tailing log_path; returns (returncode, status, abort_reason).
+
+    With `stop` (a threading.Event) cmd gets its own process group; setting the
+    event kills the group and returns EARLY_ABORT without marking the log,
+    whose run the caller discards.
+    """
+    group = stop is not None
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, stdout=stdout, stderr=subprocess.STDOUT if stdout else None,
+        start_new_session=group)
+    waiter = asyncio.ensure_future(proc.wait())
+    tailer = asyncio.ensure_future(_tail_errors(log_path, proc, max_errors, poll_s))
+    watched = [waiter, tailer]
+    stopper = None
+    if group:
+        stopper = asyncio.ensure_future(_wait_event(stop, poll_s))
+        watched.append(stopper)
+
+    done, _ = await asyncio.wait(watched, timeout=budget_s,
+                                 return_when=asyncio.FIRST_COMPLETED)
+    reason = None
+    if stopper in done:
+        reason = stopper.result()
+    elif tailer in done:
+        reason = tailer.result()
+    elif not done:
+        reason = "wall-clock budget of {:.0f} s exceeded".format(budget_s)
+
+    for fut in (tailer, stopper):
+        if fut is not None:
+            fut.cancel()
+    if reason is None:
+        await waiter
+        status = 'PASS' if proc.returncode == 0 else 'FAIL'
+    else:
+        await _stop(proc, group)
+        status = 'EARLY_ABORT'
+        if stopper not in done:
+            with open(log_path, 'a') as f:
+                f.write("\n{} ({})\n".format(rc.ABORT_MARKER, reason))
+    return proc.returncode, status, reason
+
+
+def run_monitored(cmd, log_path, **kwargs):
+    """Synchronous wrapper around monitor_run (one event loop per call/thread)."""
+    return asyncio.run(monitor_run(cmd, log_path, **kwargs))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run simv and abort it early when it is doomed")
+    p.add_argument('-l', '--log', required=True, help="log file written by the command (-l)")
+    p.add_argument('--max-errors', type=int, default=None,
+                   help="abort after this many UVM_ERROR/UVM_FATAL reports")
+    p.add_argument('--budget', type=float, default=None, help="wall-clock budget in seconds")
+    p.add_argument('cmd', nargs=argparse.REMAINDER, help="command to run (after --)")
+    args = p.parse_args(argv)
+    cmd = args.cmd[1:] if args.cmd[:1] == ['--'] else args.cmd
+    if not cmd:
+        p.error("no command given")
+
+    ret, status, reason = run_monitored(cmd, args.log, max_errors=args.max_errors,
+                                        budget_s=args.budget)
+    print("{}: {}{}".format(os.path.basename(args.log), status,
+                            " ({})".format(reason) if reason else ""))
+    return 0 if status == 'PASS' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""Parallel replacement for the serial `regr_paper` loop in sim/Makefile.
+
+Runs TEST_LIST x iterations with N concurrent simv processes. Every run gets
+its own working directory under sim/regr_runs/ and its own -cm_name, so logs
+and per-test coverage never clobber each other; all runs still merge into
+the shared coverage.vdb. Produces the same regression_raw.csv and summary
+table as `make regr_paper`.
+
+When earlier regression_raw.csv files are available (--history, or the CSV
+left by the previous run), runs are started longest-first using
+regr_schedule so the long tests do not straggle at the end. Each log is
+tailed by regr_monitor while simv runs; with --max-errors / --budget doomed
+runs are stopped early and recorded as EARLY_ABORT.
+
+With --seeds the job list comes from a (Test_Name, Seed) CSV instead, e.g.
+the coverage-ranked list written by cov_rank.py, and every run is started
+with +ntb_random_seed=<seed> so that exact stimulus is replayed.
+
+With --stop-at-closure a per-run URG text report (--cov-report) is made as
+each run finishes and ingested into the incremental coverage merge
+(cov_merge); once the merged functional coverage reaches --cov-target, the
+runs not started yet are dropped and only those already running finish.
+--cov-per-run makes the same per-run reports without the merge, as input
+for cov_rank.py.
+
+Usage (from sim/ after `make comp`):
+    python3 ../scripts/regr_parallel.py -j 32
+    python3 ../scripts/regr_parallel.py -j 32 --seeds nightly_seeds.csv
+    python3 ../scripts/regr_parallel.py -j 32 --stop-at-closure
+    python3 ../scripts/regr_parallel.py -j 32 --cov-per-run
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cov_bins
+import cov_merge
+import regr_common as rc
+import regr_monitor
+import regr_schedule
+
+# Per-run functional-coverage text report; {cm_dir}, {cm_name}, {tests_file}
+# (a file naming the run's -cm_name) and {report_dir} are substituted
+DEFAULT_COV_REPORT = 'urg -dir {cm_dir} -tests {tests_file} -format text -report {report_dir}'
+
+
+def build_jobs(tests, iterations):
+    """Returns (test, iteration) pairs in regr_paper order."""
+    return [(t, i) for i in range(1, iterations + 1) for t in tests]
+
+
+def load_seed_list(path):
+    """Returns (jobs, {job: seed}) from a CSV with Test_Name and Seed columns.
+
+    Iterations are numbered per test in file order, so log and -cm_name
+    naming stays that of regr_paper. Raises ValueError on a non-numeric seed.
+    """
+    jobs, seeds, count = [], {}, {}
+    for n, r in enumerate(rc.read_csv(path), 2):
+        test = r['Test_Name']
+        if not rc.is_seed(r['Seed']):
+            raise ValueError("{}:{}: seed {!r} of {} is not an integer".format(path, n, r['Seed'], test))
+        count[test] = count.get(test, 0) + 1
+        job = (test, count[test])
+        jobs.append(job)
+        seeds[job] = r['Seed'].strip()
+    return jobs, seeds
+
+
+def run_one(job, args):
+    """Runs one simv invocation in its private directory and scrapes its log."""
+    test, i = job
+    run_dir = os.path.join(args.out_dir, rc.cm_name(test, i))
+    if not os.path.isdir(run_dir):
+        os.makedirs(run_dir)
+    log_path = os.path.join(run_dir, rc.log_name(test, i))
+
+    cmd = args.launcher + [args.simv] + rc.cov_opts(args.cm_dir) + [
+        '+UVM_TESTNAME=' + test,
+        '+ntb_random_seed=' + args.seeds[job] if args.seeds.get(job) else '+ntb_random_seed_automatic',
+        '-l', log_path, '-cm_name', rc.cm_name(test, i)]
+
+    # A reused run directory still holds the previous log; regr_monitor must not count its errors
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    start = time.time()
+    with open(os.path.join(run_dir, 'simv.out'), 'w') as out:
+        _, status, reason = regr_monitor.run_monitored(
+            cmd, log_path, cwd=run_dir, stdout=out,
+            max_errors=args.max_errors, budget_s=args.budget, stop=args.stop)
+    text = rc.read_log(log_path)
+    return {
+        'Test_Name': test,
+        'Iteration': i,
+        'Seed': rc.parse_seed(text) or args.seeds.get(job, ''),
+        'Status': status,
+        'CPU_Time_s': rc.parse_cpu_time(text),
+        'wall_s': time.time() - start,
+        'run_dir': run_dir,
+        'abort_reason': reason,
+        'cov_report': coverage_report(test, i, run_dir, args) if args.stop_at_closure or args.cov_per_run else None,
+    }
+
+
+def coverage_report(test, i, run_dir, args):
+    """Runs --cov-report for one finished run; returns its grpinfo.txt path or None."""
+    report_dir = os.path.join(run_dir, 'urg')
+    tests_file = os.path.join(run_dir, 'urg.tests')
+    with open(tests_file, 'w') as f:
+        f.write(rc.cm_name(test, i) + '\n')
+    cmd = args.cov_report.format(cm_dir=args.cm_dir, cm_name=rc.cm_name(test, i),
+                                 tests_file=tests_file, report_dir=report_dir)
+    with open(os.path.join(run_dir, 'urg.out'), 'w') as out:
+        subprocess.call(shlex.split(cmd), cwd=run_dir, stdout=out, stderr=subprocess.STDOUT)
+    path = os.path.join(report_dir, cov_bins.REPORT_FILE)
+    return path if os.path.isfile(path) else None
+
+
+def run_regression(jobs, args, cov_conn=None):
+    """Runs all jobs on a pool of args.jobs workers; returns results keyed by job.
+
+    With cov_conn, every finished run's coverage is merged and the jobs not
+    started yet are cancelled once closure is reached.
+    """
+    results = {}
+    # Each worker only waits on its simv child, so a thread per slot is
+    # enough to keep N simulator processes busy. Jobs start in list order.
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = dict((pool.submit(run_one, job, args), job) for job in jobs)
+        n = 0
+        for fut in as_completed(futures):
+            if fut.cancelled():
+                continue
+            n += 1
+            res = fut.result()
+            results[futures[fut]] = res
+            cov = ''
+            if cov_conn is not None:
+                if res['cov_report'] and res['Seed']:
+                    cov_merge.ingest_report(cov_conn, res['cov_report'], res['Test_Name'], res['Seed'],
+                                            res['Iteration'])
+                covered, total, _ = cov_merge.status(cov_conn)
+                cov = " COV {:>6.2f}%".format(100.0 * covered / total if total else 0.0)
+            print("[{:>4}/{}] {:<25} iter {:<3} {:<11} CPU {:>8}s{}".format(
+                n, len(jobs), res['Test_Name'], res['Iteration'], res['Status'], res['CPU_Time_s'], cov))
+            sys.stdout.flush()
+            if cov_conn is not None and not args.closed and cov_merge.closed(cov_conn, args.cov_target):
+                args.closed = True
+                dropped = sum(f.cancel() for f in futures)
+                print("Coverage closure ({:.2f}%) reached: {} run(s) not launched".format(args.cov_target, dropped))
+    return results
+
+
+def merge_outputs(jobs, results, args):
+    """Writes regression_raw.csv and regr_paper.log in regr_paper order.
+
+    A run's simv output is read from its 'out' path if it has one (regr_queue
+    copies it into the queue), else from <run_dir>/simv.out.
+    """
+    rows = [results[j] for j in jobs if j in results]
+    rc.write_csv(args.csv, rows)
+    with open(args.log, 'w') as combined:
+        for r in rows:
+            path = r.get('out') or os.path.join(r['run_dir'], 'simv.out')
+            try:
+                with open(path, errors='replace') as f:
+                    combined.write(f.read())
+            except (IOError, OSError):
+                print("regr_parallel: warning: no simv output for {} ({})".format(
+                    rc.cm_name(r['Test_Name'], r['Iteration']), path), file=sys.stderr)
+    return rows
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Parallel paper regression (regr_paper replacement)")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                   help="number of concurrent simv processes (default: all cores)")
+    p.add_argument('-n', '--iterations', type=int, default=15,
+                   help="iterations per test (default: 15)")
+    p.add_argument('-t', '--tests', nargs='+', default=None,
+                   help="subset of tests (default: TEST_LIST from the Makefile)")
+    p.add_argument('--sim-dir', default=rc.SIM_DIR,
+                   help="directory holding simv and coverage.vdb (default: sim/)")
+    p.add_argument('--simv', default=None, help="simulator executable (default: <sim-dir>/simv)")
+    p.add_argument('--out-dir', default=None, help="per-run directories (default: <sim-dir>/regr_runs)")
+    p.add_argument('--csv', default=None, help="results CSV (default: <sim-dir>/regression_raw.csv)")
+    p.add_argument('--history', nargs='+', default=None,
+                   help="earlier regression_raw.csv files used to order runs longest-first "
+                        "(default: the existing --csv, if any)")
+    p.add_argument('--seeds', dest='seed_list', default=None,
+                   help="replay the (Test_Name, Seed) runs of this CSV with fixed seeds "
+                        "instead of tests x iterations")
+    p.add_argument('--stop-at-closure', action='store_true',
+                   help="merge each run's functional coverage and stop launching runs at closure")
+    p.add_argument('--cov-per-run', action='store_true',
+                   help="write each run's URG text report (<run>/urg/grpinfo.txt) for cov_rank.py")
+    p.add_argument('--cov-target', type=float, default=100.0,
+                   help="closure threshold in percent of the known bins (default: 100)")
+    p.add_argument('--cov-report', default=DEFAULT_COV_REPORT,
+                   help="per-run URG text report command (default: %(default)s)")
+    p.add_argument('--cov-db', default=None,
+                   help="incremental coverage database (default: <sim-dir>/regr_index.db)")
+    p.add_argument('--no-schedule', action='store_true',
+                   help="keep the Makefile run order")
+    p.add_argument('--max-errors', type=int, default=None,
+                   help="stop a run after this many UVM_ERROR/UVM_FATAL reports (EARLY_ABORT)")
+    p.add_argument('--budget', type=float, default=None,
+                   help="per-run wall-clock budget in seconds (EARLY_ABORT when exceeded)")
+    args = p.parse_args(argv)
+
+    args.sim_dir = os.path.abspath(args.sim_dir)
+    args.simv = os.path.abspath(args.simv or os.path.join(args.sim_dir, 'simv'))
+    args.out_dir = os.path.abspath(args.out_dir or os.path.join(args.sim_dir, 'regr_runs'))
+    args.csv = os.path.abspath(args.csv or os.path.join(args.sim_dir, 'regression_raw.csv'))
+    args.log = os.path.join(os.path.dirname(args.csv), 'regr_paper.log')
+    args.cm_dir = os.path.join(args.sim_dir, 'coverage.vdb')
+    args.jobs = max(1, args.jobs)
+    args.seeds = {}
+    args.cov_db = os.path.abspath(args.cov_db or os.path.join(args.sim_dir, 'regr_index.db'))
+    args.closed = False
+    # Set by regr_queue: a command prefix for simv and an Event that kills the run
+    args.launcher = []
+    args.stop = None
+    if args.history is None:
+        args.history = [args.csv] if os.path.isfile(args.csv) else []
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.seed_list:
+        try:
+            jobs, args.seeds = load_seed_list(args.seed_list)
+        except ValueError as e:
+            print("regr_parallel: error: {}".format(e), file=sys.stderr)
+            return 2
+        tests = list(dict.fromkeys(t for t, _ in jobs))
+        args.iterations = None
+    else:
+        tests = args.tests or rc.test_list()
+        jobs = build_jobs(tests, args.iterations)
+
+    print(rc.RULE)
+    print("                 PARALLEL PAPER REGRESSION SUITE EXECUTION")
+    print(rc.RULE)
+    print("Date: {}".format(time.ctime()))
+    if args.seed_list:
+        print("Target: {} Scenarios, {} Runs on {} workers".format(len(tests), len(jobs), args.jobs))
+        print("Randomization: Fixed Seeds from {}".format(args.seed_list))
+    else:
+        print("Target: {} Scenarios x {} Iterations = {} Runs on {} workers".format(
+            len(tests), args.iterations, len(jobs), args.jobs))
+        print("Randomization: Automatic Seeds (+ntb_random_seed_automatic)")
+    print(rc.RULE)
+
+    history = {} if args.no_schedule else regr_schedule.load_history(args.history)
+    if history:
+        run_order, est, predicted = regr_schedule.plan(jobs, history, args.jobs)
+        print("Scheduling longest-first from {} history file(s); predicted makespan {:.1f} s".format(
+            len(args.history), predicted))
+    else:
+        run_order = jobs
+
+    cov_conn = None
+    if args.stop_at_closure:
+        cov_conn = cov_merge.connect(args.cov_db)
+        covered, total, runs = cov_merge.status(cov_conn)
+        print("Coverage merge: {}/{} bins from {} earlier run(s); stopping at {:.2f}%".format(
+            covered, total, runs, args.cov_target))
+
+    start = time.time()
+    results = run_regression(run_order, args, cov_conn)
+    wall = time.time() - start
+
+    rows = merge_outputs(jobs, results, args)
+    status = 'CLOSURE REACHED ({} of {} runs)'.format(len(rows), len(jobs)) if args.closed else 'COMPLETE'
+    if args.seed_list:
+        rc.print_summary(rows, status=status,
+                         randomization="Fixed Seeds ({})".format(os.path.basename(args.seed_list)))
+    else:
+        rc.print_summary(rows, iterations=None if args.closed else args.iterations, status=status)
+    if cov_conn is not None:
+        for name in cov_merge.missing(cov_conn):
+            print("Coverage hole: " + name)
+        cov_conn.close()
+    for r in rows:
+        if r['abort_reason']:
+            print("EARLY_ABORT {} iter {}: {}".format(r['Test_Name'], r['Iteration'], r['abort_reason']))
+    if history:
+        regr_schedule.report(est, history, predicted, actual=wall, workers=args.jobs)
+    else:
+        print("Wall-clock time: {:.1f} s on {} workers".format(wall, args.jobs))
+    print("Detailed metrics logged to: {}".format(args.csv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
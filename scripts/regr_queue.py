@@ -0,0 +1,420 @@
+"""Shared-directory work queue for running the paper regression on several hosts.
+
+Farm nodes that share only a filesystem pull (test, seed) jobs from one
+queue directory:
+
+    <queue>/pending/<n>_<test>_<i>.json            job waiting for a worker
+    <queue>/running/<n>_<test>_<i>.json@<worker>    claimed job, mtime = heartbeat
+    <queue>/done/<n>_<test>_<i>.json                result row of a finished job
+    <queue>/done/<n>_<test>_<i>.out                 its simv output, for collect
+    <queue>/workers/<worker>                        worker heartbeat
+
+A worker claims a job with one rename from pending/ to running/ (atomic, so
+exactly one of the racing workers gets it), runs it like regr_parallel
+(own sim/regr_runs/<test>_<i>/ directory and -cm_name, regr_monitor
+fail-fast) and touches the claim every --heartbeat seconds. A claim not
+touched for --stale seconds belongs to a dead worker and is renamed back to
+pending/ by whichever worker notices it first, which also removes the dead
+worker's heartbeat file; heartbeat ages are measured against the shared
+filesystem's own clock, so host clock skew does not matter. A worker that
+finds its claim requeued kills its simv (started in its own process group,
+and with a parent-death signal so it does not outlive a killed worker) and
+drops its result.
+
+Seeds are drawn when the jobs are submitted (or taken from a --seeds CSV as
+in regr_parallel), so a requeued job reruns exactly the same stimulus.
+`collect` writes the same regression_raw.csv and summary table as
+`make regr_paper`, in regr_paper order.
+
+Usage:
+    python3 regr_queue.py submit /nfs/q -n 15                 (once)
+    python3 regr_queue.py work /nfs/q -j 8                    (on every node, from sim/)
+    python3 regr_queue.py status /nfs/q
+    python3 regr_queue.py collect /nfs/q                      (regression_raw.csv + summary)
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import regr_common as rc
+import regr_parallel
+
+STATES = ['pending', 'running', 'done', 'workers']
+CLAIM_SEP = '@'
+JOB_EXT = '.json'
+OUT_EXT = '.out'
+DEFAULT_HEARTBEAT_S = 10.0
+STALE_FACTOR = 12
+POLL_S = 2.0
+
+# simv gets SIGKILL when the worker thread that started it dies (Linux util-linux)
+LAUNCHER = ['setpriv', '--pdeathsig', 'KILL', '--'] if shutil.which('setpriv') else []
+
+
+def worker_id():
+    return '{}.{}'.format(socket.gethostname().split('.')[0], os.getpid())
+
+
+def _path(queue, state, name=''):
+    return os.path.join(queue, state, name)
+
+
+def _tmp(path):
+    return os.path.join(os.path.dirname(path), '.{}.{}.tmp'.format(os.path.basename(path), worker_id()))
+
+
+def _write_json(path, obj):
+    """Writes obj next to path and renames it into place, so readers never see a partial file."""
+    tmp = _tmp(path)
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+    os.rename(tmp, path)
+
+
+def _copy(src, path):
+    """Copies src to path through a temporary file, like _write_json."""
+    tmp = _tmp(path)
+    shutil.copyfile(src, tmp)
+    os.rename(tmp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _names(queue, state):
+    try:
+        return sorted(n for n in os.listdir(_path(queue, state)) if not n.startswith('.'))
+    except OSError:
+        return []
+
+
+def fs_now(queue, worker):
+    """Current time as seen by the shared filesystem (mtime of a freshly written file)."""
+    path = _path(queue, 'workers', '.clock.' + worker)
+    with open(path, 'w'):
+        pass
+    return os.stat(path).st_mtime
+
+
+def submit(queue, jobs, seeds):
+    """Creates one pending job file per (test, iteration), in regr_paper order."""
+    for state in STATES:
+        if not os.path.isdir(_path(queue, state)):
+            os.makedirs(_path(queue, state))
+    if any(_names(queue, s) for s in ('pending', 'running', 'done')):
+        raise ValueError("queue {} is not empty (reset it first)".format(queue))
+    width = len(str(len(jobs)))
+    for n, (test, i) in enumerate(jobs):
+        name = '{:0{}d}_{}.json'.format(n, width, rc.cm_name(test, i))
+        _write_json(_path(queue, 'pending', name), {'index': n, 'test': test, 'iteration': i, 'seed': seeds[(test, i)]})
+
+
+def claim(queue, worker):
+    """Moves the first pending job to running/; returns (job dict, claim path) or None."""
+    for name in _names(queue, 'pending'):
+        claimed = _path(queue, 'running', name + CLAIM_SEP + worker)
+        try:
+            os.rename(_path(queue, 'pending', name), claimed)
+        except OSError:
+            continue  # another worker was faster
+        os.utime(claimed)
+        return _read_json(claimed), claimed
+    return None
+
+
+def requeue_stale(queue, stale_s, worker):
+    """Renames claims older than stale_s back to pending/ and removes workers/ files just as old.
+
+    Returns the job names requeued.
+    """
+    now = fs_now(queue, worker)
+    requeued = []
+    for claimed in _names(queue, 'running'):
+        path = _path(queue, 'running', claimed)
+        try:
+            if now - os.stat(path).st_mtime < stale_s:
+                continue
+            name = claimed.split(CLAIM_SEP, 1)[0]
+            os.rename(path, _path(queue, 'pending', name))
+        except OSError:
+            continue  # finished or requeued meanwhile
+        requeued.append(name)
+    # Heartbeat and clock files of dead workers (live ones rewrite theirs every heartbeat)
+    for name in os.listdir(_path(queue, 'workers')):
+        path = _path(queue, 'workers', name)
+        try:
+            if now - os.stat(path).st_mtime >= stale_s:
+                os.remove(path)
+        except OSError:
+            continue
+    return requeued
+
+
+def _write_worker_file(args):
+    with open(args.worker_file, 'w') as f:
+        f.write('{} slots, pid {}\n'.format(args.jobs, os.getpid()))
+
+
+def _worker_heartbeat(args, stop):
+    """Rewrites the worker file every heartbeat, recreating it if it was pruned as stale."""
+    while not stop.wait(args.heartbeat):
+        try:
+            _write_worker_file(args)
+        except (IOError, OSError):
+            continue
+
+
+def _heartbeat(claimed, stop, lost, interval):
+    while not stop.wait(interval):
+        try:
+            os.utime(claimed)
+        except OSError:
+            lost.set()  # requeued by someone else
+            return
+
+
+def run_job(job, claimed, args):
+    """Runs one claimed job with heartbeats; returns the result row, or None if the claim was lost.
+
+    Setting `lost` (heartbeat failure, or Ctrl-C through args.live) kills the run's simv.
+    """
+    stop, lost = threading.Event(), threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(claimed, stop, lost, args.heartbeat))
+    beat.daemon = True
+    beat.start()
+    args.live.add(lost)
+    key = (job['test'], job['iteration'])
+    try:
+        res = regr_parallel.run_one(key, argparse.Namespace(**dict(
+            vars(args), seeds={key: job['seed']}, launcher=LAUNCHER, stop=lost)))
+    finally:
+        stop.set()
+        beat.join()
+        args.live.discard(lost)
+    name = os.path.basename(claimed).split(CLAIM_SEP, 1)[0]
+    if args.abort.is_set():
+        try:
+            os.rename(claimed, _path(args.queue, 'pending', name))  # interrupted: hand the job back
+        except OSError:
+            pass
+        return None
+    if lost.is_set() or not os.path.exists(claimed):
+        return None
+    row = dict((k, res[k]) for k in rc.CSV_HEADER)
+    row['Seed'] = row['Seed'] or job['seed']
+    row.update(index=job['index'], run_dir=res['run_dir'], worker=args.worker, wall_s=res['wall_s'])
+    try:
+        _copy(os.path.join(res['run_dir'], 'simv.out'), _path(args.queue, 'done', name[:-len(JOB_EXT)] + OUT_EXT))
+    except (IOError, OSError):
+        pass  # collect warns about the missing output
+    _write_json(_path(args.queue, 'done', name), row)
+    os.remove(claimed)
+    return row
+
+
+def work_loop(args, slot):
+    """One worker slot: claim, run, repeat until the queue holds no pending or running jobs."""
+    ran = 0
+    while not args.abort.is_set():
+        for name in requeue_stale(args.queue, args.stale, args.worker):
+            print("[{}] requeued stale job {}".format(args.worker, name))
+        got = claim(args.queue, '{}.{}'.format(args.worker, slot))
+        if got is None:
+            if not _names(args.queue, 'pending') and not _names(args.queue, 'running'):
+                return ran
+            time.sleep(args.poll)
+            continue
+        job, claimed = got
+        row = run_job(job, claimed, args)
+        if row is None:
+            if args.abort.is_set():
+                break
+            print("[{}] lost job {}_{} (requeued), result dropped".format(args.worker, job['test'], job['iteration']))
+            continue
+        ran += 1
+        print("[{}] {:<25} iter {:<3} {:<11} CPU {:>8}s".format(
+            args.worker, row['Test_Name'], row['Iteration'], row['Status'], row['CPU_Time_s']))
+        sys.stdout.flush()
+    return ran
+
+
+def work(args):
+    if not os.path.isdir(_path(args.queue, 'pending')):
+        raise ValueError("{} is not a queue (run submit first)".format(args.queue))
+    args.worker_file = _path(args.queue, 'workers', args.worker)
+    args.abort = threading.Event()
+    args.live = set()
+    _write_worker_file(args)
+    stop = threading.Event()
+    beat = threading.Thread(target=_worker_heartbeat, args=(args, stop))
+    beat.daemon = True
+    beat.start()
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            slots = [pool.submit(work_loop, args, slot) for slot in range(args.jobs)]
+            try:
+                return sum(f.result() for f in slots)
+            except KeyboardInterrupt:
+                # simv runs in its own process group and never sees the Ctrl-C
+                args.abort.set()
+                for lost in list(args.live):
+                    lost.set()
+                raise
+    finally:
+        stop.set()
+        beat.join()
+        for path in (args.worker_file, _path(args.queue, 'workers', '.clock.' + args.worker)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def results(queue):
+    """Result rows of finished jobs, in submit (regr_paper) order."""
+    rows = []
+    for name in _names(queue, 'done'):
+        if not name.endswith(JOB_EXT):
+            continue
+        try:
+            row = _read_json(_path(queue, 'done', name))
+        except (IOError, OSError, ValueError):
+            continue
+        row['out'] = _path(queue, 'done', name[:-len(JOB_EXT)] + OUT_EXT)
+        rows.append(row)
+    rows.sort(key=lambda r: r['index'])
+    return rows
+
+
+def collect(queue, csv_path, log_path):
+    """Writes regression_raw.csv and the combined simv output like regr_paper_par."""
+    rows = results(queue)
+    jobs = [(r['Test_Name'], int(r['Iteration'])) for r in rows]
+    args = argparse.Namespace(csv=csv_path, log=log_path)
+    return regr_parallel.merge_outputs(jobs, dict(zip(jobs, rows)), args)
+
+
+def status(queue, stale_s):
+    now = fs_now(queue, worker_id())
+    pending, running = _names(queue, 'pending'), _names(queue, 'running')
+    done = [n for n in _names(queue, 'done') if n.endswith(JOB_EXT)]
+    print("Queue {}: {} pending, {} running, {} done".format(queue, len(pending), len(running), len(done)))
+    for claimed in running:
+        name, worker = claimed.split(CLAIM_SEP, 1)
+        try:
+            age = now - os.stat(_path(queue, 'running', claimed)).st_mtime
+        except OSError:
+            continue
+        print("  {:<45} {:<28} heartbeat {:>6.1f} s ago{}".format(
+            name, worker, age, "  STALE" if age >= stale_s else ""))
+    for worker in _names(queue, 'workers'):
+        try:
+            age = now - os.stat(_path(queue, 'workers', worker)).st_mtime
+        except OSError:
+            continue
+        print("  worker {:<28} last seen {:>6.1f} s ago".format(worker, age))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Shared-directory regression job queue for several hosts")
+    sub = p.add_subparsers(dest='cmd')
+    p_sub = sub.add_parser('submit', help="fill the queue with TEST_LIST x iterations (or --seeds)")
+    p_sub.add_argument('queue')
+    p_sub.add_argument('-n', '--iterations', type=int, default=15, help="iterations per test (default: 15)")
+    p_sub.add_argument('-t', '--tests', nargs='+', default=None, help="subset of tests (default: TEST_LIST)")
+    p_sub.add_argument('--seeds', dest='seed_list', default=None,
+                       help="queue the (Test_Name, Seed) runs of this CSV instead of tests x iterations")
+    p_work = sub.add_parser('work', help="pull and run jobs until the queue is drained")
+    p_work.add_argument('queue')
+    p_work.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="concurrent simv processes on this host (default: all cores)")
+    p_work.add_argument('--sim-dir', default=rc.SIM_DIR, help="directory holding simv and coverage.vdb")
+    p_work.add_argument('--simv', default=None, help="simulator executable (default: <sim-dir>/simv)")
+    p_work.add_argument('--out-dir', default=None, help="per-run directories (default: <sim-dir>/regr_runs)")
+    p_work.add_argument('--heartbeat', type=float, default=DEFAULT_HEARTBEAT_S,
+                        help="seconds between heartbeats (default: %(default)s)")
+    p_work.add_argument('--cov-per-run', action='store_true',
+                        help="write each run's URG text report (<run>/urg/grpinfo.txt) for cov_rank.py")
+    p_work.add_argument('--cov-report', default=regr_parallel.DEFAULT_COV_REPORT,
+                        help="per-run URG text report command (default: %(default)s)")
+    p_work.add_argument('--max-errors', type=int, default=None,
+                        help="stop a run after this many UVM_ERROR/UVM_FATAL reports (EARLY_ABORT)")
+    p_work.add_argument('--budget', type=float, default=None,
+                        help="per-run wall-clock budget in seconds (EARLY_ABORT when exceeded)")
+    p_stat = sub.add_parser('status', help="pending/running/done counts, heartbeats and stale claims")
+    p_stat.add_argument('queue')
+    p_col = sub.add_parser('collect', help="write regression_raw.csv and the regr_paper summary")
+    p_col.add_argument('queue')
+    p_col.add_argument('--csv', default=os.path.join(rc.SIM_DIR, 'regression_raw.csv'),
+                       help="results CSV (default: sim/regression_raw.csv)")
+    p_reset = sub.add_parser('reset', help="remove every job and result from the queue")
+    p_reset.add_argument('queue')
+    for sp in (p_work, p_stat):
+        sp.add_argument('--stale', type=float, default=None,
+                        help="seconds without heartbeat before a claim is requeued (default: {} x heartbeat)".format(
+                            STALE_FACTOR))
+    args = p.parse_args(argv)
+    if not args.cmd:
+        p.error("a command is required")
+    args.queue = os.path.abspath(args.queue)
+
+    if args.cmd == 'submit':
+        try:
+            if args.seed_list:
+                jobs, seeds = regr_parallel.load_seed_list(args.seed_list)
+            else:
+                jobs = regr_parallel.build_jobs(args.tests or rc.test_list(), args.iterations)
+                draw = random.SystemRandom()
+                seeds = dict((job, str(draw.randrange(1, 1 << 31))) for job in jobs)
+            submit(args.queue, jobs, seeds)
+        except ValueError as e:
+            p.error(str(e))
+        print("Queued {} job(s) in {}".format(len(jobs), args.queue))
+    elif args.cmd == 'work':
+        run_args = args
+        run_args.sim_dir = os.path.abspath(args.sim_dir)
+        run_args.simv = os.path.abspath(args.simv or os.path.join(run_args.sim_dir, 'simv'))
+        run_args.out_dir = os.path.abspath(args.out_dir or os.path.join(run_args.sim_dir, 'regr_runs'))
+        run_args.cm_dir = os.path.join(run_args.sim_dir, 'coverage.vdb')
+        run_args.jobs = max(1, args.jobs)
+        run_args.stale = args.stale or STALE_FACTOR * args.heartbeat
+        run_args.stop_at_closure = False
+        run_args.worker = worker_id()
+        run_args.poll = min(POLL_S, args.heartbeat)
+        start = time.time()
+        try:
+            ran = work(run_args)
+        except ValueError as e:
+            p.error(str(e))
+        except KeyboardInterrupt:
+            print("[{}] interrupted: running jobs handed back to the queue".format(run_args.worker))
+            return 130
+        print("[{}] queue drained: ran {} job(s) in {:.1f} s".format(run_args.worker, ran, time.time() - start))
+    elif args.cmd == 'status':
+        status(args.queue, args.stale or STALE_FACTOR * DEFAULT_HEARTBEAT_S)
+    elif args.cmd == 'collect':
+        pending, running = _names(args.queue, 'pending'), _names(args.queue, 'running')
+        rows = collect(args.queue, os.path.abspath(args.csv),
+                       os.path.join(os.path.dirname(os.path.abspath(args.csv)), 'regr_paper.log'))
+        state = 'COMPLETE' if not pending and not running else 'PARTIAL ({} pending, {} running)'.format(
+            len(pending), len(running))
+        rc.print_summary(rows, status=state, randomization='Fixed Seeds drawn at submit (regr_queue)')
+        print("Detailed metrics logged to: {}".format(args.csv))
+    elif args.cmd == 'reset':
+        for state in STATES:
+            shutil.rmtree(_path(args.queue, state), ignore_errors=True)
+        print("Queue {} reset".format(args.queue))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
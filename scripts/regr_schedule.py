@@ -0,0 +1,113 @@
+"""History-aware ordering of regression runs.
+
+Reads earlier regression_raw.csv files, estimates each test's CPU time from
+its CPU_Time_s history and orders the runs longest-first (LPT list
+scheduling), so long tests such as i2c_random_test / i2c_burst_test start
+early and the short ones fill the remaining slots instead of leaving cores
+idle at the end of the regression.
+
+Usage:
+    python3 regr_schedule.py -j 32 old/regression_raw.csv nightly/*.csv
+"""
+import argparse
+import glob
+import heapq
+import os
+
+import regr_common as rc
+
+# Fallback estimate when there is no history at all (seconds)
+DEFAULT_CPU_S = 60.0
+
+
+def load_history(paths):
+    """Returns {test: [cpu_s, ...]} from regression_raw.csv files (or dirs holding one)."""
+    history = {}
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if os.path.isdir(path):
+                path = os.path.join(path, 'regression_raw.csv')
+            if not os.path.isfile(path):
+                continue
+            for r in rc.read_csv(path):
+                try:
+                    cpu = float(r['CPU_Time_s'])
+                except (TypeError, ValueError):
+                    continue
+                # 0.00 means the CPU Time line was missing (crashed/aborted run)
+                if cpu > 0:
+                    history.setdefault(r['Test_Name'], []).append(cpu)
+    return history
+
+
+def _median(values):
+    v = sorted(values)
+    mid = len(v) // 2
+    return v[mid] if len(v) % 2 else 0.5 * (v[mid - 1] + v[mid])
+
+
+def estimate(tests, history, default=None):
+    """Returns {test: estimated_cpu_s}; tests without history get the median of the known ones."""
+    est = dict((t, _median(history[t])) for t in tests if history.get(t))
+    if default is None:
+        default = _median(list(est.values())) if est else DEFAULT_CPU_S
+    for t in tests:
+        est.setdefault(t, default)
+    return est
+
+
+def order_jobs(jobs, est):
+    """Sorts (test, iteration) jobs longest-estimate first (stable for equal estimates)."""
+    return sorted(jobs, key=lambda job: -est[job[0]])
+
+
+def predict_makespan(durations, workers):
+    """Makespan of greedy list scheduling of `durations` (in order) on `workers` slots."""
+    slots = [0.0] * max(1, workers)
+    for d in durations:
+        heapq.heapreplace(slots, slots[0] + d)
+    return max(slots)
+
+
+def plan(jobs, history, workers, default=None):
+    """Returns (ordered_jobs, estimates, predicted_makespan_s)."""
+    est = estimate(sorted(set(t for t, _ in jobs)), history, default)
+    ordered = order_jobs(jobs, est)
+    return ordered, est, predict_makespan([est[t] for t, _ in ordered], workers)
+
+
+def report(est, history, predicted, actual=None, workers=1):
+    """Prints the per-test estimates and predicted (vs. actual) makespan."""
+    print("{:<25} | {:>8} | {:>12}".format("Test Scenario", "Samples", "Est CPU (s)"))
+    print(rc.SUB_RULE[:51])
+    for t in sorted(est, key=lambda t: -est[t]):
+        n = len(history.get(t, []))
+        print("{:<25} | {:>8} | {:>12.2f}".format(t, n if n else 'default', est[t]))
+    print(rc.SUB_RULE[:51])
+    print("Predicted makespan: {:.1f} s on {} workers".format(predicted, workers))
+    if actual is not None:
+        ratio = actual / predicted if predicted > 0 else float('nan')
+        print("Actual makespan:    {:.1f} s (actual/predicted = {:.2f})".format(actual, ratio))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Order regression runs by past CPU time")
+    p.add_argument('history', nargs='+', help="earlier regression_raw.csv files, globs or directories")
+    p.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    p.add_argument('-n', '--iterations', type=int, default=15)
+    p.add_argument('--default-cpu', type=float, default=None,
+                   help="estimate for tests without history (default: median of known tests)")
+    args = p.parse_args(argv)
+
+    history = load_history(args.history)
+    tests = rc.test_list()
+    jobs = [(t, i) for i in range(1, args.iterations + 1) for t in tests]
+    ordered, est, predicted = plan(jobs, history, args.jobs, args.default_cpu)
+
+    report(est, history, predicted, workers=args.jobs)
+    serial = predict_makespan([est[t] for t, _ in jobs], args.jobs)
+    print("Makefile order:     {:.1f} s on {} workers".format(serial, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
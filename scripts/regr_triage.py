@@ -0,0 +1,218 @@
+"""Failure-signature clustering of regression run logs.
+
+Every run_<test>_<i>.log under the given roots is streamed once, in 1 MiB
+blocks, up to its first error report (UVM_ERROR / UVM_FATAL, a simulator
+`Error-[...]` or the regr_monitor EARLY_ABORT marker).
+The message is normalized (report time, hex values, [indices], times with
+units and remaining numbers are replaced by placeholders) and hashed
+together with the severity, source location, and report ID, so
+
+    UVM_ERROR ./src/env/i2c_scoreboard.sv(151) @ 12000: uvm_test_top.env.scoreboard [SCB] Data[3] mismatch: exp=0x1f, act=0x2e
+    UVM_ERROR ./src/env/i2c_scoreboard.sv(151) @ 98410: uvm_test_top.env.scoreboard [SCB] Data[0] mismatch: exp=0x00, act=0x7f
+
+fall into one cluster. Each cluster is listed with its size, the tests it
+hits, the smallest reproducing seed and the run whose first error came at
+the shortest simulation time (the quickest reproducer). Logs are scanned by
+a process pool; passing logs cost one sequential read.
+
+Usage:
+    python3 regr_triage.py sim/regr_runs -j 32
+    python3 regr_triage.py /nfs/nightly/2026-10-16/ --csv failures.csv --examples 3
+"""
+import argparse
+import collections
+import hashlib
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import regr_common as rc
+import regr_index
+
+PASS_MARKER = b'TEST STATUS: PASSED'
+# Line starts of a first-error line; severity summaries ("UVM_ERROR :    3") are skipped
+ERROR_MARKERS = [b'\nUVM_ERROR', b'\nUVM_FATAL', b'\nError-[', b'\n' + rc.ABORT_MARKER.encode('ascii')]
+# Same rule as regr_common.parse_seed: the trailing integer of the first `random seed` line
+SEED_RE = re.compile(rb'random seed\b.*?(\d+)[ \t\r]*$', re.M)
+BLOCK = 1 << 20
+
+# "<file>(<line>) @ <time>: <component> [<ID>] <message>"
+REPORT_RE = re.compile(r'^(UVM_\w+)\s+(\S+)\s+@\s*([\d.]+)\s*(\w*)\s*:\s*(\S+)\s+\[([^\]]+)\]\s*(.*)$')
+
+# Applied in order; times and hex first so their digits are not split up
+NORMALIZE = [
+    (re.compile(r'\b\d+(?:\.\d+)?\s*(?:fs|ps|ns|us|ms|s)\b'), '<T>'),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b\d*'[hH][0-9a-fA-F_xXzZ]+"), '<H>'),
+    (re.compile(r'\[\s*\d+\s*\]'), '[<N>]'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '<N>'),
+]
+
+Failure = collections.namedtuple('Failure', ['path', 'test', 'iteration', 'seed', 'sim_time', 'signature', 'first_error'])
+Cluster = collections.namedtuple('Cluster', ['key', 'signature', 'failures'])
+
+
+def normalize(message):
+    for regex, placeholder in NORMALIZE:
+        message = regex.sub(placeholder, message)
+    return ' '.join(message.split())
+
+
+def signature(line):
+    """Returns (signature text, report time or None) of a first-error line."""
+    m = REPORT_RE.match(line)
+    if not m:
+        # Simulator errors (Error-[NOA] Null object access ...) have no report time
+        return normalize(line), None
+    severity, location, t, _, component, report_id, message = m.groups()
+    # Component instance paths keep their names but lose array indices
+    return ' '.join([severity, location, normalize(component), '[' + report_id + ']', normalize(message)]), float(t)
+
+
+def signature_key(sig):
+    return hashlib.blake2b(sig.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def _first_error(data):
+    """Offset of the first error line in a block that starts with a newline, or -1.
+
+    Plain substring searches: much faster than one multi-line regex.
+    """
+    best = -1
+    for marker in ERROR_MARKERS:
+        i = data.find(marker)
+        while i >= 0 and (best < 0 or i < best):
+            end = i + len(marker)
+            if not (marker[1:4] == b'UVM' and data[end:end + 16].lstrip(b' \t').startswith(b':')):
+                best = i
+                break
+            i = data.find(marker, end)
+    return best
+
+
+def scan_log(path):
+    """Streams one log up to its first error; returns a Failure, or None if the run passed."""
+    seed = ''
+    first = None
+    passed = False
+    try:
+        with open(path, 'rb') as f:
+            tail = b''
+            while True:
+                block = f.read(BLOCK)
+                data = tail + block
+                # Search whole lines only; the partial last line waits for the next block
+                cut = data.rfind(b'\n') + 1 if block else len(data)
+                data, tail = b'\n' + data[:cut], data[cut:]
+                if not seed:
+                    m = SEED_RE.search(data)
+                    if m:
+                        seed = m.group(1).decode('ascii')
+                i = _first_error(data)
+                if i >= 0:
+                    end = data.find(b'\n', i + 1)
+                    first = data[i + 1:end if end >= 0 else len(data)].decode('utf-8', 'replace').strip()
+                    break
+                passed = passed or PASS_MARKER in data
+                if not block:
+                    break
+    except (IOError, OSError):
+        first = '<unreadable log>'
+    if first is None:
+        if passed:
+            return None
+        first = '<no error report, no TEST STATUS: PASSED>'
+    sig, sim_time = signature(first)
+    test, iteration = rc.parse_log_name(path)
+    return Failure(path, test, iteration, seed, sim_time, sig, first)
+
+
+def scan(roots, jobs=None):
+    """Returns ([Failure], logs scanned) for every run log under roots."""
+    paths = [path for path, _, _ in regr_index.find_logs(roots)]
+    if len(paths) > 1 and (jobs or 0) != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(scan_log, paths, chunksize=256))
+    else:
+        results = [scan_log(p) for p in paths]
+    return [r for r in results if r is not None], len(paths)
+
+
+def _seed_order(seed):
+    """Numeric seed order; runs without a seed line sort last."""
+    return (0, int(seed)) if seed else (1, 0)
+
+
+def cluster(failures):
+    """Groups failures by signature; returns [Cluster], largest first."""
+    groups = {}
+    for fail in failures:
+        groups.setdefault(fail.signature, []).append(fail)
+    clusters = [Cluster(signature_key(sig), sig, fails) for sig, fails in groups.items()]
+    clusters.sort(key=lambda c: (-len(c.failures), c.signature))
+    return clusters
+
+
+def smallest_seed(c):
+    return min(c.failures, key=lambda f: _seed_order(f.seed))
+
+
+def quickest(c):
+    timed = [f for f in c.failures if f.sim_time is not None]
+    return min(timed, key=lambda f: f.sim_time) if timed else None
+
+
+def print_report(clusters, scanned, examples=1):
+    print(rc.RULE)
+    print("                           FAILURE SIGNATURE CLUSTERS")
+    print(rc.RULE)
+    print("{:<12} | {:>6} | {:<30} | {:>12} | {:>14}".format("Cluster", "Fails", "Tests", "Min Seed", "First Error @"))
+    for c in clusters:
+        print(rc.SUB_RULE)
+        tests = sorted(set(f.test for f in c.failures))
+        q = quickest(c)
+        print("{:<12} | {:>6} | {:<30} | {:>12} | {:>14}".format(
+            c.key, len(c.failures), ', '.join(tests) if len(tests) <= 2 else '{} tests'.format(len(tests)),
+            smallest_seed(c).seed or '-', '{:g}'.format(q.sim_time) if q else '-'))
+        print("  " + c.signature)
+        shown = [q] if q else []
+        shown += [f for f in sorted(c.failures, key=lambda f: _seed_order(f.seed)) if f is not q]
+        for f in shown[:examples]:
+            print("    e.g. {}".format(f.path))
+    print(rc.RULE)
+    failed = sum(len(c.failures) for c in clusters)
+    print("{} log(s) scanned, {} failing, {} signature(s)".format(scanned, failed, len(clusters)))
+
+
+def write_csv(path, clusters):
+    with open(path, 'w') as f:
+        f.write('Cluster,Test_Name,Iteration,Seed,Sim_Time,Log,First_Error\n')
+        for c in clusters:
+            for fail in c.failures:
+                f.write('{},{},{},{},{},{},"{}"\n'.format(
+                    c.key, fail.test, fail.iteration, fail.seed,
+                    '' if fail.sim_time is None else '{:g}'.format(fail.sim_time),
+                    fail.path, fail.first_error.replace('"', '""')))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Cluster failing regression runs by first-error signature")
+    p.add_argument('roots', nargs='+', help="directories or run_<test>_<i>.log files")
+    p.add_argument('-j', '--jobs', type=int, default=None, help="scanner processes")
+    p.add_argument('--examples', type=int, default=1, help="log paths listed per cluster")
+    p.add_argument('--csv', default=None, help="write every failing run with its cluster to this CSV")
+    args = p.parse_args(argv)
+
+    start = time.time()
+    failures, scanned = scan(args.roots, args.jobs)
+    clusters = cluster(failures)
+    print_report(clusters, scanned, args.examples)
+    print("Triage done in {:.2f} s".format(time.time() - start))
+    if args.csv:
+        write_csv(args.csv, clusters)
+        print("Failing runs written to: {}".format(args.csv))
+    return 1 if clusters else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Role-switch latency extraction from regression run logs.
+
+i2c_driver logs one ROLE_ACTIVE line whenever it starts acting in a new
+role, with the time elapsed since the last STOP_DETECTED and BUS_IDLE
+events of i2c_event_pool:
+
+    UVM_INFO ... [DRV] ROLE_ACTIVE: MASTER_TO_SLAVE stop_to_active_us=4.712 idle_to_active_us=0.000
+
+Those lines are extracted from every run_<test>_<i>.log with a process pool
+and cached per log in the regr_index database (keyed on mtime and size like
+the runs table), so re-plotting after a nightly regression only parses the
+new seeds. The latencies feed plot_latency_violin in
+img/seaborn/generate_plots.py.
+
+Role activity is a testbench decision, not a bus condition, so it cannot be
+recovered from waveforms; the logs are the only source.
+
+Usage:
+    python3 role_latency.py sim/regr_runs /nfs/nightly/2026-*/ -j 16
+    python3 role_latency.py --csv latencies.csv
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import regr_common as rc
+import regr_index
+
+MASTER_TO_SLAVE = 'MASTER_TO_SLAVE'
+SLAVE_TO_MASTER = 'SLAVE_TO_MASTER'
+DIRECTIONS = [MASTER_TO_SLAVE, SLAVE_TO_MASTER]
+
+ROLE_RE = re.compile(r'ROLE_ACTIVE: (MASTER_TO_SLAVE|SLAVE_TO_MASTER) '
+                     r'stop_to_active_us=(-?[\d.]+) idle_to_active_us=(-?[\d.]+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS role_logs (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS role_switches (
+    path              TEXT NOT NULL,
+    test              TEXT NOT NULL,
+    seed              TEXT,
+    direction         TEXT NOT NULL,
+    stop_to_active_us REAL,
+    idle_to_active_us REAL
+);
+CREATE INDEX IF NOT EXISTS role_switches_path ON role_switches(path);
+CREATE INDEX IF NOT EXISTS role_switches_dir ON role_switches(direction, test);
+"""
+
+
+def connect(db_path=regr_index.DEFAULT_DB):
+    """Opens the regr_index database with the role-switch tables added."""
+    conn = regr_index.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_switches(text):
+    """Returns [(direction, stop_to_active_us, idle_to_active_us)]; -1 becomes None."""
+    out = []
+    for direction, stop_us, idle_us in ROLE_RE.findall(text):
+        stop_us, idle_us = float(stop_us), float(idle_us)
+        out.append((direction, stop_us if stop_us >= 0 else None, idle_us if idle_us >= 0 else None))
+    return out
+
+
+def parse_one(entry):
+    """Extracts the role switches of one log (runs in a worker process)."""
+    path, mtime_ns, size = entry
+    text = rc.read_log(path)
+    test = rc.parse_log_name(path)[0]
+    seed = rc.parse_seed(text)
+    return entry, [(path, test, seed) + s for s in parse_switches(text)]
+
+
+def extract(conn, roots, jobs=None):
+    """Parses new/changed logs under roots; returns (parsed, skipped)."""
+    known = dict(((p, (m, s)) for p, m, s in conn.execute('SELECT path, mtime_ns, size FROM role_logs')))
+    todo = []
+    skipped = 0
+    for path, mtime_ns, size in regr_index.find_logs(roots):
+        if known.get(path) == (mtime_ns, size):
+            skipped += 1
+        else:
+            todo.append((path, mtime_ns, size))
+
+    if len(todo) > 1 and (jobs or 0) != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(parse_one, todo, chunksize=64))
+    else:
+        results = [parse_one(e) for e in todo]
+
+    with conn:
+        conn.executemany('DELETE FROM role_switches WHERE path = ?', [(e[0],) for e, _ in results])
+        conn.executemany('INSERT OR REPLACE INTO role_logs VALUES (?, ?, ?)', [e for e, _ in results])
+        conn.executemany('INSERT INTO role_switches VALUES (?, ?, ?, ?, ?, ?)',
+                         [row for _, rows in results for row in rows])
+    return len(results), skipped
+
+
+def load(conn, test=None):
+    """Returns {direction: float64 array of stop-to-active latencies in us}."""
+    query = 'SELECT direction, stop_to_active_us FROM role_switches WHERE stop_to_active_us IS NOT NULL'
+    params = ()
+    if test:
+        query += ' AND test = ?'
+        params = (test,)
+    rows = conn.execute(query, params).fetchall()
+    out = {}
+    for d in DIRECTIONS:
+        out[d] = np.array([v for direction, v in rows if direction == d], dtype=np.float64)
+    return out
+
+
+def cached_latencies(roots=None, db_path=None):
+    """load() for the figure scripts, scanning roots first.
+
+    The default database is only read if it exists (or roots ask for a
+    scan); an explicit db_path is always used. Returns {} otherwise.
+    """
+    if db_path is None:
+        db_path = regr_index.DEFAULT_DB
+        if not roots and not os.path.isfile(db_path):
+            return {}
+    conn = connect(db_path)
+    if roots:
+        extract(conn, roots)
+    latencies = load(conn)
+    conn.close()
+    return latencies
+
+
+def print_report(latencies):
+    """Prints count and percentiles per switch direction."""
+    print("{:<16} | {:>8} | {:>9} | {:>9} | {:>9} | {:>9}".format(
+        "Direction", "Count", "Min (us)", "P50 (us)", "P99 (us)", "Max (us)"))
+    print(rc.SUB_RULE[:72])
+    for d in DIRECTIONS:
+        v = latencies[d]
+        if not len(v):
+            print("{:<16} | {:>8} |".format(d, 0))
+            continue
+        p50, p99 = np.percentile(v, [50, 99])
+        print("{:<16} | {:>8} | {:>9.3f} | {:>9.3f} | {:>9.3f} | {:>9.3f}".format(
+            d, len(v), v.min(), p50, p99, v.max()))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Extract role-switch latencies from run logs")
+    p.add_argument('roots', nargs='*', help="directories or log files to (re)scan")
+    p.add_argument('--db', default=regr_index.DEFAULT_DB, help="cache database (default: sim/regr_index.db)")
+    p.add_argument('-j', '--jobs', type=int, default=None, help="parser processes")
+    p.add_argument('-t', '--test', default=None, help="only report this test")
+    p.add_argument('--csv', default=None, help="write Direction,Latency_us rows to this CSV")
+    args = p.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.roots:
+        start = time.time()
+        n, skipped = extract(conn, args.roots, args.jobs)
+        print("Parsed {} log(s), skipped {} unchanged in {:.2f} s".format(n, skipped, time.time() - start))
+    latencies = load(conn, args.test)
+    conn.close()
+    print_report(latencies)
+    if args.csv:
+        with open(args.csv, 'w') as f:
+            f.write("Direction,Latency_us\n")
+            for d in DIRECTIONS:
+                for v in latencies[d]:
+                    f.write("{},{:.3f}\n".format(d, v))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
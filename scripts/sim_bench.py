@@ -0,0 +1,330 @@
+"""Simulation throughput benchmark with per-commit history and slowdown detection.
+
+Runs a fixed set of tests x seeds (each --repeats times, one simv at a time
+by default so runs do not compete for cores) and derives two throughput
+metrics per run from the ENVIRONMENT SUMMARY and the run's CPU time:
+
+* transactions per CPU second   = Transactions / CPU time
+* simulated us per wall second  = Duration (ms) * 1000 / wall-clock time
+
+CPU time is the log's "CPU Time" line (as in regression_raw.csv), or the
+simv process's own rusage when the log has none. Results are stored per
+commit in the regr_index database. A run is compared against the stored
+baseline commit with a permutation test stratified by (test, seed): labels
+are only shuffled between the baseline and current repeats of the same
+seed, so seed-to-seed workload differences do not hide a slowdown. A metric
+is flagged when it is both significantly lower (p < --alpha, Holm-corrected
+over all tests and metrics compared) and lower by more than --threshold
+percent.
+
+Usage (from sim/ after `make comp`):
+    python3 ../scripts/sim_bench.py run --set-baseline
+    python3 ../scripts/sim_bench.py run                      (exit 1 on a slowdown)
+    python3 ../scripts/sim_bench.py compare abc1234 --against def5678
+    python3 ../scripts/sim_bench.py history
+"""
+import argparse
+import collections
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import regr_common as rc
+import regr_index
+
+DEFAULT_TESTS = ['i2c_sanity_test', 'i2c_burst_test', 'i2c_random_test', 'i2c_slave_read_test']
+DEFAULT_SEEDS = ['1', '2', '3']
+PERMUTATIONS = 10000
+
+# name -> (title, function of a run row); higher is better for both
+METRICS = collections.OrderedDict([
+    ('tx_per_cpu_s', ('Trans / CPU s', lambda r: r.transactions / r.cpu_s)),
+    ('sim_us_per_wall_s', ('Sim us / wall s', lambda r: r.duration_ms * 1000.0 / r.wall_s)),
+])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bench_runs (
+    commit_id    TEXT NOT NULL,
+    test         TEXT NOT NULL,
+    seed         TEXT NOT NULL,
+    rep          INTEGER NOT NULL,
+    status       TEXT NOT NULL,
+    cpu_s        REAL,
+    wall_s       REAL,
+    duration_ms  REAL,
+    transactions INTEGER,
+    recorded_at  REAL NOT NULL,
+    PRIMARY KEY (commit_id, test, seed, rep)
+);
+CREATE TABLE IF NOT EXISTS bench_baseline (
+    id        INTEGER PRIMARY KEY CHECK (id = 0),
+    commit_id TEXT NOT NULL
+);
+"""
+
+BenchRun = collections.namedtuple('BenchRun', [
+    'test', 'seed', 'rep', 'status', 'cpu_s', 'wall_s', 'duration_ms', 'transactions'])
+
+Verdict = collections.namedtuple('Verdict', ['test', 'metric', 'baseline', 'current', 'change_pct', 'p_value',
+                                             'slowdown'])
+
+
+def connect(db_path=regr_index.DEFAULT_DB):
+    """Opens the regr_index database with the benchmark tables added."""
+    conn = regr_index.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def current_commit(repo=rc.PROJ_ROOT):
+    """Short HEAD hash, with -dirty when tracked files are modified."""
+    try:
+        head = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo,
+                                        stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return head + ('-dirty' if dirty else '')
+
+
+def run_one(job, args):
+    """Runs one (test, seed, repeat) and returns its BenchRun."""
+    test, seed, rep = job
+    run_dir = os.path.join(args.out_dir, '{}_{}_{}'.format(test, seed, rep))
+    if not os.path.isdir(run_dir):
+        os.makedirs(run_dir)
+    log_path = os.path.join(run_dir, 'bench_{}_{}_{}.log'.format(test, seed, rep))
+    cmd = [args.simv] + ([] if args.no_cov else rc.cov_opts(os.path.join(args.out_dir, 'coverage.vdb'))) + [
+        '+UVM_TESTNAME=' + test, '+ntb_random_seed=' + seed, '-l', log_path]
+
+    start = time.time()
+    with open(os.path.join(run_dir, 'simv.out'), 'w') as out:
+        proc = subprocess.Popen(cmd, cwd=run_dir, stdout=out, stderr=subprocess.STDOUT)
+        # wait4 gives this child's own CPU time, also with several runs in flight
+        _, wait_status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    wall_s = time.time() - start
+
+    stats = rc.parse_run_log(rc.read_log(log_path), proc.returncode)
+    cpu_s = stats['cpu_s'] or usage.ru_utime + usage.ru_stime
+    return BenchRun(test, seed, rep, stats['status'], cpu_s, wall_s, stats['duration_ms'], stats['transactions'])
+
+
+def record(conn, commit, runs):
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO bench_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         [(commit,) + tuple(r) + (time.time(),) for r in runs])
+
+
+def load(conn, commit):
+    return [BenchRun(*row) for row in conn.execute(
+        'SELECT test, seed, rep, status, cpu_s, wall_s, duration_ms, transactions FROM bench_runs'
+        ' WHERE commit_id = ? ORDER BY test, seed, rep', (commit,))]
+
+
+def baseline(conn):
+    row = conn.execute('SELECT commit_id FROM bench_baseline WHERE id = 0').fetchone()
+    return row[0] if row else None
+
+
+def set_baseline(conn, commit):
+    with conn:
+        conn.execute('INSERT OR REPLACE INTO bench_baseline VALUES (0, ?)', (commit,))
+
+
+def usable(r):
+    """Passing runs with every number a metric needs."""
+    return (r.status == 'PASS' and r.cpu_s and r.wall_s and r.duration_ms is not None
+            and r.transactions is not None)
+
+
+def metric_values(runs, metric):
+    fn = METRICS[metric][1]
+    return [(r.test, r.seed, fn(r)) for r in runs if usable(r)]
+
+
+def stratified_test(strata, values, is_cur, permutations=PERMUTATIONS, seed=0):
+    """Returns (log change, one-sided p-value that the current samples are lower).
+
+    Statistic: mean over strata of (mean log current - mean log baseline);
+    the baseline/current labels are permuted within each stratum only.
+    """
+    strata = np.asarray(strata)
+    values = np.log(np.asarray(values, dtype=float))
+    is_cur = np.asarray(is_cur, dtype=bool)
+    members = [strata == s for s in np.unique(strata)]
+
+    def statistic(labels):
+        total = 0.0
+        for m in members:
+            lab, v = labels[..., m], values[m]
+            n_cur = lab.sum(axis=-1)
+            total = total + (lab * v).sum(axis=-1) / n_cur - (~lab * v).sum(axis=-1) / (m.sum() - n_cur)
+        return total / len(members)
+
+    rng = np.random.default_rng(seed)
+    # Random keys offset by the stratum id sort every permutation stratum by stratum,
+    # so slot j of the stratum-sorted order receives a label from its own stratum
+    order = np.argsort(rng.random((permutations, len(values))) + strata * 2.0, axis=1)
+    labels = np.empty(order.shape, dtype=bool)
+    labels[:, np.argsort(strata, kind='stable')] = is_cur[order]
+    observed = statistic(is_cur)
+    return observed, (1 + np.count_nonzero(statistic(labels) <= observed)) / (permutations + 1.0)
+
+
+def compare(base_runs, cur_runs, alpha=0.05, threshold_pct=3.0):
+    """Returns [Verdict] per test and metric, plus one 'ALL' row per metric.
+
+    Only (test, seed) pairs present in both sets are compared.
+    """
+    verdicts = []
+    for metric in METRICS:
+        base = metric_values(base_runs, metric)
+        cur = metric_values(cur_runs, metric)
+        common = sorted(set((t, s) for t, s, _ in base) & set((t, s) for t, s, _ in cur))
+        for test in sorted(set(t for t, _ in common)) + ['ALL']:
+            stratum = dict((k, n) for n, k in enumerate(k for k in common if test in ('ALL', k[0])))
+            samples = [(stratum[(t, s)], v, False) for t, s, v in base if (t, s) in stratum]
+            samples += [(stratum[(t, s)], v, True) for t, s, v in cur if (t, s) in stratum]
+            if not samples:
+                continue
+            ids, values, flags = (np.array(col) for col in zip(*samples))
+            log_change, p = stratified_test(ids, values, flags)
+            change = 100.0 * (np.exp(log_change) - 1.0)
+            verdicts.append(Verdict(test, metric, float(np.exp(np.log(values[~flags]).mean())),
+                                    float(np.exp(np.log(values[flags]).mean())), float(change), float(p), False))
+    # Holm's step-down correction over every row, so more tests do not mean more false alarms
+    significant = set()
+    for k, n in enumerate(sorted(range(len(verdicts)), key=lambda n: verdicts[n].p_value)):
+        if verdicts[n].p_value >= alpha / (len(verdicts) - k):
+            break
+        significant.add(n)
+    return [v._replace(slowdown=n in significant and v.change_pct < -threshold_pct) for n, v in enumerate(verdicts)]
+
+
+def print_verdicts(verdicts, base_commit, commit):
+    row_fmt = "{:<25} | {:<16} | {:>14} | {:>14} | {:>8} | {:>7} | {:<8}"
+    print(rc.RULE)
+    print("                  SIMULATION THROUGHPUT: {} vs. baseline {}".format(commit, base_commit))
+    print(rc.RULE)
+    print(row_fmt.format("Test Scenario", "Metric", "Baseline", "Current", "Change", "p", "Verdict"))
+    print(rc.SUB_RULE)
+    for v in verdicts:
+        if v.test == 'ALL' and v.metric == list(METRICS)[0]:
+            print(rc.SUB_RULE)
+        print(row_fmt.format(v.test, METRICS[v.metric][0], "{:.2f}".format(v.baseline), "{:.2f}".format(v.current),
+                             "{:+.1f}%".format(v.change_pct), "{:.4f}".format(v.p_value),
+                             "SLOWER" if v.slowdown else "ok"))
+    print(rc.RULE)
+
+
+def history(conn):
+    """Prints per-commit geometric-mean throughput, oldest first."""
+    base = baseline(conn)
+    row_fmt = "{:<16} | {:<19} | {:>6} | {:>6} | {:>14} | {:>15}"
+    print(row_fmt.format("Commit", "Recorded", "Runs", "Pass", METRICS['tx_per_cpu_s'][0],
+                         METRICS['sim_us_per_wall_s'][0]))
+    print(rc.SUB_RULE[:88])
+    for commit, recorded in conn.execute(
+            'SELECT commit_id, MAX(recorded_at) AS t FROM bench_runs GROUP BY commit_id ORDER BY t'):
+        runs = load(conn, commit)
+        means = []
+        for metric in METRICS:
+            values = [v for _, _, v in metric_values(runs, metric)]
+            means.append("{:.2f}".format(float(np.exp(np.log(values).mean()))) if values else '-')
+        print(row_fmt.format(commit + (' *' if commit == base else ''),
+                             time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(recorded)),
+                             len(runs), sum(r.status == 'PASS' for r in runs), *means))
+    if base:
+        print("* baseline")
+
+
+def run_bench(args):
+    """Runs the benchmark jobs; returns [BenchRun] in job order."""
+    jobs = [(t, s, r) for t in args.tests for s in args.seeds for r in range(1, args.repeats + 1)]
+    print("Benchmark: {} test(s) x {} seed(s) x {} repeat(s) = {} runs on {} worker(s)".format(
+        len(args.tests), len(args.seeds), args.repeats, len(jobs), args.jobs))
+    runs = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for n, run in enumerate(pool.map(lambda job: run_one(job, args), jobs), 1):
+            runs.append(run)
+            print("[{:>4}/{}] {:<25} seed {:<8} rep {:<3} {:<11} CPU {:>8.2f}s wall {:>8.2f}s".format(
+                n, len(jobs), run.test, run.seed, run.rep, run.status, run.cpu_s, run.wall_s))
+            sys.stdout.flush()
+    return runs
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Simulation throughput benchmark with baseline comparison")
+    p.add_argument('--db', default=regr_index.DEFAULT_DB, help="database file (default: sim/regr_index.db)")
+    p.add_argument('--alpha', type=float, default=0.05, help="significance level (default: 0.05)")
+    p.add_argument('--threshold', type=float, default=3.0,
+                   help="smallest slowdown in percent that is flagged (default: 3)")
+    sub = p.add_subparsers(dest='cmd')
+    p_run = sub.add_parser('run', help="run the benchmark, store it and compare with the baseline")
+    p_run.add_argument('-t', '--tests', nargs='+', default=DEFAULT_TESTS)
+    p_run.add_argument('-s', '--seeds', nargs='+', default=DEFAULT_SEEDS)
+    p_run.add_argument('-r', '--repeats', type=int, default=3, help="runs per (test, seed) (default: 3)")
+    p_run.add_argument('-j', '--jobs', type=int, default=1, help="concurrent simv processes (default: 1)")
+    p_run.add_argument('--commit', default=None, help="label of this run (default: git HEAD)")
+    p_run.add_argument('--sim-dir', default=rc.SIM_DIR, help="directory holding simv (default: sim/)")
+    p_run.add_argument('--simv', default=None, help="simulator executable (default: <sim-dir>/simv)")
+    p_run.add_argument('--out-dir', default=None, help="per-run directories (default: <sim-dir>/bench_runs)")
+    p_run.add_argument('--no-cov', action='store_true', help="run without COV_OPTS")
+    p_run.add_argument('--set-baseline', action='store_true', help="make this run the baseline")
+    p_base = sub.add_parser('baseline', help="show or set the baseline commit")
+    p_base.add_argument('commit', nargs='?', default=None)
+    p_cmp = sub.add_parser('compare', help="compare two stored commits")
+    p_cmp.add_argument('commit')
+    p_cmp.add_argument('--against', default=None, help="baseline commit (default: the stored baseline)")
+    sub.add_parser('history', help="per-commit throughput")
+    args = p.parse_args(argv)
+    if not args.cmd:
+        p.error("a command is required")
+
+    conn = connect(args.db)
+    slow = False
+    if args.cmd == 'run':
+        args.simv = os.path.abspath(args.simv or os.path.join(args.sim_dir, 'simv'))
+        args.out_dir = os.path.abspath(args.out_dir or os.path.join(args.sim_dir, 'bench_runs'))
+        args.jobs = max(1, args.jobs)
+        commit = args.commit or current_commit()
+        runs = run_bench(args)
+        record(conn, commit, runs)
+        print("Stored {} run(s) for commit {}".format(len(runs), commit))
+        base = baseline(conn)
+        if args.set_baseline or base is None:
+            set_baseline(conn, commit)
+            print("Baseline set to {}".format(commit))
+        elif base != commit:
+            verdicts = compare(load(conn, base), runs, args.alpha, args.threshold)
+            print_verdicts(verdicts, base, commit)
+            slow = any(v.slowdown for v in verdicts)
+    elif args.cmd == 'baseline':
+        if args.commit:
+            if not load(conn, args.commit):
+                p.error("no stored benchmark runs for {}".format(args.commit))
+            set_baseline(conn, args.commit)
+        print("Baseline: {}".format(baseline(conn) or '(none)'))
+    elif args.cmd == 'compare':
+        base = args.against or baseline(conn)
+        if not base:
+            p.error("no baseline: give --against or set one")
+        verdicts = compare(load(conn, base), load(conn, args.commit), args.alpha, args.threshold)
+        print_verdicts(verdicts, base, args.commit)
+        slow = any(v.slowdown for v in verdicts)
+    elif args.cmd == 'history':
+        history(conn)
+    conn.close()
+    if slow:
+        print("Throughput regression against the baseline")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
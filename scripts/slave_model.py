@@ -0,0 +1,271 @@
+"""Offline reference model of rtl/i2c_slave.sv memory, replayed over recorded traffic.
+
+The scoreboard only compares what sequences push with add_expected; this
+checks every read the RTL slave answered against what its memory must hold.
+Model of the behavioral slave (SLAVE_ADDR 7'h55, 256-byte memory):
+
+* mem_addr starts at 0x7F; every START (also a repeated START, also for
+  another address) XORs it with 0xAA, every STOP with 0x55
+* only a 7-bit address equal to SLAVE_ADDR is ACKed
+* write: each byte goes to memory[mem_addr], then mem_addr++
+* read:  byte k comes from memory[mem_addr] and mem_addr++ on every byte
+  the master ACKs plus once after the address; a NACKed last byte does not
+  increment, so an N-byte read normally advances the pointer by N
+* a byte never written reads as X and is not checked
+
+Transactions come from a VCD (i2c_decode, exact: repeated STARTs and the
+final ACK/NACK are on the bus) or from the scoreboard's convert2string dumps
+("Received transaction #N", +UVM_VERBOSITY=UVM_HIGH). The dumps carry no
+repeated-START flag, so every logged transaction is taken to end in a STOP
+with the last read byte NACKed, and the monitor drops the transfer right
+after an Sr: replay tests with repeated STARTs (i2c_restart_test,
+i2c_random_test) from waveforms.
+
+The pointer walk is one scalar pass per transaction; the byte-level memory
+semantics (last write to the same address before each read) are resolved
+for a whole batch at once with a stable sort by (address, byte order).
+
+Usage:
+    python3 slave_model.py sim/regr_runs/i2c_random_test_*/waves.vcd -j 16
+    python3 slave_model.py sim/regr_runs/i2c_burst_test_3/run_i2c_burst_test_3.log --csv mismatches.csv
+"""
+import argparse
+import collections
+import mmap
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import i2c_decode
+import i2c_types as it
+
+SLAVE_ADDR = 0x55
+RESET_ADDR = 0x7F
+START_XOR = 0xAA
+STOP_XOR = 0x55
+BATCH = 1 << 18  # transactions per replay batch
+
+# scoreboard write(): "... @ <time>: ... [SCB] Received transaction #N: <convert2string>"
+DEFAULT_MARKER = r'\[SCB\] Received transaction #\d+:'
+_DUMP = (rb'[ \t]*\n-+\n I2C TRANSACTION\n'
+         rb' Address\s*: 0x([0-9a-fA-F]+) \((7|10)-bit\)\n'
+         rb' Direction\s*: (I2C_\w+)\n'
+         rb' Payload Size\s*: \d+ bytes\n'
+         rb'(?: Data Content\s*:\n((?:[ \t]+\[[0-9a-fA-F]{4}\][ 0-9a-fA-F]*\n)+))?'
+         rb' Status\s*: (I2C_\w+)')
+_ROW_INDEX = re.compile(rb'\[[0-9a-fA-F]{4}\]')
+_REPORT_TIME = re.compile(rb'@\s*(\d+)')
+
+_DIRECTIONS = dict((name.encode('ascii'), v) for v, name in it.DIRECTION_NAMES.items())
+_STATUSES = dict((name.encode('ascii'), v) for v, name in it.STATUS_NAMES.items())
+
+# Pointer state carried from one batch to the next
+State = collections.namedtuple('State', ['mem_addr', 'memory', 'known'])
+
+Mismatch = collections.namedtuple('Mismatch', ['transaction', 'time', 'byte', 'mem_addr', 'expected', 'actual'])
+
+
+def reset_state():
+    return State(RESET_ADDR, np.zeros(256, dtype=np.uint8), np.zeros(256, dtype=bool))
+
+
+def dump_regex(marker=DEFAULT_MARKER):
+    # Starts with the marker so the regex engine can skip ahead to its literal prefix
+    return re.compile(marker.encode('ascii') + _DUMP)
+
+
+def _batch(times, dumps):
+    """Decoded arrays of one batch of (addr, mode, direction, data rows, status) dump groups."""
+    n = len(dumps)
+    addr, mode, direction, rows, status = zip(*dumps)
+    # Data rows are "    [0000] aa bb ... "; drop the [index] tokens and whitespace of the whole batch at once
+    hexes = _ROW_INDEX.sub(b'', b'|'.join(r or b'' for r in rows)).translate(None, b' \t\n')
+    data_len = np.fromiter(map(len, hexes.split(b'|')), dtype=np.int64, count=n) // 2
+    data = np.frombuffer(bytes.fromhex(hexes.replace(b'|', b'').decode('ascii')), dtype=np.uint8)
+    direction = np.fromiter((_DIRECTIONS[d] for d in direction), dtype=np.int64, count=n)
+    return i2c_decode.Decoded(
+        start_time=np.array(times, dtype=np.int64), end_time=np.array(times, dtype=np.int64),
+        addr=np.fromiter((int(a, 16) for a in addr), dtype=np.int64, count=n), direction=direction,
+        addr_mode=np.where(np.array(mode) == b'7', it.I2C_ADDR_7BIT, it.I2C_ADDR_10BIT).astype(np.int64),
+        status=np.fromiter((_STATUSES.get(s, it.I2C_STATUS_ERROR) for s in status), dtype=np.int64, count=n),
+        nack_received=(direction == it.I2C_READ).astype(np.int64), repeated_start=np.zeros(n, dtype=np.int64),
+        data_offset=np.r_[0, np.cumsum(data_len)[:-1]].astype(np.int64), data_len=data_len, data=data)
+
+
+def read_log(path, marker=DEFAULT_MARKER, batch=BATCH):
+    """Yields Decoded batches of the convert2string dumps in a simulation log.
+
+    The log is memory-mapped, so multi-GB logs are not read into memory.
+    """
+    regex = dump_regex(marker)
+    times, dumps = [], []
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+        with mm:
+            for m in regex.finditer(mm):
+                # Report time from the "... @ <time>: ..." prefix on the marker's line
+                t = _REPORT_TIME.search(mm, mm.rfind(b'\n', 0, m.start()) + 1, m.start())
+                times.append(int(t.group(1)) if t else 0)
+                dumps.append(m.groups())
+                if len(dumps) >= batch:
+                    yield _batch(times, dumps)
+                    times, dumps = [], []
+    if dumps:
+        yield _batch(times, dumps)
+
+
+def _slice(dec, lo, hi):
+    d0 = int(dec.data_offset[lo])
+    d1 = int(dec.data_offset[hi - 1] + dec.data_len[hi - 1])
+    fields = dict((k, v[lo:hi]) for k, v in dec._asdict().items() if k != 'data')
+    fields['data_offset'] = fields['data_offset'] - d0
+    return i2c_decode.Decoded(data=dec.data[d0:d1], **fields)
+
+
+def read_vcd(path, scl=i2c_decode.DEFAULT_SCL, sda=i2c_decode.DEFAULT_SDA, batch=BATCH):
+    """Yields Decoded batches of the transactions on the bus of a VCD."""
+    _, dec = i2c_decode.decode_vcd(path, scl, sda)
+    for lo in range(0, len(dec.addr), batch):
+        yield _slice(dec, lo, min(lo + batch, len(dec.addr)))
+
+
+def pointer_walk(dec, mem_addr, slave_addr=SLAVE_ADDR):
+    """Returns (matched mask, mem_addr at each matched transaction's first byte, final mem_addr)."""
+    matched = ((dec.addr == slave_addr) & (dec.addr_mode == it.I2C_ADDR_7BIT) &
+               (dec.status != it.I2C_STATUS_ADDR_NACK))
+    # Pointer advance of a matched transaction; a read whose last byte was ACKed loads one more
+    step = np.where(matched, dec.data_len + ((dec.direction == it.I2C_READ) & (dec.nack_received == 0)
+                                             & (dec.data_len > 0)), 0)
+    end_xor = np.where(dec.repeated_start != 0, 0, STOP_XOR)
+    base = []
+    for m, n, x in zip(matched.tolist(), step.tolist(), end_xor.tolist()):
+        mem_addr ^= START_XOR
+        if m:
+            base.append(mem_addr)
+            mem_addr = (mem_addr + n) & 0xFF
+        mem_addr ^= x
+    return matched, np.array(base, dtype=np.int64), mem_addr
+
+
+def replay(dec, state, first_index=0, slave_addr=SLAVE_ADDR):
+    """Replays one Decoded batch from state; returns ([Mismatch], bytes checked, new State)."""
+    matched, base, mem_addr = pointer_walk(dec, state.mem_addr, slave_addr)
+    tr = np.flatnonzero(matched)
+    lens = dec.data_len[tr]
+    total = int(lens.sum())
+    if not total:
+        return [], 0, State(mem_addr, state.memory, state.known)
+
+    # One row per data byte of a matched transaction, in bus order
+    byte_tr = np.repeat(tr, lens)
+    pos = np.arange(total) - np.repeat(np.cumsum(lens) - lens, lens)
+    addr = (np.repeat(base, lens) + pos) & 0xFF
+    value = dec.data[np.repeat(dec.data_offset[tr], lens) + pos]
+    is_write = dec.direction[byte_tr] == it.I2C_WRITE
+
+    # Sorted by (address, bus order): the last write at or before each byte of the same address
+    order = np.lexsort((np.arange(total), addr))
+    a_s, w_s, v_s = addr[order], is_write[order], value[order]
+    last_write = np.maximum.accumulate(np.where(w_s, np.arange(total), -1))
+    group_start = np.searchsorted(a_s, a_s, side='left')
+    in_batch = last_write >= group_start
+    expected = np.where(in_batch, v_s[np.maximum(last_write, 0)], state.memory[a_s])
+    known = in_batch | state.known[a_s]
+
+    bad = order[~w_s & known & (expected != v_s)]
+    bad.sort()
+    checked = int(np.count_nonzero(~w_s & known))
+    exp_by_byte = np.empty(total, dtype=np.uint8)
+    exp_by_byte[order] = expected
+    mismatches = [Mismatch(int(first_index + byte_tr[b]), int(dec.start_time[byte_tr[b]]), int(pos[b]),
+                           int(addr[b]), int(exp_by_byte[b]), int(value[b])) for b in bad]
+
+    # Memory after the batch: the last write of every address group
+    memory, known_mem = state.memory.copy(), state.known.copy()
+    group_end = np.searchsorted(a_s, a_s, side='right') - 1
+    last = np.flatnonzero((np.arange(total) == group_end) & in_batch)
+    memory[a_s[last]] = v_s[last_write[last]]
+    known_mem[a_s[last]] = True
+    return mismatches, checked, State(mem_addr, memory, known_mem)
+
+
+def check(batches, slave_addr=SLAVE_ADDR):
+    """Replays Decoded batches in order from reset; returns ([Mismatch], transactions, bytes checked)."""
+    state = reset_state()
+    mismatches = []
+    seen = checked = 0
+    for dec in batches:
+        found, n, state = replay(dec, state, seen, slave_addr)
+        mismatches.extend(found)
+        seen += len(dec.addr)
+        checked += n
+    return mismatches, seen, checked
+
+
+def _check_file(job):
+    path, scl, sda, marker, batch = job
+    start = time.time()
+    if path.endswith('.vcd'):
+        batches = read_vcd(path, scl, sda, batch)
+    else:
+        batches = read_log(path, marker, batch)
+    mismatches, seen, checked = check(batches)
+    return path, mismatches, seen, checked, time.time() - start
+
+
+def write_csv(path, results):
+    with open(path, 'w') as f:
+        f.write('File,Transaction,Time,Byte,Mem_Addr,Expected,Actual\n')
+        for src, mismatches, _, _, _ in results:
+            for m in mismatches:
+                f.write('{},{},{},{},0x{:02x},0x{:02x},0x{:02x}\n'.format(
+                    src, m.transaction, m.time, m.byte, m.mem_addr, m.expected, m.actual))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Check recorded read data against the i2c_slave memory model")
+    p.add_argument('files', nargs='+', help="waveforms (*.vcd) or simulation logs with convert2string dumps")
+    p.add_argument('--scl', default=i2c_decode.DEFAULT_SCL)
+    p.add_argument('--sda', default=i2c_decode.DEFAULT_SDA)
+    p.add_argument('--marker', default=DEFAULT_MARKER,
+                   help="regex in front of each dump in logs (default: scoreboard 'Received transaction #N:')")
+    p.add_argument('--batch', type=int, default=BATCH, help="transactions per replay batch")
+    p.add_argument('-j', '--jobs', type=int, default=None, help="checker processes for many files")
+    p.add_argument('--show', type=int, default=5, help="mismatches printed per file")
+    p.add_argument('--csv', default=None, help="write every mismatch to this CSV")
+    args = p.parse_args(argv)
+
+    start = time.time()
+    jobs = [(path, args.scl, args.sda, args.marker, args.batch) for path in args.files]
+    if len(jobs) > 1 and args.jobs != 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_check_file, jobs))
+    else:
+        results = [_check_file(j) for j in jobs]
+
+    total_tr = total_checked = total_bad = 0
+    for path, mismatches, seen, checked, elapsed in results:
+        print("{:<60} {:>10} transactions {:>11} bytes checked {:>7} mismatches  {:.2f} s".format(
+            path, seen, checked, len(mismatches), elapsed))
+        for m in mismatches[:args.show]:
+            print("    #{} @ {}: byte {} mem[0x{:02x}] exp=0x{:02x}, act=0x{:02x}".format(
+                m.transaction, m.time, m.byte, m.mem_addr, m.expected, m.actual))
+        total_tr += seen
+        total_checked += checked
+        total_bad += len(mismatches)
+    print("{} file(s), {} transactions, {} read bytes checked, {} mismatches in {:.2f} s".format(
+        len(results), total_tr, total_checked, total_bad, time.time() - start))
+    if args.csv:
+        write_csv(args.csv, results)
+        print("Mismatches written to: {}".format(args.csv))
+    return 1 if total_bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Precomputed constrained-random stimulus corpus for i2c_corpus_sequence.
+
+Samples i2c_transaction fields (direction, addr_mode, addr, repeated_start,
+data) with vectorized NumPy draws that meet the class constraints:
+
+* c_data_size_default: data.size() inside {[1:128]}
+* c_addr_7bit:         7-bit addresses inside {[0:127]} (10-bit: [0:1023])
+
+plus `dist`-style weights like the sequences use (i2c_mixed_sequence:
+direction 50/50, repeated_start 70/30). The same --seed always gives the
+same corpus, so a stimulus stream no longer depends on the simulator seed
+and can be replayed unchanged against every RTL drop.
+
+Binary format (streamed by i2c_corpus_sequence with $fgetc):
+
+    header  "I2CS", version 1, 3 reserved bytes
+    record  flags (bit0 direction, bit1 addr_mode, bit2 repeated_start),
+            addr[9:8], addr[7:0], size, then `size` payload bytes for writes
+            (reads carry only their size)
+
+--memh writes the same records as hex bytes, one record per line, for
+$readmemh into a `bit [7:0] mem[]` (the header comment gives its length).
+The last transaction always ends with a STOP.
+
+Usage:
+    python3 stim_corpus.py -n 1000000 --seed 7 -o sim/stim_corpus.bin
+    python3 stim_corpus.py -n 5000 --addr random --ten-bit-pct 10 --size 16:64 --memh burst.memh
+    python3 stim_corpus.py --check sim/stim_corpus.bin
+"""
+import argparse
+import collections
+import sys
+import time
+
+import numpy as np
+
+import i2c_types as it
+
+MAGIC = b'I2CS'
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION, 0, 0, 0])
+RECORD_HEADER = 4
+CHUNK = 1 << 20  # transactions sampled per draw
+
+# c_data_size_default / c_addr_7bit
+MIN_SIZE, MAX_SIZE = 1, 128
+MAX_ADDR = {it.I2C_ADDR_7BIT: 0x7F, it.I2C_ADDR_10BIT: 0x3FF}
+
+FLAG_READ = 1
+FLAG_10BIT = 2
+FLAG_RESTART = 4
+
+# Per-transaction arrays; write payloads live in one flat `data` array
+Corpus = collections.namedtuple('Corpus', [
+    'direction', 'addr_mode', 'addr', 'repeated_start', 'size', 'data_offset', 'data'])
+
+Weights = collections.namedtuple('Weights', ['read_pct', 'restart_pct', 'ten_bit_pct', 'addr', 'size'])
+
+DEFAULT_WEIGHTS = Weights(read_pct=50.0, restart_pct=30.0, ten_bit_pct=0.0, addr=0x55, size=(MIN_SIZE, MAX_SIZE))
+
+
+def sample(rng, n, w=DEFAULT_WEIGHTS):
+    """Draws n transactions; w.addr is a fixed address or None for uniform over the mode's range."""
+    direction = (rng.random(n) < w.read_pct / 100.0).astype(np.uint8)
+    addr_mode = (rng.random(n) < w.ten_bit_pct / 100.0).astype(np.uint8)
+    repeated_start = (rng.random(n) < w.restart_pct / 100.0).astype(np.uint8)
+    if w.addr is None:
+        addr = rng.integers(0, np.where(addr_mode == it.I2C_ADDR_10BIT, MAX_ADDR[it.I2C_ADDR_10BIT],
+                                        MAX_ADDR[it.I2C_ADDR_7BIT]) + 1).astype(np.uint16)
+    else:
+        addr = np.full(n, w.addr, dtype=np.uint16)
+    size = rng.integers(w.size[0], w.size[1] + 1, n).astype(np.uint8)
+    payload = np.where(direction == it.I2C_WRITE, size, 0).astype(np.int64)
+    data = rng.integers(0, 256, int(payload.sum()), dtype=np.uint8)
+    return Corpus(direction, addr_mode, addr, repeated_start, size,
+                  np.r_[0, np.cumsum(payload)[:-1]].astype(np.int64), data)
+
+
+def violations(c):
+    """Number of transactions breaking c_data_size_default or c_addr_7bit."""
+    bad_size = (c.size < MIN_SIZE) | (c.size > MAX_SIZE)
+    bad_addr = c.addr > np.where(c.addr_mode == it.I2C_ADDR_10BIT, MAX_ADDR[it.I2C_ADDR_10BIT],
+                                 MAX_ADDR[it.I2C_ADDR_7BIT])
+    return int(np.count_nonzero(bad_size | bad_addr))
+
+
+def encode(c):
+    """Record bytes of a Corpus as one uint8 array, and the end offset of every record."""
+    payload = np.where(c.direction == it.I2C_WRITE, c.size, 0).astype(np.int64)
+    rec_len = RECORD_HEADER + payload
+    rec_end = np.cumsum(rec_len)
+    rec_off = rec_end - rec_len
+    out = np.empty(int(rec_end[-1]) if len(rec_end) else 0, dtype=np.uint8)
+    out[rec_off] = c.direction * FLAG_READ | c.addr_mode * FLAG_10BIT | c.repeated_start * FLAG_RESTART
+    out[rec_off + 1] = c.addr >> 8
+    out[rec_off + 2] = c.addr & 0xFF
+    out[rec_off + 3] = c.size
+    total = int(payload.sum())
+    pos = np.arange(total) - np.repeat(np.cumsum(payload) - payload, payload)
+    out[np.repeat(rec_off + RECORD_HEADER, payload) + pos] = c.data
+    return out, rec_end
+
+
+def memh_lines(buf, rec_end):
+    """Hex bytes of encode() output, one record per line."""
+    text = np.frombuffer((buf.tobytes().hex(' ') + ' ').encode('ascii'), dtype=np.uint8).copy()
+    # Each byte is "xx" + separator; the separator after a record's last byte becomes the newline
+    text[3 * (rec_end - 1) + 2] = ord('\n')
+    return text.tobytes()
+
+
+def tally(c, counts):
+    """Adds a Corpus's transactions per (addr_mode, direction), repeated STARTs and bytes to counts."""
+    for mode in (it.I2C_ADDR_7BIT, it.I2C_ADDR_10BIT):
+        for d in (it.I2C_WRITE, it.I2C_READ):
+            counts[(mode, d)] += int(np.count_nonzero((c.addr_mode == mode) & (c.direction == d)))
+    counts['restart'] += int(c.repeated_start.sum())
+    counts['bytes'] += int(c.size.astype(np.int64).sum())
+    return counts
+
+
+def generate(n, seed, w=DEFAULT_WEIGHTS, out=None, memh=None, chunk=CHUNK):
+    """Samples and writes n transactions; returns (record bytes, transactions per mode/direction)."""
+    rng = np.random.default_rng(seed)
+    bin_f = open(out, 'wb') if out else None
+    memh_f = open(memh, 'wb') if memh else None
+    written = 0
+    counts = collections.Counter()
+    try:
+        if bin_f:
+            bin_f.write(HEADER)
+        if memh_f:
+            # Length in bytes, patched once known; fixed width keeps the header in place
+            memh_f.write('// i2c stimulus corpus: {:>12} transactions, seed {}, {:>14} bytes\n'.format(
+                n, seed, 0).encode('ascii'))
+        for lo in range(0, n, chunk):
+            c = sample(rng, min(chunk, n - lo), w)
+            if lo + chunk >= n:
+                c.repeated_start[-1] = 0
+            if violations(c):
+                raise ValueError("sampled transactions violate the i2c_transaction constraints")
+            buf, rec_end = encode(c)
+            if bin_f:
+                bin_f.write(buf.tobytes())
+            if memh_f:
+                memh_f.write(memh_lines(buf, rec_end))
+            written += len(buf)
+            tally(c, counts)
+        if memh_f:
+            memh_f.seek(0)
+            memh_f.write('// i2c stimulus corpus: {:>12} transactions, seed {}, {:>14} bytes\n'.format(
+                n, seed, written).encode('ascii'))
+    finally:
+        for f in (bin_f, memh_f):
+            if f:
+                f.close()
+    return written, counts
+
+
+def read_corpus(path):
+    """Decodes a binary corpus back into a Corpus."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw[:4] != MAGIC:
+        raise ValueError("{}: not an I2C stimulus corpus".format(path))
+    if raw[4] != VERSION:
+        raise ValueError("{}: corpus version {} (expected {})".format(path, raw[4], VERSION))
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    offs = []
+    p = len(HEADER)
+    # Record lengths depend on the previous records: one scalar walk over the headers
+    while p + RECORD_HEADER <= len(raw):
+        offs.append(p)
+        p += RECORD_HEADER + (raw[p + 3] if not raw[p] & FLAG_READ else 0)
+    if p != len(raw):
+        raise ValueError("{}: truncated record at byte {}".format(path, offs[-1] if offs else p))
+    rec = np.array(offs, dtype=np.int64)
+    flags = buf[rec]
+    direction = (flags & FLAG_READ).astype(np.uint8)
+    size = buf[rec + 3]
+    payload = np.where(direction == it.I2C_WRITE, size, 0).astype(np.int64)
+    pos = np.arange(int(payload.sum())) - np.repeat(np.cumsum(payload) - payload, payload)
+    return Corpus(direction=direction, addr_mode=((flags & FLAG_10BIT) >> 1).astype(np.uint8),
+                  addr=(buf[rec + 1].astype(np.uint16) << 8) | buf[rec + 2],
+                  repeated_start=((flags & FLAG_RESTART) >> 2).astype(np.uint8), size=size,
+                  data_offset=np.r_[0, np.cumsum(payload)[:-1]].astype(np.int64),
+                  data=buf[np.repeat(rec + RECORD_HEADER, payload) + pos])
+
+
+def print_summary(n, counts):
+    print("{:<16} | {:>12} | {:>12}".format("Address Mode", "Writes", "Reads"))
+    for mode, name in ((it.I2C_ADDR_7BIT, '7-bit'), (it.I2C_ADDR_10BIT, '10-bit')):
+        print("{:<16} | {:>12} | {:>12}".format(name, counts[(mode, it.I2C_WRITE)], counts[(mode, it.I2C_READ)]))
+    print("{} transactions, {} repeated STARTs, {} payload bytes".format(n, counts['restart'], counts['bytes']))
+
+
+def _size_range(text):
+    lo, _, hi = text.partition(':')
+    lo, hi = int(lo), int(hi or lo)
+    if not MIN_SIZE <= lo <= hi <= MAX_SIZE:
+        raise argparse.ArgumentTypeError("size range must lie within {}:{} (c_data_size_default)".format(
+            MIN_SIZE, MAX_SIZE))
+    return lo, hi
+
+
+def _pct(text):
+    v = float(text)
+    if not 0.0 <= v <= 100.0:
+        raise argparse.ArgumentTypeError("percentage must be within 0..100")
+    return v
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Generate a constrained-random I2C stimulus corpus")
+    p.add_argument('-n', '--transactions', type=int, default=100000)
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('-o', '--out', default=None, help="binary corpus for i2c_corpus_sequence")
+    p.add_argument('--memh', default=None, help="also write the records as $readmemh hex")
+    p.add_argument('--read-pct', type=_pct, default=DEFAULT_WEIGHTS.read_pct)
+    p.add_argument('--restart-pct', type=_pct, default=DEFAULT_WEIGHTS.restart_pct)
+    p.add_argument('--ten-bit-pct', type=_pct, default=DEFAULT_WEIGHTS.ten_bit_pct)
+    p.add_argument('--addr', default='0x55', help="fixed target address, or 'random' (default: 0x55)")
+    p.add_argument('--size', type=_size_range, default=DEFAULT_WEIGHTS.size, metavar='MIN:MAX',
+                   help="payload size range (default: 1:128)")
+    p.add_argument('--check', default=None, metavar='CORPUS', help="validate an existing binary corpus")
+    args = p.parse_args(argv)
+
+    if args.check:
+        c = read_corpus(args.check)
+        print_summary(len(c.size), tally(c, collections.Counter()))
+        bad = violations(c)
+        print("{} transaction(s) violate the i2c_transaction constraints".format(bad))
+        return 1 if bad else 0
+
+    if not args.out and not args.memh:
+        p.error("nothing to write: give -o and/or --memh")
+    addr = None if args.addr == 'random' else int(args.addr, 0)
+    if addr is not None and not 0 <= addr <= MAX_ADDR[it.I2C_ADDR_10BIT]:
+        p.error("--addr 0x{:x} is not a 10-bit address".format(addr))
+    if addr is not None and addr > MAX_ADDR[it.I2C_ADDR_7BIT] and args.ten_bit_pct < 100:
+        p.error("--addr 0x{:x} needs --ten-bit-pct 100 (c_addr_7bit: 0..127)".format(addr))
+    w = Weights(args.read_pct, args.restart_pct, args.ten_bit_pct, addr, args.size)
+
+    start = time.time()
+    written, counts = generate(args.transactions, args.seed, w, args.out, args.memh)
+    print_summary(args.transactions, counts)
+    for path in (args.out, args.memh):
+        if path:
+            print("Corpus written to: {}".format(path))
+    print("{} record bytes in {:.2f} s".format(written, time.time() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
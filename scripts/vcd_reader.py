@@ -0,0 +1,229 @@
+"""Memory-mapped streaming VCD reader for the I2C bus signals.
+
+Pulls only the requested scalar signals (e.g. tb_top.intf.scl/sda and the
+slv_*_oe / mst_*_oe enables) out of a VCD dump as compact NumPy arrays of
+(timestamp, value) transitions. The file is memory-mapped and scanned in
+fixed-size, newline-aligned chunks with vectorized NumPy line classification,
+so memory stays bounded whatever the dump size and no per-signal object
+model is ever built. Only the '#' lines and the value-change lines of the
+requested ID codes are located in each chunk; everything else is skipped.
+
+Values are encoded as uint8: 0, 1, 2 (x) and 3 (z). Timestamps are int64
+ticks of the dump's $timescale (see `timescale_s`).
+
+Usage:
+    python3 vcd_reader.py waves.vcd --list
+    python3 vcd_reader.py waves.vcd tb_top.intf.scl tb_top.intf.sda -o bus.npz
+"""
+import argparse
+import collections
+import mmap
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+# Scanned per chunk; bounds the temporary per-line arrays
+CHUNK_SIZE = 16 << 20
+
+VAL_X = 2
+VAL_Z = 3
+_VALUE_LUT = np.full(256, 255, dtype=np.uint8)
+for _c, _v in ((b'0', 0), (b'1', 1), (b'x', VAL_X), (b'X', VAL_X), (b'z', VAL_Z), (b'Z', VAL_Z)):
+    _VALUE_LUT[ord(_c)] = _v
+
+_UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9, 'ps': 1e-12, 'fs': 1e-15}
+
+VcdVar = collections.namedtuple('VcdVar', ['code', 'width'])
+Trace = collections.namedtuple('Trace', ['times', 'values'])
+
+
+def read_header(mm):
+    """Parses the declaration section; returns (timescale_s, {name: VcdVar}, body_offset)."""
+    end = mm.find(b'$enddefinitions')
+    if end < 0:
+        raise ValueError("Not a VCD file: no $enddefinitions")
+    header = mm[:end].decode('ascii', 'replace')
+    # Value changes start on the line after "$enddefinitions $end"
+    body = mm.find(b'\n', mm.find(b'$end', end + len(b'$enddefinitions'))) + 1 or len(mm)
+
+    timescale_s = 1e-9
+    m = re.search(r'\$timescale\s+(\d+)\s*([munpf]?s)\s+\$end', header)
+    if m:
+        timescale_s = int(m.group(1)) * _UNITS[m.group(2)]
+
+    signals = {}
+    scopes = []
+    for kw, rest in re.findall(r'\$(scope|upscope|var)\b(.*?)\$end', header, re.S):
+        tokens = rest.split()
+        if kw == 'scope':
+            scopes.append(tokens[1])
+        elif kw == 'upscope':
+            scopes.pop()
+        else:
+            # $var <type> <width> <code> <ref> [bit-select] $end
+            width, code, ref = int(tokens[1]), tokens[2], ''.join(tokens[3:])
+            signals['.'.join(scopes + [ref])] = VcdVar(code, width)
+    return timescale_s, signals, body
+
+
+def resolve(signals, name):
+    """Finds a signal by full hierarchical name or unique dotted suffix."""
+    if name in signals:
+        return name
+    matches = [s for s in signals if s.endswith('.' + name)]
+    if len(matches) != 1:
+        raise KeyError("Signal '{}' {} in VCD".format(name, 'is ambiguous' if matches else 'not found'))
+    return matches[0]
+
+
+def _parse_times(buf, pos):
+    """Vectorized decimal parse of the '#<ticks>' lines whose '#' is at `pos`."""
+    vals = np.zeros(len(pos), dtype=np.int64)
+    active = np.ones(len(pos), dtype=bool)
+    idx = pos + 1
+    for _ in range(19):
+        d = buf.take(idx, mode='clip') - np.uint8(48)  # non-digits wrap to > 9
+        active &= d <= 9
+        if not active.any():
+            break
+        np.multiply(vals, 10, out=vals, where=active)
+        np.add(vals, d, out=vals, where=active)
+        idx += 1
+    return vals
+
+
+def _scan_chunk(buf, wanted, cur_time):
+    """Returns ({code: (times, values)}, last_time) for one chunk.
+
+    `buf` starts with the newline that precedes its first line and ends with a
+    newline. Instead of splitting every line, only the '#' timestamps and the
+    `<value><code>` lines of the wanted codes are located, and only the
+    timestamps those lines refer to are parsed.
+    """
+    hashes = np.flatnonzero(buf == 35)  # '#'
+    hashes = hashes[buf[hashes - 1] == 10]
+
+    hits = {}
+    for code in wanted:
+        raw = code.encode('ascii')
+        n = len(raw)
+        pos = np.flatnonzero(buf == raw[0])
+        pos = pos[pos >= 2]
+        for j in range(1, n):
+            pos = pos[buf.take(pos + j, mode='clip') == raw[j]]
+        after = buf.take(pos + n, mode='clip')
+        val = _VALUE_LUT[buf[pos - 1]]
+        pos = pos[((after == 10) | (after == 13)) & (val != 255) & (buf[pos - 2] == 10)]
+        hits[code] = pos
+
+    # Timestamp index per hit (0 = carried in from the previous chunk)
+    needed = [np.searchsorted(hashes, pos) for pos in hits.values()]
+    used = np.zeros(len(hashes) + 1, dtype=bool)
+    for tidx in needed:
+        used[tidx] = True
+    used[-1] = True
+    sel = np.flatnonzero(used[1:]) + 1
+    times = np.full(len(hashes) + 1, cur_time, dtype=np.int64)
+    times[sel] = _parse_times(buf, hashes[sel - 1])
+
+    found = {}
+    for (code, pos), tidx in zip(hits.items(), needed):
+        if len(pos):
+            found[code] = (times[tidx], _VALUE_LUT[buf[pos - 1]])
+    return found, int(times[-1])
+
+
+def read_signals(path, names, chunk_size=CHUNK_SIZE):
+    """Returns (timescale_s, {name: Trace}) for the requested scalar signals."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            timescale_s, signals, offset = read_header(mm)
+            by_code = collections.OrderedDict()
+            for name in names:
+                full = resolve(signals, name)
+                var = signals[full]
+                if var.width != 1:
+                    raise ValueError("Signal '{}' is {} bits wide; only scalars are supported".format(
+                        full, var.width))
+                by_code.setdefault(var.code, []).append(name)
+
+            parts = dict((code, []) for code in by_code)
+            cur_time = 0
+            size = len(mm)
+            while offset < size:
+                stop = min(offset + chunk_size, size)
+                if stop < size:
+                    stop = mm.rfind(b'\n', offset, stop) + 1
+                    if stop <= offset:  # a single line longer than chunk_size
+                        stop = mm.find(b'\n', offset + chunk_size) + 1 or size
+                # Include the newline before the chunk so every line start is visible
+                buf = np.frombuffer(mm, dtype=np.uint8, count=stop - offset + 1, offset=offset - 1)
+                if buf[-1] != 10 or buf[0] != 10:
+                    buf = np.concatenate([[10], buf[1:], [10]]).astype(np.uint8)
+                found, cur_time = _scan_chunk(buf, by_code, cur_time)
+                for code, tv in found.items():
+                    parts[code].append(tv)
+                del buf
+                offset = stop
+        finally:
+            mm.close()
+
+    traces = {}
+    for code, aliases in by_code.items():
+        if parts[code]:
+            tr = Trace(np.concatenate([p[0] for p in parts[code]]),
+                       np.concatenate([p[1] for p in parts[code]]))
+        else:
+            tr = Trace(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8))
+        for name in aliases:
+            traces[name] = tr
+    return timescale_s, traces
+
+
+def list_signals(path):
+    """Returns {name: VcdVar} from the VCD header."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return read_header(mm)[1]
+        finally:
+            mm.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Extract scalar signal transitions from a VCD")
+    p.add_argument('vcd')
+    p.add_argument('signals', nargs='*', help="hierarchical names (or unique suffixes)")
+    p.add_argument('--list', action='store_true', help="list declared signals and exit")
+    p.add_argument('-o', '--out', default=None, help="save traces to a .npz file")
+    args = p.parse_args(argv)
+
+    if args.list or not args.signals:
+        for name, var in sorted(list_signals(args.vcd).items()):
+            print("{:<50} {:>4} {}".format(name, var.width, var.code))
+        return 0
+
+    start = time.time()
+    timescale_s, traces = read_signals(args.vcd, args.signals)
+    elapsed = time.time() - start
+    size_mb = os.path.getsize(args.vcd) / 1e6
+    for name in args.signals:
+        print("{:<40} {:>12} transitions".format(name, len(traces[name].times)))
+    print("Read {:.1f} MB in {:.2f} s ({:.0f} MB/s), timescale {:g} s".format(
+        size_mb, elapsed, size_mb / elapsed if elapsed > 0 else float('inf'), timescale_s))
+
+    if args.out:
+        arrays = {'timescale_s': np.float64(timescale_s)}
+        for name in args.signals:
+            arrays[name + '.times'] = traces[name].times
+            arrays[name + '.values'] = traces[name].values
+        np.savez(args.out, **arrays)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -158,4 +158,14 @@ module tb_top;
     $fsdbDumpvars(0, tb_top);
   end
 
+  // Optional VCD of the bus and drive enables for offline analysis
+  // (scripts/vcd_reader.py). Enable with +dump_vcd.
+  initial begin
+    if ($test$plusargs("dump_vcd")) begin
+      $dumpfile("waves.vcd");
+      $dumpvars(1, tb_top);       // slv_*_oe, mst_*_oe, ...
+      $dumpvars(1, tb_top.intf);  // scl, sda, scl_drive, sda_drive
+    end
+  end
+
 endmodule
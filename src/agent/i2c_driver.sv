@@ -7,6 +7,7 @@ class i2c_driver extends uvm_driver #(i2c_transaction);
   virtual i2c_if vif;
   i2c_config     cfg;
   time           idle_poll_time = 1000ns; // prevents busy-spins when no items are available
+  bit            active_is_master;        // role the driver last acted in
 
   function new(string name, uvm_component parent);
     super.new(name, parent);
@@ -16,12 +17,17 @@ class i2c_driver extends uvm_driver #(i2c_transaction);
     // Initialize Bus Drive to High-Z (Released)
     vif.scl_drive <= 1'b1;
     vif.sda_drive <= 1'b1;
+    active_is_master = cfg.is_master;
     
     forever begin
       // NOTE: cfg.is_master is allowed to change at runtime (dual-role).
       // The driver must therefore avoid indefinitely blocking in MASTER mode
       // when no new items are pending; otherwise role switching requires hacks
       // (e.g., injecting a "dummy" item to unblock get_next_item()).
+      if (cfg.is_master != active_is_master) begin
+        active_is_master = cfg.is_master;
+        report_role_active();
+      end
       if (cfg.is_master) begin
         // --- MASTER MODE ---
         // Non-blocking pull to allow role changes to take effect promptly.
@@ -43,6 +49,19 @@ class i2c_driver extends uvm_driver #(i2c_transaction);
     end
   endtask
 
+  // Logs the role the driver now acts in, with the latency from the last
+  // STOP and BUS_IDLE (parsed by scripts/role_latency.py); -1 = not seen.
+  function void report_role_active();
+    uvm_event stop_ev = i2c_event_pool::get_event(i2c_event_pool::STOP_DETECTED);
+    uvm_event idle_ev = i2c_event_pool::get_event(i2c_event_pool::BUS_IDLE);
+    real stop_us = stop_ev.is_off() ? -1.0 : ($realtime - stop_ev.get_trigger_time()) / 1us;
+    real idle_us = idle_ev.is_off() ? -1.0 : ($realtime - idle_ev.get_trigger_time()) / 1us;
+
+    i2c_event_pool::trigger_event(i2c_event_pool::ROLE_COMMITTED);
+    `uvm_info("DRV", $sformatf("ROLE_ACTIVE: %s stop_to_active_us=%0.3f idle_to_active_us=%0.3f",
+              active_is_master ? "SLAVE_TO_MASTER" : "MASTER_TO_SLAVE", stop_us, idle_us), UVM_LOW)
+  endfunction
+
   // -----------------------------------------------------------------------
   // MASTER MODE TASKS
   // -----------------------------------------------------------------------
@@ -41,6 +41,7 @@ package i2c_pkg;
   //============================================================================
   `include "seq/i2c_base_sequence.sv"
   `include "seq/i2c_mixed_sequence.sv"
+  `include "seq/i2c_corpus_sequence.sv"      // Streams scripts/stim_corpus.py output
   `include "seq/i2c_virtual_sequence.sv"     // Virtual sequences
 
 endpackage
@@ -22,6 +22,7 @@ package i2c_test_pkg;
   `include "tests/i2c_random_test.sv"
   `include "tests/i2c_slave_read_test.sv"
   `include "tests/i2c_master_fsm_test.sv"
+  `include "tests/i2c_corpus_test.sv"
 
 endpackage
 
@@ -0,0 +1,75 @@
+`ifndef I2C_CORPUS_SEQUENCE_SV
+`define I2C_CORPUS_SEQUENCE_SV
+
+//------------------------------------------------------------------------------
+// Corpus Sequence - streams a precomputed stimulus corpus
+// (scripts/stim_corpus.py) instead of randomizing each transaction.
+// Record: flags (bit0 direction, bit1 addr_mode, bit2 repeated_start),
+//         addr[9:8], addr[7:0], size, then size payload bytes for writes.
+//------------------------------------------------------------------------------
+class i2c_corpus_sequence extends i2c_base_sequence;
+  `uvm_object_utils(i2c_corpus_sequence)
+
+  // Binary corpus file; +I2C_CORPUS=<file> overrides
+  string corpus_file = "stim_corpus.bin";
+
+  // Transactions to send; -1 streams the whole corpus
+  int max_transactions = -1;
+
+  function new(string name = "i2c_corpus_sequence");
+    super.new(name);
+  endfunction
+
+  task body();
+    int fd;
+    int flags, addr_hi, addr_lo, size, c;
+    int count = 0;
+    int magic = 0;
+
+    void'($value$plusargs("I2C_CORPUS=%s", corpus_file));
+    fd = $fopen(corpus_file, "rb");
+    if (fd == 0) begin
+      `uvm_fatal("SEQ", $sformatf("Cannot open stimulus corpus %s", corpus_file))
+    end
+
+    // Header: "I2CS", version, 3 reserved bytes
+    repeat (4) magic = (magic << 8) | $fgetc(fd);
+    c = $fgetc(fd);
+    if (magic != 32'h49324353 || c != 1) begin // "I2CS"
+      `uvm_fatal("SEQ", $sformatf("%s is not a version 1 I2C stimulus corpus", corpus_file))
+    end
+    repeat (3) c = $fgetc(fd);
+
+    `uvm_info("SEQ", $sformatf("Streaming stimulus corpus %s", corpus_file), UVM_LOW)
+
+    while (max_transactions < 0 || count < max_transactions) begin
+      flags = $fgetc(fd);
+      if (flags < 0) break; // End of corpus
+      addr_hi = $fgetc(fd);
+      addr_lo = $fgetc(fd);
+      size    = $fgetc(fd);
+      if (size < 0) begin
+        `uvm_error("SEQ", $sformatf("Truncated record %0d in %s", count, corpus_file))
+        break;
+      end
+
+      req = i2c_transaction::type_id::create("req");
+      start_item(req);
+      req.direction      = i2c_direction_e'(flags & 1);
+      req.addr_mode      = i2c_addr_mode_e'((flags >> 1) & 1);
+      req.repeated_start = (flags >> 2) & 1;
+      req.addr           = ((addr_hi & 3) << 8) | addr_lo;
+      req.data           = new[size];
+      if (req.direction == I2C_WRITE) begin
+        foreach (req.data[i]) req.data[i] = $fgetc(fd);
+      end
+      finish_item(req);
+      count++;
+    end
+    $fclose(fd);
+
+    `uvm_info("SEQ", $sformatf("Finished Corpus Sequence: %0d transactions", count), UVM_LOW)
+  endtask
+endclass
+
+`endif // I2C_CORPUS_SEQUENCE_SV
@@ -0,0 +1,27 @@
+`ifndef I2C_CORPUS_TEST_SV
+`define I2C_CORPUS_TEST_SV
+
+// Replays a precomputed stimulus corpus (+I2C_CORPUS=<file>, see scripts/stim_corpus.py)
+class i2c_corpus_test extends i2c_test_base;
+  `uvm_component_utils(i2c_corpus_test)
+
+  function new(string name = "i2c_corpus_test", uvm_component parent = null);
+    super.new(name, parent);
+  endfunction
+
+  task run_phase(uvm_phase phase);
+    i2c_corpus_sequence seq;
+    phase.raise_objection(this);
+
+    `uvm_info("TEST", "Starting Corpus Test", UVM_LOW)
+
+    seq = i2c_corpus_sequence::type_id::create("seq");
+    seq.start(env.agent.sequencer);
+
+    #100us;
+    phase.drop_objection(this);
+  endtask
+
+endclass
+
+`endif // I2C_CORPUS_TEST_SV
@@ -0,0 +1,9 @@
+"""The tooling in scripts/ imports its siblings directly; put it on sys.path."""
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJ_ROOT = os.path.dirname(TESTS_DIR)
+STUB_DIR = os.path.join(TESTS_DIR, 'stubs')
+
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'scripts'))
@@ -0,0 +1,120 @@
+import os
+import subprocess
+
+import pytest
+
+import comp_cache
+from conftest import STUB_DIR
+
+VDB_FILE = os.path.join('coverage.vdb', 'snps', 'coverage', 'db', 'shape', 'line.verilog.shape.xml')
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A minimal project: sim/Makefile naming one RTL and one package file, src/ include tree."""
+    for d in ('sim', 'src', 'rtl'):
+        (tmp_path / d).mkdir()
+    (tmp_path / 'src' / 'pkg.sv').write_text("package p; endpackage\n")
+    (tmp_path / 'rtl' / 'dut.sv').write_text("module dut; endmodule\n")
+    (tmp_path / 'sim' / 'Makefile').write_text(
+        "PROJ_ROOT = ..\n"
+        "RTL = $(PROJ_ROOT)/rtl/dut.sv\n"
+        "PKG = $(PROJ_ROOT)/src/pkg.sv\n"
+        "INTF =\n"
+        "TOP =\n"
+        "COV_OPTS = -cm line -cm_dir coverage.vdb\n"
+        "VCS = {} -l comp.log $(COV_OPTS)\n".format(os.path.join(STUB_DIR, 'vcs')))
+    return tmp_path
+
+
+def build(tree, capsys, *extra):
+    status = comp_cache.main(['--sim-dir', str(tree / 'sim'), '--include-dir', str(tree / 'src'),
+                              '--cache-dir', str(tree / 'cache')] + list(extra))
+    return status, capsys.readouterr().out
+
+
+def sim_dir(tree):
+    return str(tree / 'sim')
+
+
+def make_clean(sim):
+    for name in ('simv', 'simv.daidir', 'coverage.vdb', 'comp.log', comp_cache.KEY_FILE):
+        comp_cache._remove(str(sim / name))
+
+
+def test_miss_then_up_to_date_then_hit_after_clean(tree, capsys):
+    sim = tree / 'sim'
+    status, out = build(tree, capsys)
+    assert status == 0 and 'miss' in out
+    built = (sim / VDB_FILE).read_text()
+
+    status, out = build(tree, capsys)
+    assert status == 0 and 'up to date' in out
+
+    make_clean(sim)
+    status, out = build(tree, capsys)
+    assert status == 0 and 'hit' in out
+    assert (sim / 'simv').exists()
+    # The compile-time coverage database comes back with simv
+    assert (sim / VDB_FILE).read_text() == built
+
+
+def test_source_and_flag_changes_miss(tree, capsys):
+    build(tree, capsys)
+    (tree / 'src' / 'pkg.sv').write_text("package p; int x; endpackage\n")
+    assert 'miss' in build(tree, capsys)[1]
+    (tree / 'src' / 'pkg.sv').write_text("package p; endpackage\n")
+    assert 'hit' in build(tree, capsys)[1]
+
+    cmd = "{} -l comp.log -cm line+tgl -cm_dir coverage.vdb ../src/pkg.sv ../rtl/dut.sv".format(
+        os.path.join(STUB_DIR, 'vcs'))
+    assert 'miss' in build(tree, capsys, '--compile-cmd', cmd)[1]
+    assert 'up to date' in build(tree, capsys, '--compile-cmd', cmd)[1]
+
+
+def test_simv_rebuilt_outside_the_cache_is_not_up_to_date(tree, capsys):
+    build(tree, capsys)
+    # A compile of edited sources that bypasses the cache (and keeps .comp_key), then a revert
+    (tree / 'rtl' / 'dut.sv').write_text("module dut; wire w; endmodule\n")
+    subprocess.check_call([os.path.join(STUB_DIR, 'vcs'), '-l', 'comp.log', '-cm', 'line', '-cm_dir', 'coverage.vdb'],
+                          cwd=sim_dir(tree))
+    (tree / 'rtl' / 'dut.sv').write_text("module dut; endmodule\n")
+    status, out = build(tree, capsys)
+    assert status == 0 and 'hit' in out
+
+
+def test_failed_compile_is_not_cached(tree, capsys, monkeypatch):
+    build(tree, capsys)
+    (tree / 'src' / 'pkg.sv').write_text("package p; syntax error\n")
+    monkeypatch.setenv('FAKE_VCS_FAIL', '1')
+    status, out = build(tree, capsys)
+    assert status != 0 and 'compile failed' in out
+    assert len(comp_cache.entries(str(tree / 'cache'))) == 1
+    assert not (tree / 'sim' / comp_cache.KEY_FILE).exists()
+
+
+def test_lru_eviction_keeps_recently_used(tree, capsys):
+    cache = str(tree / 'cache')
+    keys = []
+    for n in range(2):
+        (tree / 'src' / 'pkg.sv').write_text("package p{}; endpackage\n".format(n))
+        build(tree, capsys)
+        keys.append(comp_cache.read_key(sim_dir(tree)))
+    # Use the first build again: restore, then an up-to-date run
+    (tree / 'src' / 'pkg.sv').write_text("package p0; endpackage\n")
+    assert 'hit' in build(tree, capsys)[1]
+    before = dict(comp_cache.entries(cache))[keys[0]]['last_used']
+    assert 'up to date' in build(tree, capsys)[1]
+    assert dict(comp_cache.entries(cache))[keys[0]]['last_used'] > before
+
+    # Room for two entries: the third build evicts the least recently used one
+    (tree / 'src' / 'pkg.sv').write_text("package p2; endpackage\n")
+    status, out = build(tree, capsys, '--max-size', '250000')
+    assert status == 0 and 'evicted ' + keys[1][:12] in out
+    assert sorted(k for k, _ in comp_cache.entries(cache)) == sorted([keys[0], comp_cache.read_key(sim_dir(tree))])
+
+
+def test_coverage_dir():
+    assert comp_cache.coverage_dir('vcs -cm line -cm_dir cov.vdb x.sv') == 'cov.vdb'
+    assert comp_cache.coverage_dir('vcs -cm line x.sv') == 'simv.vdb'
+    assert comp_cache.coverage_dir('vcs x.sv') is None
@@ -0,0 +1,126 @@
+import os
+import re
+
+import cov_bins
+import cov_merge
+import cov_rank
+import regr_common as rc
+from conftest import TESTS_DIR
+
+REPORT = os.path.join(TESTS_DIR, 'data', 'grpinfo.txt')
+
+
+def test_parse_report_bins():
+    hits = cov_bins.read_report(REPORT)
+    assert hits == {
+        'i2c_protocol_cg/cp_addr_mode/addr_10bit': 0,
+        'i2c_protocol_cg/cp_addr_mode/addr_7bit': 48,
+        'i2c_protocol_cg/cp_direction/write': 29,
+        'i2c_protocol_cg/cp_direction/read': 19,
+        'i2c_protocol_cg/cp_data_size/large_burst': 0,
+        'i2c_protocol_cg/cp_data_size/single_byte': 31,
+        'i2c_protocol_cg/cp_data_size/small_burst': 17,
+        'i2c_protocol_cg/cross_dir_size/write.large_burst': 0,
+        'i2c_protocol_cg/cross_dir_size/read.large_burst': 0,
+        'i2c_protocol_cg/cross_dir_size/write.single_byte': 20,
+        'i2c_protocol_cg/cross_dir_size/write.small_burst': 9,
+        'i2c_protocol_cg/cross_dir_size/read.single_byte': 11,
+        'i2c_protocol_cg/cross_dir_size/read.small_burst': 8,
+        'i2c_config_cg/cp_speed/fast': 0,
+        'i2c_config_cg/cp_speed/fast_plus': 0,
+        'i2c_config_cg/cp_speed/standard': 1,
+    }
+
+
+def _expected_totals(text):
+    """{group/variable: EXPECTED} from the "Summary for Variable/Cross" tables of a report."""
+    totals = {}
+    group = variable = None
+    for line in text.splitlines():
+        m = cov_bins.GROUP_RE.match(line.strip())
+        if m:
+            group = re.split(r'::|\.', m.group(1))[-1]
+            continue
+        m = re.match(r'^Summary for (?:Variable|Cross) (\S+)', line)
+        if m:
+            variable = m.group(1)
+            continue
+        m = re.match(r'^(?:TOTAL|User Defined Bins|Auto Bins)\s+(\d+)', line)
+        if m and variable and group in cov_bins.DEFAULT_GROUPS:
+            totals['{}/{}'.format(group, variable)] = int(m.group(1))
+            variable = None
+    return totals
+
+
+def test_parsed_bins_match_expected_totals():
+    hits = cov_bins.read_report(REPORT)
+    totals = _expected_totals(rc.read_log(REPORT))
+    assert totals['i2c_protocol_cg/cross_dir_size'] == 6
+    counted = {}
+    for name in hits:
+        key = name.rsplit('/', 1)[0]
+        counted[key] = counted.get(key, 0) + 1
+    assert counted == totals
+
+
+def test_cov_rank_bin_space_includes_holes(tmp_path):
+    report = tmp_path / 'regr_runs' / 'i2c_burst_test_1' / 'urg' / 'grpinfo.txt'
+    report.parent.mkdir(parents=True)
+    report.write_text(rc.read_log(REPORT))
+    csv_path = str(tmp_path / 'regression_raw.csv')
+    rc.write_csv(csv_path, [{'Test_Name': 'i2c_burst_test', 'Iteration': 1, 'Seed': '7',
+                             'Status': 'PASS', 'CPU_Time_s': '1.00'}])
+    runs, index = cov_rank.load_runs([str(tmp_path / 'regr_runs')], csv_path)
+    assert len(index) == sum(_expected_totals(rc.read_log(REPORT)).values()) == 16
+    assert cov_bins.popcount(runs[0].bits) == 10
+
+
+def test_bitsets_count_only_hit_bins():
+    hits = cov_bins.read_report(REPORT)
+    index = cov_bins.bin_index(hits)
+    bits = cov_bins.to_bits(hits, index)
+    assert cov_bins.popcount(bits) == 10
+    assert 'i2c_config_cg/cp_speed/fast' not in cov_bins.bin_names(bits, index)
+
+
+def test_run_of_report_path():
+    assert cov_bins.run_of('/x/sim/regr_runs/i2c_burst_test_3/urg/grpinfo.txt') == ('i2c_burst_test', 3)
+
+
+HOLE_REPORT = """\
+Group : i2c_pkg::i2c_coverage::i2c_protocol_cg
+
+User Defined Bins for cp_direction
+
+NAME  COUNT AT LEAST
+write 3     1
+read  2     1
+
+User Defined Bins for cp_data_size
+
+NAME        COUNT AT LEAST
+single_byte 3     1
+large_burst 2     1
+
+Automatically Generated Cross Bins for cross_dir_size
+
+Element holes
+
+cp_direction cp_data_size COUNT AT LEAST NUMBER
+[read] [large_burst]      --    --       1
+
+Covered bins
+
+cp_direction cp_data_size COUNT AT LEAST
+write        single_byte  2     1
+write        large_burst  1     1
+read         single_byte  2     1
+"""
+
+
+def test_cross_holes_keep_closure_open(tmp_path):
+    conn = cov_merge.connect(str(tmp_path / 'regr_index.db'))
+    cov_merge.ingest(conn, 'i2c_burst_test', '1', cov_bins.parse_report(HOLE_REPORT))
+    assert cov_merge.status(conn)[:2] == (7, 8)
+    assert cov_merge.missing(conn) == ['i2c_protocol_cg/cross_dir_size/read.large_burst']
+    assert not cov_merge.closed(conn)
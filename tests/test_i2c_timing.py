@@ -0,0 +1,59 @@
+import numpy as np
+
+import i2c_decode
+import i2c_timing
+import i2c_types as it
+from vcd_reader import Trace
+
+
+def _trace(changes):
+    times, values = zip(*changes)
+    return Trace(np.array(times, dtype=np.int64), np.array(values, dtype=np.uint8))
+
+
+# START, one bit, STOP, START after 500 ns of bus free, one bit, repeated START
+# 3000 ns after the SCL rise, STOP. Times in ns.
+SCL = _trace([(0, 1), (5000, 0), (10000, 1), (14000, 0), (19000, 1), (28000, 0), (33000, 1),
+              (40500, 0), (45500, 1)])
+SDA = _trace([(0, 1), (1000, 0), (5100, 1), (14100, 0), (23000, 1), (23500, 0), (28100, 1),
+              (36000, 0), (40600, 1), (40700, 0), (49500, 1)])
+
+
+def test_t_su_sta_only_for_repeated_start():
+    intervals, _, _ = i2c_timing.measure(i2c_decode.bus_events(SCL, SDA), 1.0)
+    times, vals = intervals['t_su_sta']
+    assert list(times) == [36000] and list(vals) == [3000]
+    assert list(intervals['t_buf'][1]) == [500]
+
+
+def test_check_run_flags_restart_setup_and_bus_free():
+    violations, stats = i2c_timing.check_run(i2c_decode.bus_events(SCL, SDA), 1.0, 'standard')
+    assert sorted((v.check, v.time_ns) for v in violations) == [('t_buf', 23000.0), ('t_su_sta', 36000.0)]
+    assert 't_vd_dat' not in stats
+    assert stats['t_hd_dat']['max'] == 200
+
+
+def _fast_transactions(n, gap):
+    """n fast-mode transactions (START, 9 clocks, STOP) separated by `gap` ns of idle bus."""
+    scl, sda = [(0, 1)], [(0, 1)]
+    t = 1000
+    for _ in range(n):
+        sda.append((t, 0))                       # START
+        t += 700
+        scl.append((t, 0))
+        for _ in range(9):
+            scl += [(t + 1300, 1), (t + 2000, 0)]
+            t += 2000
+        scl.append((t + 1300, 1))
+        sda.append((t + 2000, 1))                # STOP
+        t += 2000 + gap
+    return _trace(scl), _trace(sda)
+
+
+def test_auto_speed_ignores_idle_gaps():
+    ev = i2c_decode.bus_events(*_fast_transactions(5, 100000))
+    intervals, t_start, t_stop = i2c_timing.measure(ev, 1.0)
+    modes, _ = i2c_timing.classify(intervals, t_start, t_stop, 'auto')
+    assert set(modes) == {it.I2C_FAST_MODE}
+    assert i2c_timing.check_run(ev, 1.0, 'auto')[0] == []
+    assert i2c_timing.check_run(ev, 1.0, 'standard')[0] != []
@@ -0,0 +1,29 @@
+import regr_common as rc
+import regr_index
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_status_follows_exit_status_in_csv(tmp_path):
+    # The log claims PASSED, but simv exited non-zero: regr_paper calls that FAIL
+    _write(tmp_path / 'regr_runs' / 'i2c_nack_test_1' / 'run_i2c_nack_test_1.log',
+           "NOTE: automatic random seed used: 42\n    TEST STATUS: PASSED\n")
+    conn = regr_index.connect(str(tmp_path / 'regr_index.db'))
+    regr_index.ingest(conn, [str(tmp_path)], jobs=1)
+    assert conn.execute('SELECT seed, status FROM runs').fetchall() == [('42', 'PASS')]
+
+    rc.write_csv(str(tmp_path / 'regression_raw.csv'), [
+        {'Test_Name': 'i2c_nack_test', 'Iteration': 1, 'Seed': '42', 'Status': 'FAIL', 'CPU_Time_s': '1.00'}])
+    assert regr_index.ingest(conn, [str(tmp_path)], jobs=1) == (1, 0)
+    assert conn.execute('SELECT status FROM runs').fetchall() == [('FAIL',)]
+    assert regr_index.ingest(conn, [str(tmp_path)], jobs=1) == (0, 1)
+
+
+def test_parse_run_log_with_exit_status():
+    text = "    TEST STATUS: PASSED\n"
+    assert rc.parse_run_log(text)['status'] == 'PASS'
+    assert rc.parse_run_log(text, returncode=1)['status'] == 'FAIL'
+    assert rc.parse_run_log(text + rc.ABORT_MARKER + '\n', returncode=0)['status'] == 'EARLY_ABORT'
@@ -0,0 +1,30 @@
+import os
+
+import regr_common as rc
+import regr_monitor
+import regr_parallel
+from conftest import STUB_DIR
+
+
+def test_stale_log_in_reused_run_dir_is_ignored(tmp_path, monkeypatch):
+    run_dir = tmp_path / 'regr_runs' / 'i2c_sanity_test_1'
+    run_dir.mkdir(parents=True)
+    (run_dir / rc.log_name('i2c_sanity_test', 1)).write_text(
+        "UVM_ERROR ./src/env/i2c_scoreboard.sv(160) @ 12000: uvm_test_top.env.scoreboard [SCB] mismatch\n" * 3)
+    seeds = tmp_path / 'seeds.csv'
+    seeds.write_text("Test_Name,Seed\ni2c_sanity_test,5\n")
+    monkeypatch.setenv('STUB_SLEEP', '0.5')
+    assert regr_parallel.main(['--sim-dir', str(tmp_path), '--simv', os.path.join(STUB_DIR, 'simv_queue'),
+                               '--seeds', str(seeds), '--max-errors', '1', '-j', '1', '--no-schedule']) == 0
+    rows = rc.read_csv(str(tmp_path / 'regression_raw.csv'))
+    assert [(r['Seed'], r['Status']) for r in rows] == [('5', 'PASS')]
+
+
+def test_truncated_log_is_reread_from_the_start(tmp_path):
+    log = tmp_path / 'run.log'
+    log.write_text("UVM_INFO @ 0: reporter [RNTST] earlier run\n" * 50)
+    cmd = ['sh', '-c', 'sleep 0.5; echo "UVM_INFO @ 0: start" > {0}; sleep 0.5; '
+                       'echo "UVM_ERROR @ 10: mismatch" >> {0}; sleep 5'.format(log)]
+    _, status, reason = regr_monitor.run_monitored(cmd, str(log), max_errors=1, poll_s=0.05)
+    assert status == 'EARLY_ABORT'
+    assert 'mismatch' in reason
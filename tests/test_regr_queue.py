@@ -0,0 +1,136 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import regr_common as rc
+import regr_queue
+from conftest import PROJ_ROOT, STUB_DIR
+
+SCRIPT = os.path.join(PROJ_ROOT, 'scripts', 'regr_queue.py')
+
+
+def _submit(tmp_path, *tests, iterations=1):
+    queue = str(tmp_path / 'q')
+    assert regr_queue.main(['submit', queue, '-n', str(iterations), '-t'] + list(tests)) == 0
+    seeds = [regr_queue._read_json(os.path.join(queue, 'pending', n))
+             for n in regr_queue._names(queue, 'pending')]
+    return queue, seeds
+
+
+def _worker(tmp_path, queue, sleep, stale, log_name, *extra):
+    env = dict(os.environ, STUB_SLEEP=str(sleep), STUB_PID_LOG=str(tmp_path / 'simv.pids'))
+    with open(str(tmp_path / log_name), 'w') as out:
+        return subprocess.Popen(
+            [sys.executable, SCRIPT, 'work', queue, '-j', '1', '--sim-dir', str(tmp_path),
+             '--simv', os.path.join(STUB_DIR, 'simv_queue'), '--out-dir', str(tmp_path / 'runs'),
+             '--heartbeat', '0.2', '--stale', str(stale)] + list(extra),
+            stdout=out, stderr=subprocess.STDOUT, env=env)
+
+
+def _wait(cond, timeout=30.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _simv_pids(tmp_path, parent=None):
+    """pids of the stub simv processes started (by `parent`), from $STUB_PID_LOG."""
+    try:
+        with open(str(tmp_path / 'simv.pids')) as f:
+            entries = [line.split() for line in f]
+    except IOError:
+        return []
+    return [int(pid) for pid, ppid, _ in entries if parent is None or int(ppid) == parent]
+
+
+def _alive(pid):
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except IOError:
+        return False
+
+
+def _claims(queue, pid):
+    return [n for n in regr_queue._names(queue, 'running') if '.{}.'.format(pid) in n]
+
+
+def test_killed_worker_is_requeued_and_cleaned_up(tmp_path):
+    queue, jobs = _submit(tmp_path, 'i2c_sanity_test', 'i2c_burst_test', iterations=3)
+    workers = [_worker(tmp_path, queue, 1.5, 1.5, 'worker{}.out'.format(n)) for n in range(3)]
+    victim = workers[0]
+    assert _wait(lambda: _claims(queue, victim.pid) and _simv_pids(tmp_path, victim.pid))
+    orphan = _simv_pids(tmp_path, victim.pid)[0]
+    victim.kill()
+    victim.wait()
+    if regr_queue.LAUNCHER:
+        assert _wait(lambda: not _alive(orphan), timeout=0.5)
+    for w in workers[1:]:
+        assert w.wait(timeout=60) == 0
+
+    assert os.listdir(os.path.join(queue, 'workers')) == []
+    assert not regr_queue._names(queue, 'pending') and not regr_queue._names(queue, 'running')
+
+    csv_path = str(tmp_path / 'regression_raw.csv')
+    assert regr_queue.main(['collect', queue, '--csv', csv_path]) == 0
+    rows = rc.read_csv(csv_path)
+    assert [(r['Test_Name'], r['Iteration'], r['Seed'], r['Status']) for r in rows] == \
+        [(j['test'], str(j['iteration']), j['seed'], 'PASS') for j in jobs]
+    with open(str(tmp_path / 'regr_paper.log')) as f:
+        combined = f.read()
+    assert len([n for n in os.listdir(os.path.join(queue, 'done')) if n.endswith('.out')]) == len(jobs)
+    for j in jobs:
+        assert "{} seed {}".format(j['test'], j['seed']) in combined
+
+
+def test_lost_claim_kills_simv(tmp_path):
+    queue, _ = _submit(tmp_path, 'i2c_sanity_test')
+    worker = _worker(tmp_path, queue, 30, 600, 'worker.out')
+    try:
+        assert _wait(lambda: _claims(queue, worker.pid) and _simv_pids(tmp_path))
+        simv = _simv_pids(tmp_path)[0]
+        # Another worker requeued the job and claimed it for itself
+        claimed = _claims(queue, worker.pid)[0]
+        os.rename(os.path.join(queue, 'running', claimed),
+                  os.path.join(queue, 'running', claimed.split('@')[0] + '@other.1.0'))
+        assert _wait(lambda: not _alive(simv), timeout=10)
+        assert not regr_queue._names(queue, 'done')
+    finally:
+        worker.kill()
+        worker.wait()
+
+
+def test_interrupted_worker_hands_back_its_jobs(tmp_path):
+    queue, _ = _submit(tmp_path, 'i2c_sanity_test')
+    worker = _worker(tmp_path, queue, 30, 600, 'worker.out')
+    assert _wait(lambda: _claims(queue, worker.pid) and _simv_pids(tmp_path))
+    simv = _simv_pids(tmp_path)[0]
+    worker.send_signal(signal.SIGINT)
+    assert worker.wait(timeout=20) == 130
+    assert not _alive(simv)
+    assert len(regr_queue._names(queue, 'pending')) == 1
+    assert not regr_queue._names(queue, 'running')
+    assert os.listdir(os.path.join(queue, 'workers')) == []
+
+
+def test_requeued_job_ignores_the_dead_runs_log(tmp_path):
+    queue, jobs = _submit(tmp_path, 'i2c_sanity_test')
+    # A dead worker claimed the job and left a partial log with errors in its run dir
+    name = regr_queue._names(queue, 'pending')[0]
+    claimed = os.path.join(queue, 'running', name + '@dead.1.0')
+    os.rename(os.path.join(queue, 'pending', name), claimed)
+    os.utime(claimed, (time.time() - 3600, time.time() - 3600))
+    run_dir = tmp_path / 'runs' / 'i2c_sanity_test_1'
+    run_dir.mkdir(parents=True)
+    (run_dir / rc.log_name('i2c_sanity_test', 1)).write_text(
+        "UVM_ERROR ./src/env/i2c_scoreboard.sv(160) @ 12000: uvm_test_top.env.scoreboard [SCB] mismatch\n" * 3)
+
+    worker = _worker(tmp_path, queue, 0.5, 1.5, 'worker.out', '--max-errors', '1')
+    assert worker.wait(timeout=60) == 0
+    rows = regr_queue.results(queue)
+    assert [(r['Seed'], r['Status']) for r in rows] == [(jobs[0]['seed'], 'PASS')]
@@ -0,0 +1,28 @@
+import pytest
+
+import regr_common as rc
+import regr_parallel
+
+
+def test_parse_seed_vcs_note():
+    log = "Chronologic VCS simulator\nNOTE: automatic random seed used: 1524717782\nUVM_INFO @ 0: ...\n"
+    assert rc.parse_seed(log) == '1524717782'
+
+
+def test_parse_seed_fixed_seed_run_prints_none():
+    assert rc.parse_seed("UVM_INFO @ 0: reporter [RNTST] Running test i2c_sanity_test...\n") == ''
+
+
+def test_load_seed_list(tmp_path):
+    path = tmp_path / 'nightly_seeds.csv'
+    path.write_text("Test_Name,Seed\ni2c_nack_test,17\ni2c_burst_test,4\ni2c_nack_test, 99\n")
+    jobs, seeds = regr_parallel.load_seed_list(str(path))
+    assert jobs == [('i2c_nack_test', 1), ('i2c_burst_test', 1), ('i2c_nack_test', 2)]
+    assert seeds[('i2c_nack_test', 2)] == '99'
+
+
+def test_load_seed_list_rejects_log_text(tmp_path):
+    path = tmp_path / 'nightly_seeds.csv'
+    path.write_text("Test_Name,Seed\ni2c_nack_test,NOTE: automatic random seed used: 17\n")
+    with pytest.raises(ValueError):
+        regr_parallel.load_seed_list(str(path))
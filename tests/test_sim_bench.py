@@ -0,0 +1,27 @@
+import os
+
+import sim_bench
+from conftest import STUB_DIR
+
+
+def _run(tmp_path, commit, *extra):
+    return sim_bench.main(['--db', str(tmp_path / 'regr_index.db'), 'run', '--commit', commit,
+                           '--sim-dir', str(tmp_path), '--simv', os.path.join(STUB_DIR, 'simv_bench'),
+                           '--no-cov', '-t', 'i2c_sanity_test', 'i2c_burst_test', '-s', '1', '2', '3',
+                           '-r', '3'] + list(extra))
+
+
+def test_injected_slowdown_is_flagged(tmp_path, monkeypatch, capsys):
+    assert _run(tmp_path, 'base', '--set-baseline') == 0
+    monkeypatch.setenv('STUB_SLOWDOWN', '0.3')
+    assert _run(tmp_path, 'head') == 1
+    out = capsys.readouterr().out
+    assert 'SLOWER' in out
+
+
+def test_cpu_time_falls_back_to_rusage(tmp_path, monkeypatch):
+    monkeypatch.setenv('STUB_NO_CPU', '1')
+    assert _run(tmp_path, 'base') == 0
+    conn = sim_bench.connect(str(tmp_path / 'regr_index.db'))
+    runs = sim_bench.load(conn, 'base')
+    assert len(runs) == 18 and all(r.status == 'PASS' and r.cpu_s > 0 for r in runs)